@@ -6,8 +6,12 @@ from collections import Counter
 import requests
 import logging
 from urllib3.exceptions import InsecureRequestWarning
-from urllib.parse import urlparse, parse_qs
-from modules.helper_function import*
+from modules.report import analyze_sitemap_categories, filter_pages, sitemap_languages
+from modules.engine import EXECUTORS, AuditEngine
+from modules.instrumentation import metrics, metrics_frame, timed
+from modules.page_sampling import live_pages
+from modules.profiling import AuditProfiler
+from modules.sitemaps import unique_sitemap_urls
 
 # Disable SSL warnings
 requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
@@ -20,65 +24,6 @@ DATA_FILE_PATH = BASE_DIR / "Data" / "efax_internal_html.csv"
 ALT_TAG_DATA_PATH = BASE_DIR / "Data" / "images_missing_alt_text_efax.csv"
 ORPHAN_PAGES_DATA_PATH = BASE_DIR / "Data" / "efax_orphan_urls.csv"
 
-def filter_pages(df, include_query_params=False, custom_exclusions=None):
-    original_count = len(df)
-    
-    default_exclusions = {
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-        '.zip', '.rar', '.tar', '.gz', '.7z',
-        '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp',
-        '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.mp3', '.wav', '.ogg',
-        '.css', '.js', '.xml', '.json', '.txt', '.csv',
-        '.woff', '.woff2', '.ttf', '.eot', '.otf'
-    }
-    
-    if custom_exclusions:
-        default_exclusions.update(custom_exclusions)
-    
-    filtered_df = df.copy()
-    
-    filter_stats = {
-        'original_count': original_count,
-        'excluded_extensions': 0,
-        'excluded_query_params': 0,
-        'excluded_fragments': 0,
-        'final_count': 0
-    }
-    
-    extension_mask = filtered_df['Address'].str.lower().str.contains(
-        '|'.join([f'\\{ext}' for ext in default_exclusions]), 
-        regex=True, 
-        na=False
-    )
-    excluded_by_extension = filtered_df[extension_mask]
-    filter_stats['excluded_extensions'] = len(excluded_by_extension)
-    filtered_df = filtered_df[~extension_mask]
-
-    if not include_query_params:
-        query_mask = filtered_df['Address'].str.contains(r'\?', regex=True, na=False)
-        excluded_by_query = filtered_df[query_mask]
-        filter_stats['excluded_query_params'] = len(excluded_by_query)
-        filtered_df = filtered_df[~query_mask]
-    
-    fragment_mask = filtered_df['Address'].str.contains(r'#', regex=True, na=False)
-    excluded_by_fragment = filtered_df[fragment_mask]
-    filter_stats['excluded_fragments'] = len(excluded_by_fragment)
-    filtered_df = filtered_df[~fragment_mask]
-    
-    api_mask = filtered_df['Address'].str.contains(r'/api/|/ajax/|/json/|\.json|\.xml', regex=True, na=False)
-    excluded_by_api = filtered_df[api_mask]
-    filter_stats['excluded_api'] = len(excluded_by_api)
-    filtered_df = filtered_df[~api_mask]
-    
-    admin_mask = filtered_df['Address'].str.contains(r'/admin/|/wp-admin/|/administrator/|/backend/', regex=True, na=False)
-    excluded_by_admin = filtered_df[admin_mask]
-    filter_stats['excluded_admin'] = len(excluded_by_admin)
-    filtered_df = filtered_df[~admin_mask]
-    
-    filter_stats['final_count'] = len(filtered_df)
-    
-    return filtered_df, filter_stats
-
 def display_filter_summary(filter_stats):
     """Display filtering summary in Streamlit"""
     st.subheader("🔍 Page Filtering Summary")
@@ -178,6 +123,8 @@ def main():
         "A comprehensive analysis of your website's SEO health based on Screaming Frog data and sitemap analysis"
     )
     st.divider()
+    # Metrics cover this script run only
+    metrics.reset()
 
     try:
         file_option = st.radio(
@@ -187,9 +134,10 @@ def main():
         df = None
         alt_tag_df = None
         orphan_pages_df = None
+        inlinks_file = None
 
         if file_option == "Upload files":
-            st.info("You must upload all three files to proceed with the analysis")
+            st.info("Upload the main and alt tag files, plus either the orphan pages file or the all_inlinks export")
 
             col1, col2, col3 = st.columns(3)
 
@@ -201,10 +149,11 @@ def main():
                     key="main_file"
                 )
                 if main_file:
-                    if main_file.name.endswith(".csv"):
-                        df = pd.read_csv(main_file)
-                    else:
-                        df = pd.read_excel(main_file)
+                    with timed("csv.load"):
+                        if main_file.name.endswith(".csv"):
+                            df = pd.read_csv(main_file)
+                        else:
+                            df = pd.read_excel(main_file)
                     st.success(f"✅ Main file uploaded with {len(df)} rows")
                 else:
                     st.warning("Main file required")
@@ -241,16 +190,26 @@ def main():
                         f"✅ Orphan pages file uploaded with {len(orphan_pages_df)} rows"
                     )
                 else:
-                    st.warning("Orphan pages file required")
+                    st.warning("Orphan pages file required without all_inlinks")
+
+            st.markdown("### All Inlinks Data (optional)")
+            inlinks_file = st.file_uploader(
+                "Upload Screaming Frog all_inlinks CSV export",
+                type=["csv"],
+                key="inlinks_file",
+                help="Used for orphan pages, click depth, link score and broken link sources"
+            )
+            if inlinks_file:
+                st.success("✅ All inlinks file uploaded")
 
             all_files_uploaded = (
                 main_file is not None
                 and alt_tag_file is not None
-                and orphan_file is not None
+                and (orphan_file is not None or inlinks_file is not None)
             )
 
             if not all_files_uploaded:
-                st.warning("Please upload all three required files to continue")
+                st.warning("Please upload all required files to continue")
                 return
 
         else:
@@ -259,9 +218,10 @@ def main():
                 and os.path.exists(ALT_TAG_DATA_PATH)
                 and os.path.exists(ORPHAN_PAGES_DATA_PATH)
             ):
-                df = pd.read_csv(DATA_FILE_PATH)
-                alt_tag_df = pd.read_csv(ALT_TAG_DATA_PATH)
-                orphan_pages_df = pd.read_csv(ORPHAN_PAGES_DATA_PATH)
+                with timed("csv.load"):
+                    df = pd.read_csv(DATA_FILE_PATH)
+                    alt_tag_df = pd.read_csv(ALT_TAG_DATA_PATH)
+                    orphan_pages_df = pd.read_csv(ORPHAN_PAGES_DATA_PATH)
             else:
                 missing_files = []
                 if not os.path.exists(DATA_FILE_PATH):
@@ -281,16 +241,40 @@ def main():
 
         st.divider()
 
+        with st.expander("⚙️ Execution Settings", expanded=False):
+            executor = st.selectbox(
+                "Execution backend",
+                EXECUTORS,
+                format_func=lambda name: {"serial": "Serial (single core)", "process": "Parallel (process pool)"}.get(name, name),
+                help="Parallel mode splits large crawls by row range across CPU cores"
+            )
+            workers = st.number_input(
+                "Worker processes",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=os.cpu_count() or 1,
+                disabled=executor != "process",
+            )
+            schema_inventory = st.checkbox(
+                "Full-site schema inventory",
+                help="Fetch every indexable page of the crawl and report schema coverage per URL template (slow on large sites)"
+            )
+            profile_run = st.checkbox(
+                "Profile this run",
+                help="Record a CPU profile, a flamegraph and the top memory allocations of the analysis, offered as downloads afterwards"
+            )
+
         if st.button("🚀 Generate Web Audit Report", type="primary", use_container_width=True):
             
             if df is not None and len(df) > 0:
                 # Apply filtering to main dataset
                 if 'Address' in df.columns:
-                    filtered_df, filter_stats = filter_pages(
-                        df, 
-                        include_query_params=False,
-                        custom_exclusions=None
-                    )
+                    with timed("filter"):
+                        filtered_df, filter_stats = filter_pages(
+                            df, 
+                            include_query_params=False,
+                            custom_exclusions=None
+                        )
                     
                     # Display filtering summary
                     display_filter_summary(filter_stats)
@@ -310,45 +294,69 @@ def main():
                 )
                 website_url = f"https://{domain}" if not domain.startswith('http') else domain
                 
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                profiler = None
+                if profile_run:
+                    profiler = AuditProfiler("streamlit")
+                    try:
+                        profiler.start()
+                    except RuntimeError as e:
+                        st.warning(f"Profiling skipped: {e}")
+                        profiler = None
+
+                engine = AuditEngine(executor=executor, workers=int(workers))
+                try:
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
                 
-                status_text.text("🔍 Analyzing sitemap...")
-                progress_bar.progress(20)
+                    status_text.text("🔍 Analyzing sitemap...")
+                    progress_bar.progress(20)
                 
-                try:
-                    sitemap_urls = fetch_sitemap_urls(website_url)
-                    if sitemap_urls:
-                        unique_count = len(set(sitemap_urls))
-                        total_count = len(sitemap_urls)
-                        logger.info(f"Found {total_count} total URLs, {unique_count} unique URLs")
+                    try:
+                        sitemap_entries = list(engine.sitemap_entries(website_url))
+                        sitemap_urls = unique_sitemap_urls(entry.loc for entry in sitemap_entries)
+                        if sitemap_urls:
+                            unique_count = len(set(sitemap_urls))
+                            total_count = len(sitemap_entries)
+                            logger.info(f"Found {total_count} total URLs, {unique_count} unique URLs")
                         
-                        category_counts, language_counts, categorized_urls = analyze_sitemap_categories(sitemap_urls)
-                        sitemap_success = True
-                    else:
+                            category_counts, language_counts, categorized_urls = analyze_sitemap_categories(
+                                sitemap_urls, languages=sitemap_languages(sitemap_entries)
+                            )
+                            sitemap_success = True
+                        else:
+                            category_counts, language_counts, categorized_urls = Counter(), Counter(), []
+                            sitemap_success = False
+                    except Exception as e:
                         category_counts, language_counts, categorized_urls = Counter(), Counter(), []
                         sitemap_success = False
-                except Exception as e:
-                    category_counts, language_counts, categorized_urls = Counter(), Counter(), []
-                    sitemap_success = False
-                    st.error(f"Error analyzing sitemap: {str(e)}")
+                        st.error(f"Error analyzing sitemap: {str(e)}")
                 
-                progress_bar.progress(40)
+                    progress_bar.progress(40)
                 
-                status_text.text("📊 Generating SEO analysis...")
-                progress_bar.progress(60)
+                    inventory = None
+                    if schema_inventory:
+                        inventory_pages = live_pages(df_for_analysis).tolist()
+                        status_text.text(f"🧩 Inventorying schema markup of {len(inventory_pages):,} pages...")
+                        inventory = engine.schema_inventory(
+                            inventory_pages, website_url,
+                            progress=lambda done: status_text.text(f"🧩 Inventorying schema markup... {done:,}/{len(inventory_pages):,} pages"),
+                        )
+
+                    status_text.text("📊 Generating SEO analysis...")
+                    progress_bar.progress(60)
                 
-                # Check for robots.txt existence
-                robots_url = website_url.rstrip('/') + '/robots.txt'
-                try:
-                    robots_response = requests.get(robots_url, timeout=5, headers={'User-Agent': 'Mozilla/5.0'}, verify=False)
-                    robots_success = robots_response.status_code == 200
-                except Exception:
-                    robots_success = False
-                # Use filtered data for SEO analysis
-                report_df, detailed_data = analyze_screaming_frog_data(
-                    df_for_analysis, alt_tag_df, orphan_pages_df, sitemap_success=sitemap_success, robots_success=robots_success
-                )
+                    # Use filtered data for SEO analysis
+                    report_df, detailed_data = engine.analyze(
+                        df_for_analysis, alt_tag_df, orphan_pages_df, inlinks=inlinks_file,
+                        sitemap_entries=sitemap_entries if sitemap_success else None,
+                        robots=engine.robots(website_url), schema_inventory=inventory,
+                        progress=lambda message: status_text.text(f"🧩 {message}")
+                    )
+                    if orphan_pages_df is None:
+                        orphan_pages_df = detailed_data.get("orphan_pages")
+                finally:
+                    if profiler is not None:
+                        profiler.stop()
                 
                 progress_bar.progress(80)
                 status_text.text("📋 Preparing tables...")
@@ -360,6 +368,17 @@ def main():
                 status_text.empty()
                 
                 st.success(f"🌐 Complete audit report for: **{domain}** (Analyzed {filter_stats['final_count']:,} pages)")
+
+                if profiler is not None and profiler.artifacts:
+                    with st.expander("🔬 Profile of this run", expanded=False):
+                        st.caption(f"Saved to {profiler.directory}. Open the speedscope file at https://www.speedscope.app, the pstats file with snakeviz or pstats.")
+                        for artifact, path in profiler.artifacts.items():
+                            st.download_button(
+                                f"Download {path.name}",
+                                data=path.read_bytes(),
+                                file_name=f"{profiler.profile_id}-{path.name}",
+                                key=f"profile-{artifact}",
+                            )
                 
                 st.header("📊 Website Overview")
                 
@@ -531,6 +550,14 @@ def main():
                         use_container_width=True
                     )
                     
+        with st.expander("⏱️ Performance Metrics", expanded=False):
+            snapshot = metrics.snapshot()
+            if snapshot["stages"]:
+                st.dataframe(metrics_frame(snapshot), use_container_width=True, hide_index=True)
+                st.json(snapshot["counters"])
+            else:
+                st.info("No stages timed yet")
+
         with st.expander("Preview Raw Data", expanded=False):
             tabs = st.tabs(["Main Data", "Alt Tag Data", "Orphan Pages Data"])
 
@@ -0,0 +1,230 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from threading import Lock
+
+import pandas as pd
+
+from modules.checkpoint import CHECKPOINT_PATH
+from modules.engine import EXECUTORS, AuditEngine
+from modules.instrumentation import dump_metrics, timed
+from modules.profiling import AuditProfiler
+from modules.rate_limit import pooled_session
+from modules.report import filter_pages
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ["parquet", "csv", "json"]
+
+# Export -> file name patterns looked for in a client folder, first match wins.
+EXPORT_PATTERNS = {
+    "crawl": ["*internal_html*.csv", "*internal_all*.csv"],
+    "alt_tags": ["*missing_alt_text*.csv"],
+    "orphans": ["*orphan*.csv"],
+    "inlinks": ["*all_inlinks*.csv"],
+}
+
+# Clients audited at the same time by default; they share one process, its HTTP cache and connection pool.
+DEFAULT_JOBS = 4
+
+
+def find_exports(folder):
+    """Paths of the Screaming Frog exports in ``folder``, by ``EXPORT_PATTERNS`` name (None when missing)."""
+    exports = {}
+    for name, patterns in EXPORT_PATTERNS.items():
+        matches = [path for pattern in patterns for path in sorted(Path(folder).glob(pattern))]
+        exports[name] = matches[0] if matches else None
+    return exports
+
+
+def discover_clients(directory):
+    """``(name, exports)`` of every sub-folder of ``directory`` holding a crawl export, by folder name."""
+    clients = []
+    for folder in sorted(path for path in Path(directory).iterdir() if path.is_dir()):
+        exports = find_exports(folder)
+        if exports["crawl"] is None:
+            logger.warning(f"Skipping {folder}: no crawl export matching {EXPORT_PATTERNS['crawl']}")
+            continue
+        clients.append((folder.name, exports))
+    return clients
+
+
+def write_frame(frame, path, output_format):
+    if output_format == "parquet":
+        try:
+            frame.to_parquet(path, index=False)
+        except (TypeError, ValueError):
+            # Mixed-type columns, such as the report's counts next to messages, are stored as text
+            text = {column: frame[column].where(frame[column].isna(), frame[column].astype(str)) for column in frame.columns if frame[column].dtype == object}
+            frame.assign(**text).to_parquet(path, index=False)
+    elif output_format == "csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_json(path, orient="records", force_ascii=False, indent=2)
+
+
+def write_outputs(result, directory, output_format):
+    """Write the report and every non-empty detail table of ``result`` under ``directory``; returns the files written."""
+    directory = Path(directory)
+    (directory / "details").mkdir(parents=True, exist_ok=True)
+    files = [directory / f"report.{output_format}"]
+    write_frame(result.report.reset_index(), files[0], output_format)
+    for name, data in result.details.items():
+        if isinstance(data, pd.DataFrame) and not data.empty:
+            path = directory / "details" / f"{name}.{output_format}"
+            write_frame(data, path, output_format)
+            files.append(path)
+    return files
+
+
+def audit_client(engine, name, exports, output, output_format="parquet", stream=False, filter_crawl=True, sitemap=True, robots=True, schema_inventory=False, changed_since=None):
+    """Audit one client's exports with ``engine`` and write the results to ``output``/``name``; returns the run's summary."""
+    start = time.perf_counter()
+    with timed("csv.load"):
+        crawl = exports["crawl"] if stream else pd.read_csv(exports["crawl"])
+        alt_tag_df = pd.read_csv(exports["alt_tags"]) if exports.get("alt_tags") else None
+        orphan_pages_df = pd.read_csv(exports["orphans"]) if exports.get("orphans") else None
+    chunk_filter = None
+    if filter_crawl:
+        if stream:
+            def chunk_filter(chunk):
+                return filter_pages(chunk)[0]
+        else:
+            with timed("filter"):
+                crawl, _ = filter_pages(crawl)
+
+    result = engine.audit(
+        crawl, alt_tag_df, orphan_pages_df, inlinks=exports.get("inlinks"),
+        sitemap=sitemap, robots=robots, schema_inventory=schema_inventory, chunk_filter=chunk_filter,
+        run=str(Path(exports["crawl"]).resolve()), changed_since=changed_since,
+    )
+    files = write_outputs(result, Path(output) / name, output_format)
+    statuses = result.report["Status"].value_counts()
+    return {
+        "client": name,
+        "status": "ok",
+        "domain": result.domain,
+        "website_url": result.website_url,
+        "seconds": round(time.perf_counter() - start, 3),
+        "sitemap_entries": result.sitemap_entries or 0,
+        "robots_status": result.robots.status_code if result.robots is not None else None,
+        "failed_checks": int(statuses.get("❌ Fail", 0)),
+        "review_checks": int(statuses.get("ℹ️ Review", 0)),
+        "files": [str(path) for path in files],
+    }
+
+
+def run_audits(clients, output, engine, jobs=DEFAULT_JOBS, **options):
+    """Audit ``clients`` (``(name, exports)`` pairs), ``jobs`` at a time, appending each summary to ``output``/index.ndjson.
+
+    A client that fails is recorded with its error and does not stop the
+    others. Returns the summaries in completion order.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    summaries = []
+    index_lock = Lock()
+    with (output / "index.ndjson").open("w", encoding="utf-8") as index, ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(audit_client, engine, name, exports, output, **options): name for name, exports in clients}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                summary = future.result()
+                logger.info(f"{name}: {summary['failed_checks']} failed checks in {summary['seconds']:.1f}s")
+            except Exception as e:
+                logger.exception(f"Audit of {name} failed")
+                summary = {"client": name, "status": "failed", "error": str(e)}
+            with index_lock:
+                index.write(json.dumps(summary) + "\n")
+                index.flush()
+            summaries.append(summary)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the full web audit on Screaming Frog exports, for one client or a directory of client folders."
+    )
+    parser.add_argument("--clients", metavar="DIR", help="Directory with one folder of exports per client")
+    parser.add_argument("--crawl", help="Internal HTML crawl export of a single client")
+    parser.add_argument("--alt-tags", help="Images missing alt text export of a single client")
+    parser.add_argument("--orphans", help="Orphan URLs export of a single client")
+    parser.add_argument("--inlinks", help="All inlinks export of a single client")
+    parser.add_argument("--name", help="Client name of a single-client run (default: the crawl export's folder)")
+    parser.add_argument("--output", required=True, help="Directory the results are written to, one folder per client")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet", help="Format of the report and detail tables (default: parquet)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Clients audited in parallel (default: {DEFAULT_JOBS})")
+    parser.add_argument("--executor", choices=list(EXECUTORS), default="serial", help="Backend of the crawl checks of each client (default: serial)")
+    parser.add_argument("--workers", type=int, help="Worker processes of the process executor")
+    parser.add_argument("--chunksize", type=int, help="Stream crawl exports in chunks of this many rows instead of loading them whole")
+    parser.add_argument("--no-filter", action="store_true", help="Audit every crawled URL, without excluding assets, query strings and admin paths")
+    parser.add_argument("--no-sitemap", action="store_true", help="Skip the sitemap stages")
+    parser.add_argument("--no-robots", action="store_true", help="Skip the robots.txt stage")
+    parser.add_argument("--schema-inventory", action="store_true", help="Fetch every live page and report schema coverage per template (slow)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Journal sitemap and schema probes to this SQLite file, so an interrupted run resumes (default: $AUDIT_CHECKPOINT, off when unset)")
+    parser.add_argument("--changed-since", metavar="DATE", help="With --schema-inventory and --checkpoint, only fetch pages the sitemap dates after DATE (e.g. the previous run's) and take the rest from the previous inventory")
+    parser.add_argument("--profile", metavar="DIR", help="Profile the run and save pstats, speedscope JSON and allocation artifacts to this directory")
+    parser.add_argument("--metrics", help="Write per-stage timings and counters as JSON to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    if bool(args.clients) == bool(args.crawl):
+        parser.error("either --clients or --crawl is required")
+    if args.changed_since and not (args.schema_inventory and args.checkpoint):
+        parser.error("--changed-since needs --schema-inventory and --checkpoint")
+    if args.changed_since:
+        try:
+            pd.Timestamp(args.changed_since)
+        except ValueError:
+            parser.error(f"--changed-since: invalid date '{args.changed_since}'")
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet needs pyarrow; install it or use --format csv or json")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.profile:
+        with AuditProfiler("audit", directory=args.profile) as profiler:
+            failed = run(args)
+        if profiler.artifacts:
+            print(f"Profile written to {profiler.directory}", file=sys.stderr)
+    else:
+        failed = run(args)
+    sys.exit(1 if failed else 0)
+
+
+def run(args):
+    """Run the audits of ``args``; returns the number of clients that failed."""
+    if args.clients:
+        clients = discover_clients(args.clients)
+    else:
+        exports = {"crawl": args.crawl, "alt_tags": args.alt_tags, "orphans": args.orphans, "inlinks": args.inlinks}
+        clients = [(args.name or Path(args.crawl).resolve().parent.name, exports)]
+    if not clients:
+        logger.error(f"No client folders with a crawl export in {args.clients}")
+        return 1
+
+    jobs = max(1, min(args.jobs, len(clients)))
+    engine = AuditEngine(
+        executor=args.executor, workers=args.workers, chunksize=args.chunksize, checkpoint=args.checkpoint,
+        session=pooled_session(hosts=len(clients)),
+    )
+    summaries = run_audits(
+        clients, args.output, engine, jobs=jobs, output_format=args.format, stream=bool(args.chunksize),
+        filter_crawl=not args.no_filter, sitemap=not args.no_sitemap, robots=not args.no_robots,
+        schema_inventory=args.schema_inventory, changed_since=args.changed_since,
+    )
+    failed = sum(1 for summary in summaries if summary["status"] != "ok")
+    logger.info(f"Audited {len(summaries) - failed} of {len(summaries)} clients, results in {args.output}")
+
+    if args.metrics:
+        dump_metrics(args.metrics)
+    return failed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# Benchmarks time the work itself, so responses are never served from the
+# HTTP cache and probes are never resumed from a checkpoint journal.
+os.environ["AUDIT_HTTP_CACHE"] = ""
+os.environ["AUDIT_CHECKPOINT"] = ""
@@ -0,0 +1,247 @@
+import argparse
+import gc
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from benchmarks.synthetic import (
+    SITEMAP_MAX_URLS,
+    serve_site,
+    sitemap_tree,
+    synthetic_alt_tags,
+    synthetic_crawl,
+    synthetic_orphans,
+    synthetic_page,
+    write_crawl_csv,
+)
+
+logger = logging.getLogger(__name__)
+
+# Crawls above this size only run through the chunked export path.
+IN_MEMORY_MAX_ROWS = 1_000_000
+
+# Requests per second allowed against the local stand-in.
+LOOPBACK_RATE = 10_000.0
+
+# Entry points whose cold import is timed, each in a fresh interpreter.
+STARTUP_MODULES = ["main", "schema", "modules.report"]
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(function, repeat=3, memory=True):
+    """Fastest and median wall time of ``function`` over ``repeat`` runs, plus its peak traced memory."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    result = {"seconds": round(min(times), 6), "median_seconds": round(statistics.median(times), 6)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def unthrottle(base_url):
+    """Lift the per-host politeness pacing for the local stand-in, so fetches are not timed against the rate limiter."""
+    from modules import rate_limit
+
+    rate_limit.MAX_RATE = LOOPBACK_RATE
+    limiter = rate_limit.host_limiter(base_url)
+    limiter.rate = LOOPBACK_RATE
+    limiter.concurrency = rate_limit.MAX_CONCURRENCY
+    limiter.slow_start = False
+
+
+def bench_analyze(site, rows, workdir, options):
+    """``analyze_screaming_frog_data`` in memory and ``analyze_screaming_frog_export`` in chunks."""
+    from modules.engine import (
+        analyze_screaming_frog_data,
+        analyze_screaming_frog_export,
+    )
+
+    alt_tag_df = synthetic_alt_tags(1_000, site.base_url)
+    orphans = synthetic_orphans(synthetic_crawl(min(rows, 100_000), base_url=site.base_url))
+    if rows <= IN_MEMORY_MAX_ROWS:
+        crawl = synthetic_crawl(rows, base_url=site.base_url)
+        yield "analyze_screaming_frog_data", rows, lambda: analyze_screaming_frog_data(crawl, alt_tag_df, orphans)
+        del crawl
+    path = write_crawl_csv(Path(workdir) / f"crawl-{rows}.csv", rows, base_url=site.base_url)
+    yield "analyze_screaming_frog_export", rows, lambda: analyze_screaming_frog_export(path, alt_tag_df, orphans)
+
+
+def bench_filter_pages(site, rows, workdir, options):
+    from modules.report import filter_pages
+
+    if rows > IN_MEMORY_MAX_ROWS:
+        return
+    crawl = synthetic_crawl(rows, base_url=site.base_url)
+    yield "filter_pages", rows, lambda: filter_pages(crawl)
+
+
+def bench_detect_url_language(site, rows, workdir, options):
+    from modules.url_language import detect_url_language
+
+    if rows > IN_MEMORY_MAX_ROWS:
+        return
+    urls = synthetic_crawl(rows, base_url=site.base_url)["Address"].tolist()
+    yield "detect_url_language", rows, lambda: [detect_url_language(url) for url in urls]
+
+
+def bench_sitemaps(site, rows, workdir, options):
+    """Parsing one full-size sitemap document, and walking a served sitemap index of ``rows`` URLs."""
+    from modules.sitemaps import iter_sitemap_entries, parse_sitemap_entries
+
+    documents = sitemap_tree(site.base_url, rows, alternates=options.hreflang)
+    site.documents.clear()
+    site.documents.update(documents)
+    document = documents["/sitemaps/sitemap-0.xml"]
+    yield "parse_sitemap_entries", min(rows, SITEMAP_MAX_URLS), lambda: sum(1 for _ in parse_sitemap_entries(document))
+    yield "iter_sitemap_entries", rows, lambda: sum(1 for _ in iter_sitemap_entries(site.base_url))
+
+
+def bench_schema(site, rows, workdir, options):
+    """Schema type scanning of in-memory pages and probing of served pages through the fetch/parse pipeline.
+
+    Both work on ``--schema-pages`` pages whatever the crawl size. The
+    fast scan is first checked against extruct's full parse.
+    """
+    from modules.schema_markup import page_schema_types
+    from modules.schema_pipeline import iter_schema_types
+
+    urls = synthetic_crawl(options.schema_pages, base_url=site.base_url)["Address"].tolist()
+    pages = [(synthetic_page(urlsplit(url).path).decode("utf-8"), url) for url in urls]
+    check_schema_parity(pages)
+    yield "page_schema_types", len(urls), lambda: [page_schema_types(html, url) for html, url in pages]
+    yield "iter_schema_types", len(urls), lambda: sum(1 for _ in iter_schema_types(urls))
+
+
+def check_schema_parity(pages):
+    """Raise when ``scan_schema_types`` and extruct disagree on the types of any of ``pages`` (``(html, url)`` pairs)."""
+    from modules.schema_markup import (
+        extract_schema_names,
+        parse_schemas,
+        scan_schema_types,
+    )
+
+    for html, url in pages:
+        fast = scan_schema_types(html)
+        full = extract_schema_names(parse_schemas(html, url))
+        if fast is not None and fast != full:
+            raise RuntimeError(f"Schema scan of {url} found {fast}, extruct found {full}")
+
+
+def bench_startup(site, rows, workdir, options):
+    """Cold start of a bare interpreter and of each entry point, so import cost is tracked like any other case.
+
+    Every run imports in a new process; the ``interpreter`` case is the
+    floor the others are read against. Sizes do not apply.
+    """
+    def cold_import(statement):
+        return lambda: subprocess.run([sys.executable, "-c", statement], cwd=REPO_DIR, check=True)
+
+    yield "startup:interpreter", 0, cold_import("pass")
+    for module in STARTUP_MODULES:
+        yield f"startup:{module}", 0, cold_import(f"import {module}")
+
+
+# Name, a generator of (case, size, function) for a crawl size, and whether
+# peak memory is traced (work in child processes is not seen by tracemalloc).
+BENCHMARKS = [
+    ("analyze", bench_analyze, True),
+    ("filter_pages", bench_filter_pages, True),
+    ("detect_url_language", bench_detect_url_language, True),
+    ("sitemaps", bench_sitemaps, True),
+    ("schema", bench_schema, True),
+    ("startup", bench_startup, False),
+]
+
+
+def run_benchmarks(sizes, names=None, repeat=3, memory=True, options=None):
+    results = []
+    measured = set()
+    with serve_site() as site, tempfile.TemporaryDirectory() as workdir:
+        unthrottle(site.base_url)
+        for name, benchmark, traced in BENCHMARKS:
+            if names and name not in names:
+                continue
+            for rows in sizes:
+                for case, size, function in benchmark(site, rows, workdir, options):
+                    # Cases capped below the crawl size run once per distinct size
+                    if (case, size) in measured:
+                        continue
+                    measured.add((case, size))
+                    result = {"case": case, "rows": size, **measure(function, repeat, memory and traced)}
+                    results.append(result)
+                    print(
+                        f"{case:<32} {size:>10,} rows  {result['seconds']:>9.3f}s"
+                        + (f"  {result['peak_mb']:>9.1f} MB" if "peak_mb" in result else ""),
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def compare_results(results, baseline, tolerance):
+    """Cases of ``results`` slower or bigger than in ``baseline`` by more than ``tolerance``."""
+    previous = {(result["case"], result["rows"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["case"], result["rows"]))
+        if before is None:
+            continue
+        for metric in ["seconds", "peak_mb"]:
+            if metric in result and metric in before and before[metric] > 0:
+                ratio = result[metric] / before[metric]
+                if ratio > 1 + tolerance:
+                    regressions.append({"case": result["case"], "rows": result["rows"], "metric": metric, "before": before[metric], "after": result[metric], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audit on synthetic crawls, sitemaps and pages.")
+    parser.add_argument("--rows", default="10000,100000", help="Comma-separated crawl sizes, up to millions of rows (default: 10000,100000)")
+    parser.add_argument("--benchmarks", help=f"Comma-separated subset of: {', '.join(name for name, _, _ in BENCHMARKS)}")
+    parser.add_argument("--schema-pages", type=int, default=200, help="Pages scanned and probed by the schema benchmarks (default: 200)")
+    parser.add_argument("--hreflang", action="store_true", help="Add hreflang alternates to the synthetic sitemaps")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (default: 3)")
+    parser.add_argument("--memory", action=argparse.BooleanOptionalAction, default=True, help="Measure peak memory with tracemalloc")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against the JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown or growth against the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.rows.split(",")]
+    names = set(args.benchmarks.split(",")) if args.benchmarks else None
+    results = run_benchmarks(sizes, names, args.repeat, args.memory, args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.baseline:
+        regressions = compare_results(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['case']} at {regression['rows']:,} rows: "
+                f"{regression['metric']} {regression['before']} -> {regression['after']} (x{regression['ratio']})",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import json
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column layout of a Screaming Frog "Internal: HTML" export.
+CRAWL_EXPORT_COLUMNS = [
+    "Address", "Content Type", "Status Code", "Status", "Indexability", "Indexability Status",
+    "Title 1", "Title 1 Length", "Title 1 Pixel Width",
+    "Meta Description 1", "Meta Description 1 Length", "Meta Description 1 Pixel Width",
+    "Meta Keywords 1", "Meta Keywords 1 Length", "H1-1", "H1-1 Length", "H2-1", "H2-1 Length", "H2-2", "H2-2 Length",
+    "Meta Robots 1", "X-Robots-Tag 1", "Meta Refresh 1", "Canonical Link Element 1",
+    'rel="next" 1', 'rel="prev" 1', 'HTTP rel="next" 1', 'HTTP rel="prev" 1', "amphtml Link Element",
+    "Size (bytes)", "Transferred (bytes)", "Total Transferred (bytes)", "CO2 (mg)", "Carbon Rating",
+    "Word Count", "Sentence Count", "Average Words Per Sentence", "Flesch Reading Ease Score", "Readability",
+    "Text Ratio", "Crawl Depth", "Folder Depth", "Link Score", "Inlinks", "Unique Inlinks", "Unique JS Inlinks",
+    "% of Total", "Outlinks", "Unique Outlinks", "Unique JS Outlinks", "External Outlinks",
+    "Unique External Outlinks", "Unique External JS Outlinks", "Closest Similarity Match", "No. Near Duplicates",
+    "Spelling Errors", "Grammar Errors", "Hash", "Response Time", "Last Modified", "Redirect URL", "Redirect Type",
+    "Cookies", "Language", "HTTP Version", "Mobile Alternate Link", "URL Encoded Address", "Crawl Timestamp",
+]
+ORPHAN_COLUMNS = ["Address", "Status Code", "Title 1", "Indexability", "Indexability Status"]
+ALT_TAG_COLUMNS = ["Address", "Content Type", "Size (bytes)", "IMG Inlinks", "Indexability", "Indexability Status", "Dimensions"]
+
+# Site sections pages are spread over; prefixed ones exercise language detection.
+SECTIONS = ["blog", "products", "help", "news", "resources", "solutions", "de/blog", "fr/produits", "es/ayuda"]
+SECTION_LANGUAGES = [section.split("/")[0] if "/" in section else "en" for section in SECTIONS]
+
+# Share of rows that are files, carry a query string, redirect or are missing.
+FILE_SHARE = 0.02
+QUERY_SHARE = 0.01
+REDIRECT_SHARE = 0.02
+NOT_FOUND_SHARE = 0.01
+NOINDEX_SHARE = 0.02
+
+# Rows generated and written at once by ``write_crawl_csv``.
+CSV_CHUNK_ROWS = 250_000
+
+# Sitemap protocol limit of URLs per sitemap file.
+SITEMAP_MAX_URLS = 50_000
+
+
+def page_addresses(base_url, start, stop):
+    """Addresses of pages ``start`` to ``stop`` of a synthetic site, as laid out by ``synthetic_crawl``."""
+    index = np.arange(start, stop)
+    sections = pd.Series(np.array(SECTIONS, dtype=object)[index % len(SECTIONS)])
+    return base_url.rstrip("/") + "/" + sections + "/page-" + pd.Series(index).astype(str) + "/"
+
+
+def synthetic_crawl(
+    rows,
+    base_url="https://www.example.com",
+    duplicate_title_share=0.05,
+    missing_h1_share=0.03,
+    canonical_mismatch_share=0.02,
+    seed=0,
+    start=0,
+):
+    """Screaming Frog export of ``rows`` synthetic pages with the real column layout.
+
+    Duplicate titles, descriptions, H1s and content counts, missing H1s and
+    canonicals pointing elsewhere are planted at the given shares, next to
+    a few files, query-string URLs, redirects, 404s and noindex pages.
+    Rows ``start`` onwards are generated, so an export can be produced in
+    chunks that concatenate to the same frame as one call.
+    """
+    rng = np.random.default_rng([seed, start])
+    index = np.arange(start, start + rows)
+    address = page_addresses(base_url, start, start + rows)
+    draw = rng.random(rows)
+
+    is_file = draw < FILE_SHARE
+    has_query = (draw >= FILE_SHARE) & (draw < FILE_SHARE + QUERY_SHARE)
+    address[is_file] = address[is_file].str.rstrip("/") + np.where(index[is_file] % 2, ".pdf", ".png")
+    address[has_query] = address[has_query] + _labels("?ref=", index[has_query] % 97)
+
+    status = np.full(rows, 200)
+    outcome = rng.random(rows)
+    status[outcome < REDIRECT_SHARE] = 301
+    status[(outcome >= REDIRECT_SHARE) & (outcome < REDIRECT_SHARE + NOT_FOUND_SHARE)] = 404
+    canonical_mismatch = (status == 200) & (rng.random(rows) < canonical_mismatch_share)
+    noindex = (status == 200) & ~canonical_mismatch & (rng.random(rows) < NOINDEX_SHARE)
+    indexable = (status == 200) & ~canonical_mismatch & ~noindex
+
+    duplicate = rng.random(rows) < duplicate_title_share
+    pool = index % 50
+    title = pd.Series(_labels("Page ", index), dtype=object) + " | Example"
+    title[duplicate] = _labels("Shared title ", pool[duplicate])
+    description = pd.Series(_labels("Description of page ", index), dtype=object)
+    description[duplicate] = _labels("Shared description ", pool[duplicate])
+    h1 = pd.Series(_labels("Heading ", index), dtype=object)
+    h1[duplicate] = _labels("Shared heading ", pool[duplicate])
+    h1[rng.random(rows) < missing_h1_share] = np.nan
+
+    next_address = address.shift(-1, fill_value=address.iloc[0])
+    canonical = address.copy()
+    canonical[canonical_mismatch] = next_address[canonical_mismatch]
+    redirect_url = pd.Series(np.where(status == 301, next_address, ""), dtype=object)
+
+    word_count = rng.integers(150, 3_000, rows)
+    sentence_count = rng.integers(10, 200, rows)
+    word_count[duplicate] = 400 + pool[duplicate]
+    sentence_count[duplicate] = 20
+
+    content_type = np.where(is_file, np.where(index % 2, "application/pdf", "image/png"), "text/html; charset=UTF-8")
+    indexability_status = np.select(
+        [status == 301, status == 404, canonical_mismatch, noindex],
+        ["Redirected", "Client Error", "Canonicalised", "noindex"],
+        "",
+    )
+    size = rng.integers(20_000, 250_000, rows)
+    depth = address.str.count("/") - 3
+    language = np.array(SECTION_LANGUAGES, dtype=object)[index % len(SECTIONS)]
+
+    frame = pd.DataFrame({
+        "Address": address,
+        "Content Type": content_type,
+        "Status Code": status,
+        "Status": np.select([status == 301, status == 404], ["Moved Permanently", "Not Found"], "OK"),
+        "Indexability": np.where(indexable, "Indexable", "Non-Indexable"),
+        "Indexability Status": indexability_status,
+        "Title 1": title,
+        "Title 1 Length": title.str.len(),
+        "Title 1 Pixel Width": title.str.len() * 8,
+        "Meta Description 1": description,
+        "Meta Description 1 Length": description.str.len(),
+        "Meta Description 1 Pixel Width": description.str.len() * 6,
+        "H1-1": h1,
+        "H1-1 Length": h1.str.len(),
+        "H2-1": _labels("Section A of page ", index),
+        "H2-2": _labels("Section B of page ", index),
+        "Meta Robots 1": np.where(noindex, "noindex, follow", "index, follow"),
+        "Canonical Link Element 1": canonical,
+        "Size (bytes)": size,
+        "Transferred (bytes)": size // 4,
+        "Total Transferred (bytes)": size,
+        "Word Count": word_count,
+        "Sentence Count": sentence_count,
+        "Average Words Per Sentence": np.round(word_count / sentence_count, 3),
+        "Text Ratio": np.round(rng.random(rows) * 30, 3),
+        "Crawl Depth": depth,
+        "Folder Depth": depth,
+        "Inlinks": rng.integers(1, 500, rows),
+        "Outlinks": rng.integers(10, 200, rows),
+        "Hash": pd.Series(index).map("{:032x}".format),
+        "Response Time": np.round(rng.random(rows), 3),
+        "Redirect URL": redirect_url,
+        "Redirect Type": np.where(status == 301, "HTTP Redirect", ""),
+        "Language": language,
+        "HTTP Version": "1.1",
+        "URL Encoded Address": address,
+        "Crawl Timestamp": "2025-01-01 00:00:00",
+    })
+    frame["H2-1 Length"] = frame["H2-1"].str.len()
+    frame["H2-2 Length"] = frame["H2-2"].str.len()
+    return frame.reindex(columns=CRAWL_EXPORT_COLUMNS)
+
+
+def _labels(prefix, numbers):
+    return (prefix + pd.Series(numbers, dtype="int64").astype(str)).to_numpy(dtype=object)
+
+
+def write_crawl_csv(path, rows, chunk_rows=CSV_CHUNK_ROWS, **options):
+    """Write a ``synthetic_crawl`` export of ``rows`` pages to ``path``, ``chunk_rows`` at a time."""
+    path = Path(path)
+    for start in range(0, rows, chunk_rows):
+        chunk = synthetic_crawl(min(chunk_rows, rows - start), start=start, **options)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    logger.info(f"Wrote synthetic crawl of {rows:,} rows to {path}")
+    return path
+
+
+def synthetic_orphans(crawl, share=0.01, seed=0):
+    """Orphan pages export: a sample of the crawl's indexable pages."""
+    pages = crawl.loc[crawl["Indexability"] == "Indexable", ORPHAN_COLUMNS]
+    return pages.sample(frac=share, random_state=seed).reset_index(drop=True)
+
+
+def synthetic_alt_tags(rows, base_url="https://www.example.com"):
+    """Images-missing-alt-text export of ``rows`` images."""
+    index = pd.Series(np.arange(rows)).astype(str)
+    return pd.DataFrame({
+        "Address": base_url.rstrip("/") + "/images/image-" + index + ".png",
+        "Content Type": "image/png",
+        "Size (bytes)": 2_048,
+        "IMG Inlinks": 3,
+        "Indexability": "Indexable",
+        "Indexability Status": "",
+        "Dimensions": "",
+    }).reindex(columns=ALT_TAG_COLUMNS)
+
+
+def sitemap_tree(base_url, pages, urls_per_sitemap=SITEMAP_MAX_URLS, alternates=False):
+    """Sitemap index plus child sitemaps listing ``pages`` synthetic pages, as ``{path: xml bytes}``.
+
+    The index is at ``/sitemap.xml`` and child ``n`` at
+    ``/sitemaps/sitemap-n.xml``; with ``alternates`` every URL carries
+    reciprocal hreflang links to its ``/de/`` variant.
+    """
+    base_url = base_url.rstrip("/")
+    documents = {}
+    children = []
+    for number, start in enumerate(range(0, pages, urls_per_sitemap)):
+        addresses = page_addresses(base_url, start, min(start + urls_per_sitemap, pages))
+        if alternates:
+            links = (
+                '<xhtml:link rel="alternate" hreflang="en" href="' + addresses + '"/>'
+                '<xhtml:link rel="alternate" hreflang="de" href="' + addresses.str.replace(base_url, base_url + "/de", n=1, regex=False) + '"/>'
+            )
+        else:
+            links = ""
+        entries = "<url><loc>" + addresses + "</loc><lastmod>2025-01-01</lastmod>" + links + "</url>"
+        path = f"/sitemaps/sitemap-{number}.xml"
+        documents[path] = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:xhtml="http://www.w3.org/1999/xhtml">'
+            + "".join(entries) + "</urlset>"
+        ).encode("utf-8")
+        children.append(f"<sitemap><loc>{base_url}{path}</loc></sitemap>")
+    documents["/sitemap.xml"] = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + "".join(children) + "</sitemapindex>"
+    ).encode("utf-8")
+    return documents
+
+
+def synthetic_page(path, filler_paragraphs=200):
+    """HTML of the page at ``path``, with the schema markup its section would carry.
+
+    Blog posts carry an Article and a BreadcrumbList in JSON-LD, product
+    pages a microdata Product, help pages an RDFa FAQPage under
+    ``vocab``, news pages an RDFa NewsArticle with the ``schema:`` prefix,
+    every seventh page has no markup and the rest a WebPage.
+    ``filler_paragraphs`` pads the body to a realistic size.
+    """
+    number = int("".join(character for character in path if character.isdigit()) or 0)
+    if number % 7 == 0:
+        markup = ""
+    elif "/blog/" in path:
+        markup = '<script type="application/ld+json">' + json.dumps({
+            "@context": "https://schema.org",
+            "@graph": [
+                {"@type": "Article", "headline": f"Post {number}", "author": {"@type": "Person", "name": "Author"}},
+                {"@type": "BreadcrumbList", "itemListElement": [{"@type": "ListItem", "position": 1, "name": "Blog"}]},
+            ],
+        }) + "</script>"
+    elif "/products/" in path or "/produits/" in path:
+        markup = (
+            '<div itemscope itemtype="https://schema.org/Product"><span itemprop="name">Product</span>'
+            '<div itemprop="offers" itemscope itemtype="https://schema.org/Offer"><span itemprop="price">9</span></div></div>'
+        )
+    elif "/help/" in path or "/ayuda/" in path:
+        markup = (
+            '<div vocab="https://schema.org/" typeof="FAQPage"><div property="mainEntity" typeof="Question">'
+            '<span property="name">Question</span></div></div>'
+        )
+    elif "/news/" in path:
+        markup = '<article typeof="schema:NewsArticle"><h2 property="schema:headline">News</h2></article>'
+    else:
+        markup = '<script type="application/ld+json">' + json.dumps({"@context": "https://schema.org", "@type": "WebPage", "name": path}) + "</script>"
+    filler = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.</p>" * filler_paragraphs
+    return (
+        f"<!DOCTYPE html><html><head><title>Page {number}</title>{markup if 'ld+json' in markup else ''}</head>"
+        f"<body><h1>Page {number}</h1>{markup if 'ld+json' not in markup else ''}{filler}</body></html>"
+    ).encode()
+
+
+class SyntheticSite(ThreadingHTTPServer):
+    """Local stand-in for an audited site.
+
+    Paths in ``documents`` are served as XML (sitemaps, robots.txt);
+    any other path gets ``synthetic_page``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, documents=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _SyntheticSiteHandler)
+        self.documents = documents if documents is not None else {}
+        self.base_url = f"http://{host}:{self.server_address[1]}"
+
+
+class _SyntheticSiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        body = self.server.documents.get(path)
+        if body is not None:
+            content_type = "text/plain" if path.endswith(".txt") else "application/xml"
+        elif path.endswith((".pdf", ".png", ".xml", ".txt")):
+            self.send_error(404)
+            return
+        else:
+            body = synthetic_page(path)
+            content_type = "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_site(documents=None):
+    """Run a ``SyntheticSite`` on a free local port for the duration of the block."""
+    site = SyntheticSite(documents)
+    thread = Thread(target=site.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield site
+    finally:
+        site.shutdown()
+        site.server_close()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from modules.chains import resolve_chains
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+CANONICAL_COLUMNS = ["Address", "Canonical Link Element 1", "Status Code", "Indexability", "Content Type"]
+
+# "missing" only counts indexable 200 HTML pages; other pages without a
+# canonical (redirects, errors, noindex pages, files) are "not applicable".
+CANONICAL_CLASSES = [
+    "self",
+    "cross-page",
+    "missing",
+    "not applicable",
+    "non-indexable target",
+    "404 target",
+    "loop",
+]
+
+# Classes that count as canonical errors in the report; "missing" is reported separately.
+CANONICAL_ERROR_CLASSES = ["non-indexable target", "404 target", "loop"]
+
+
+class CanonicalStage:
+    """Classifies every crawled page by where its canonical chain ends.
+
+    ``update`` interns each chunk's canonical targets into ``urls``, so
+    only one int32 target id per row is kept; ``finish`` resolves the
+    targets to crawl rows through their URL ids and follows chains
+    (A -> B -> C) and loops in a single linear walk.
+    """
+
+    columns = CANONICAL_COLUMNS
+
+    def __init__(self, urls=None):
+        self.urls = urls if urls is not None else UrlTable()
+        self._target_ids = []
+        self._html = []
+
+    def update(self, chunk, rows):
+        canonical = chunk["Canonical Link Element 1"]
+        canonical = canonical.where(canonical.astype(str).str.strip() != "")
+        self._target_ids.append(self.urls.intern(canonical))
+        if "Content Type" in chunk.columns:
+            self._html.append(chunk["Content Type"].str.contains("html", case=False, na=False).to_numpy(dtype=bool))
+        else:
+            self._html.append(np.ones(len(chunk), dtype=bool))
+
+    def classify(self, crawl):
+        """``(class, target_ids, final_row, chain_length)`` of every crawl row."""
+        page_ids = crawl.page_ids
+        target_ids = np.concatenate(self._target_ids) if self._target_ids else np.zeros(0, dtype=np.int32)
+        first_row = crawl.rows_by_id()
+        target_row = np.where(target_ids >= 0, first_row[np.maximum(target_ids, 0)], -1)
+        is_self = (target_ids >= 0) & (target_ids == page_ids)
+        next_row = np.where(is_self, -1, target_row)
+        final_row, hops, in_loop = resolve_chains(next_row)
+
+        html = np.concatenate(self._html) if self._html else np.zeros(0, dtype=bool)
+        no_canonical = target_ids < 0
+        missing = no_canonical & html & (crawl.status == 200) & crawl.indexable
+        crawled_target = (next_row >= 0) & ~in_loop
+        end_row = np.where(crawled_target, final_row, 0)
+
+        classes = np.select(
+            [
+                missing,
+                no_canonical,
+                is_self,
+                in_loop,
+                crawled_target & (crawl.status[end_row] == 404),
+                crawled_target & ~crawl.indexable[end_row],
+            ],
+            ["missing", "not applicable", "self", "loop", "404 target", "non-indexable target"],
+            default="cross-page",
+        )
+        final_row = np.where(crawled_target, end_row, -1)
+        chain_length = np.where(is_self | no_canonical, 0, np.maximum(hops, 1))
+        return classes, target_ids, final_row, chain_length
+
+    def finish(self, crawl):
+        """Canonical counts for the report plus one detail table per problem class."""
+        classes, target_ids, final_row, chain_length = self.classify(crawl)
+        class_counts = pd.Series(classes).value_counts()
+
+        summary = {name: int(class_counts.get(name, 0)) for name in CANONICAL_CLASSES}
+        summary["errors"] = sum(summary[name] for name in CANONICAL_ERROR_CLASSES)
+        summary["chains"] = int((chain_length > 1).sum())
+
+        detailed_data = {}
+        for name in CANONICAL_CLASSES:
+            if name in ("self", "not applicable"):
+                continue
+            rows = np.flatnonzero(classes == name)
+            key = "canonical_" + name.replace("-", "_").replace(" ", "_")
+            detailed_data[key] = self._details(crawl, rows, name, target_ids, final_row, chain_length) if len(rows) else None
+
+        return summary, detailed_data
+
+    def _details(self, crawl, rows, name, target_ids, final_row, chain_length):
+        targets = np.full(len(rows), None, dtype=object)
+        declared = target_ids[rows] >= 0
+        targets[declared] = self.urls.urls(target_ids[rows][declared])
+        if name in ("missing", "loop"):
+            final_canonical = np.full(len(rows), None, dtype=object)
+        else:
+            # Targets outside the crawl are the end of their own chain
+            final_canonical = targets.copy()
+            crawled = final_row[rows] >= 0
+            final_canonical[crawled] = crawl.addresses(final_row[rows][crawled])
+        return pd.DataFrame({
+            "Address": crawl.addresses(rows),
+            "Canonical Link Element 1": targets,
+            "Final Canonical": final_canonical,
+            "Canonical Chain Length": chain_length[rows],
+            "Canonical Class": name,
+        })
+
+
+def analyze_canonicals(df, urls=None):
+    """Canonical counts and detail tables of an in-memory crawl frame."""
+    return run_stage(CanonicalStage(urls), df)
+
+
+def format_canonical_summary(summary):
+    return (
+        f"Errors: {summary['errors']} "
+        f"(non-indexable target: {summary['non-indexable target']}, "
+        f"404 target: {summary['404 target']}, loops: {summary['loop']}), "
+        f"Missing: {summary['missing']}, Cross-page: {summary['cross-page']}, "
+        f"Chains: {summary['chains']}"
+    )
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def resolve_chains(next_row):
+    """Follow single-successor pointers (canonical or redirect targets) to their end.
+
+    ``next_row[i]`` is the row that row ``i`` points to, or -1 when it points
+    nowhere we know about. Every row is visited once and every path segment
+    is resolved once, so the walk is linear in the number of rows.
+
+    Returns ``(final_row, hops, in_loop)``: the row each chain ends on (-1
+    when it runs into a loop), the number of pointers followed to get there,
+    and whether the chain ends in a loop.
+    """
+    next_row = np.asarray(next_row, dtype=np.int64)
+    n = len(next_row)
+    final_row = np.arange(n, dtype=np.int64)
+    hops = np.zeros(n, dtype=np.int64)
+    in_loop = np.zeros(n, dtype=bool)
+
+    nxt = next_row.tolist()
+    final = final_row.tolist()
+    steps = hops.tolist()
+    looped = in_loop.tolist()
+    # 0 = unseen, 1 = on the current path, 2 = resolved
+    state = bytearray(n)
+
+    for start in np.flatnonzero(next_row >= 0).tolist():
+        if state[start]:
+            continue
+
+        path = []
+        position = {}
+        node = start
+        while node != -1 and state[node] == 0:
+            state[node] = 1
+            position[node] = len(path)
+            path.append(node)
+            node = nxt[node]
+
+        if node == -1:
+            end, count, loop = path[-1], -1, False
+            tail = path
+        elif state[node] == 1:
+            cycle = path[position[node]:]
+            for member in cycle:
+                final[member] = -1
+                steps[member] = len(cycle)
+                looped[member] = True
+            end, count, loop = -1, len(cycle), True
+            tail = path[: position[node]]
+        else:
+            end, count, loop = final[node], steps[node], looped[node]
+            tail = path
+
+        for member in reversed(tail):
+            count += 1
+            final[member] = end
+            steps[member] = count
+            looped[member] = loop
+        for member in path:
+            state[member] = 2
+
+    return (
+        np.asarray(final, dtype=np.int64),
+        np.asarray(steps, dtype=np.int64),
+        np.asarray(looped, dtype=bool),
+    )
+
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+# Journal file used when none is given; checkpointing is off unless it is set,
+# e.g. to ~/.cache/web-audit/checkpoints.sqlite.
+CHECKPOINT_PATH = os.environ.get("AUDIT_CHECKPOINT", "")
+
+# Results of runs interrupted longer ago than this are not resumed.
+CHECKPOINT_MAX_AGE = 86_400
+
+# Results of completed runs kept for incremental runs are dropped after this long.
+LAST_RUN_MAX_AGE = 30 * 86_400
+
+
+class ProbeJournal:
+    """Per-URL results of one long-running probe, journaled so it can resume.
+
+    Results are appended to a SQLite file under a ``run`` name (several
+    runs can share a file) as soon as each URL is done, with the data
+    stored as compressed JSON. A restarted run reads back the URLs it
+    already completed and skips them; ``finish`` drops the journal once
+    the run went through, so the next run starts fresh. Results older
+    than ``max_age`` are discarded when the journal is opened. Used as a
+    context manager, the journal is closed on exit.
+
+    With ``keep_last``, ``finish`` keeps the results of the completed run
+    instead (up to ``LAST_RUN_MAX_AGE``), replacing those of the one
+    before, so an incremental run can take the pages that did not change
+    from ``last_completed``.
+    """
+
+    def __init__(self, path, run, max_age=CHECKPOINT_MAX_AGE, keep_last=False):
+        self.path = Path(path)
+        self.run = run
+        self.keep_last = keep_last
+        self._lock = Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "run TEXT, url TEXT, status INTEGER, data BLOB, recorded_at REAL, PRIMARY KEY (run, url))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS last_results ("
+            "run TEXT, url TEXT, status INTEGER, data BLOB, recorded_at REAL, PRIMARY KEY (run, url))"
+        )
+        self._db.execute("DELETE FROM results WHERE recorded_at < ?", (time.time() - max_age,))
+        self._db.execute("DELETE FROM last_results WHERE recorded_at < ?", (time.time() - LAST_RUN_MAX_AGE,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results WHERE run = ?", (self.run,)).fetchone()[0]
+
+    def completed(self):
+        """``{url: (status, data)}`` of every URL this run already completed."""
+        with self._lock:
+            rows = self._db.execute("SELECT url, status, data FROM results WHERE run = ?", (self.run,)).fetchall()
+        return {url: (status, _decode(data)) for url, status, data in rows}
+
+    def get(self, url):
+        """``(status, data)`` of ``url`` if this run already completed it, else None."""
+        with self._lock:
+            row = self._db.execute("SELECT status, data FROM results WHERE run = ? AND url = ?", (self.run, url)).fetchone()
+        return None if row is None else (row[0], _decode(row[1]))
+
+    def record(self, url, status, data=None):
+        body = zlib.compress(json.dumps(data, default=str).encode("utf-8"), 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (self.run, url, status, body, time.time())
+            )
+
+    def last_completed(self):
+        """``(started_at, {url: (status, data)})`` of the last completed run, ``(None, {})`` if none was kept.
+
+        ``started_at`` is when its first result was recorded, in Unix seconds.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT url, status, data, recorded_at FROM last_results WHERE run = ?", (self.run,)).fetchall()
+        if not rows:
+            return None, {}
+        return min(row[3] for row in rows), {url: (status, _decode(data)) for url, status, data, _ in rows}
+
+    def finish(self):
+        """Forget this run's results once it has completed, or keep them as the last run's with ``keep_last``."""
+        with self._lock:
+            if self.keep_last:
+                self._db.execute("BEGIN")
+                self._db.execute("DELETE FROM last_results WHERE run = ?", (self.run,))
+                self._db.execute("INSERT INTO last_results SELECT * FROM results WHERE run = ?", (self.run,))
+                self._db.execute("DELETE FROM results WHERE run = ?", (self.run,))
+                self._db.execute("COMMIT")
+            else:
+                self._db.execute("DELETE FROM results WHERE run = ?", (self.run,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_journal(run, path=CHECKPOINT_PATH, keep_last=False):
+    """Journal of ``run`` at ``path`` (None when checkpointing is disabled or the file cannot be opened)."""
+    if not path:
+        return None
+    try:
+        journal = ProbeJournal(path, run, keep_last=keep_last)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Checkpointing disabled, cannot open {path}: {e}")
+        return None
+    resumed = len(journal)
+    if resumed:
+        logger.info(f"Resuming {run}: {resumed} URLs already completed")
+    return journal
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data))
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from modules.url_table import UrlTable, rows_by_id
+
+CRAWL_ROW_COLUMNS = ["Address", "Status Code", "Indexability"]
+
+
+class CrawlRows:
+    """URL id, status code and indexability of every crawled row, built one chunk at a time.
+
+    The whole-crawl stages join on these arrays instead of the export's
+    text columns, so they hold a few bytes per row however wide the
+    export is. ``update`` interns a chunk's addresses into ``urls`` and
+    returns the chunk's own ``CrawlRows`` (with its ``offset`` into the
+    crawl) for the stages' ``update``; ``finish`` joins the chunks seen so
+    far. Without an ``Indexability`` column every row counts as indexable.
+    """
+
+    def __init__(self, urls=None, page_ids=None, status=None, indexable=None, has_indexability=False, offset=0):
+        self.urls = urls if urls is not None else UrlTable()
+        self.page_ids = page_ids if page_ids is not None else np.zeros(0, dtype=np.int32)
+        self.status = status if status is not None else np.zeros(0, dtype=np.float32)
+        self.indexable = indexable if indexable is not None else np.zeros(0, dtype=bool)
+        self.has_indexability = has_indexability
+        self.offset = offset
+        self._parts = []
+        self._rows = None
+
+    def __len__(self):
+        return len(self.page_ids) + sum(len(part) for part in self._parts)
+
+    @classmethod
+    def from_frame(cls, df, urls, offset=0):
+        has_indexability = "Indexability" in df.columns
+        if "Status Code" in df.columns:
+            status = pd.to_numeric(df["Status Code"], errors="coerce").to_numpy(dtype=np.float32)
+        else:
+            status = np.full(len(df), np.nan, dtype=np.float32)
+        if has_indexability:
+            indexable = (df["Indexability"] == "Indexable").to_numpy(dtype=bool)
+        else:
+            indexable = np.ones(len(df), dtype=bool)
+        return cls(urls, urls.intern(df["Address"]), status, indexable, has_indexability, offset)
+
+    def update(self, chunk):
+        rows = CrawlRows.from_frame(chunk, self.urls, offset=len(self))
+        self._parts.append(rows)
+        self.has_indexability |= rows.has_indexability
+        return rows
+
+    def finish(self):
+        if self._parts:
+            parts = [self, *self._parts]
+            self.page_ids = np.concatenate([part.page_ids for part in parts])
+            self.status = np.concatenate([part.status for part in parts])
+            self.indexable = np.concatenate([part.indexable for part in parts])
+            self._parts = []
+            self._rows = None
+        return self
+
+    def rows_by_id(self):
+        """URL id -> first crawl row (-1 for ids without one), over every id of ``urls``."""
+        if self._rows is None or len(self._rows) != len(self.urls):
+            self._rows = rows_by_id(self.page_ids, len(self.urls))
+        return self._rows
+
+    def addresses(self, rows):
+        """Canonical addresses of ``rows`` (None where the export had none)."""
+        ids = self.page_ids[rows]
+        addresses = np.full(len(ids), None, dtype=object)
+        known = ids >= 0
+        if known.any():
+            addresses[known] = self.urls.urls(ids[known])
+        return addresses
+
+    def status_codes(self, rows):
+        """Status codes of ``rows``, as integers when none is missing."""
+        status = self.status[rows].astype(np.float64)
+        if np.isnan(status).any():
+            return status
+        return status.astype(np.int64)
+
+    def indexability(self, rows):
+        """``Indexability`` labels of ``rows`` (None without an Indexability column)."""
+        indexable = self.indexable[rows]
+        if not self.has_indexability:
+            return np.full(len(indexable), None, dtype=object)
+        return np.where(indexable, "Indexable", "Non-Indexable").astype(object)
+
+
+def run_stage(stage, df):
+    """``(summary, detailed_data)`` of a whole-crawl ``stage`` over an in-memory crawl frame."""
+    crawl = CrawlRows(stage.urls)
+    stage.update(df, crawl.update(df))
+    return stage.finish(crawl.finish())
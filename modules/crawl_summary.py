@@ -0,0 +1,554 @@
+import logging
+import pickle
+import shutil
+import tempfile
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.canonical import CanonicalStage
+from modules.crawl_rows import CRAWL_ROW_COLUMNS, CrawlRows
+from modules.headings import HeadingStage
+from modules.hreflang import HreflangStage
+from modules.instrumentation import count, timed
+from modules.link_graph import LinkGraphStage, OrphanListStage
+from modules.page_sampling import SchemaSampleStage
+from modules.redirects import RedirectStage
+from modules.robots import RobotsStage
+from modules.schema_inventory import SchemaInventoryStage
+from modules.sitemap_coverage import SitemapStage
+from modules.sitemap_lastmod import LastmodStage
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+# Columns of the Screaming Frog "internal_html" export the audit checks read.
+CRAWL_COLUMNS = [
+    "Address",
+    "Status Code",
+    "Indexability",
+    "Indexability Status",
+    "Canonical Link Element 1",
+    "Word Count",
+    "Sentence Count",
+    "H1-1",
+    "Title 1",
+    "Title 1 Length",
+    "Meta Description 1",
+]
+
+TEXT_COLUMNS = [
+    "Address",
+    "Indexability",
+    "Indexability Status",
+    "Canonical Link Element 1",
+    "H1-1",
+    "Title 1",
+    "Meta Description 1",
+    "Redirect URL",
+    "Redirect Type",
+    "H1-2",
+    "H2-1",
+    "Language",
+    "Content Type",
+]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Checks that need a whole-crawl view (e.g. to resolve one page's target to
+# another row). Each is an accumulator fed chunk by chunk (``update``) that
+# keeps only URL ids and the few per-row values it needs, and produces its
+# ``(summary, detailed_data)`` at ``finish``. Stages naming an input (e.g.
+# an all_inlinks export) only run when it is supplied; a tuple names the
+# required input (None if there is none) followed by optional ones. All
+# stages share one UrlTable, so their URL joins are on the same ids.
+FRAME_STAGES = [
+    ("canonical", CanonicalStage, None),
+    ("redirects", RedirectStage, None),
+    ("headings", HeadingStage, None),
+    ("links", LinkGraphStage, "inlinks"),
+    ("robots", RobotsStage, "robots"),
+    ("sitemap", SitemapStage, ("sitemap_entries", "robots")),
+    ("hreflang", HreflangStage, "sitemap_entries"),
+    ("lastmod", LastmodStage, "sitemap_entries"),
+    ("orphans", OrphanListStage, "orphan_pages"),
+    ("schema_sample", SchemaSampleStage, (None, "sitemap_entries")),
+    ("schema_inventory", SchemaInventoryStage, "schema_inventory"),
+]
+
+# The sitemap entries can be a one-shot iterator (e.g. a sitemap walk), so
+# they are not handed to the stages naming them: once the crawl is
+# complete they are streamed a batch of this many at a time to each
+# stage's ``update_sitemap``.
+SITEMAP_BATCH_SIZE = 100_000
+
+
+@timed("report.summary")
+def summarize_crawl(df, skip_empty_content=True):
+    """Compute the counts behind every Screaming Frog check of the audit report."""
+    count("rows.crawl", len(df))
+    summary = {
+        "total_rows": len(df),
+        "domain": _domain_from_address(df["Address"].iloc[0]) if len(df) > 0 else None,
+        "has_indexability": "Indexability" in df.columns and "Indexability Status" in df.columns,
+        "has_content_counts": "Word Count" in df.columns and "Sentence Count" in df.columns,
+        "indexed_pages": 0,
+        "non_indexed_pages": 0,
+        "duplicate_content": 0,
+    }
+
+    if summary["has_indexability"]:
+        summary["indexed_pages"] = int((df["Indexability"] == "Indexable").sum())
+        summary["non_indexed_pages"] = int(
+            df["Indexability Status"].str.contains("noindex", na=False).sum()
+        )
+
+    summary["broken_internal_links"] = int((df["Status Code"] == 404).sum())
+
+    if summary["has_content_counts"]:
+        df_content = df[_content_mask(df, skip_empty_content)]
+        summary["duplicate_content"] = int(
+            df_content.duplicated(subset=["Word Count", "Sentence Count"], keep=False).sum()
+        )
+
+    summary["missing_h1"] = int(df["H1-1"].isna().sum())
+    summary["duplicate_h1"] = int(df["H1-1"].duplicated(keep=False).sum())
+
+    titles = df.loc[df["Title 1"].notna() & (df["Title 1"] != ""), "Title 1"]
+    summary["missing_title"] = int(df["Title 1"].isna().sum())
+    summary["duplicate_titles"] = int(titles.duplicated(keep=False).sum())
+
+    summary["missing_description"] = int(df["Meta Description 1"].isna().sum())
+    summary["duplicate_descriptions"] = int(df["Meta Description 1"].duplicated(keep=False).sum())
+
+    return summary
+
+
+@timed("report.summary_chunked")
+def summarize_crawl_chunked(
+    source,
+    chunksize=DEFAULT_CHUNKSIZE,
+    skip_empty_content=True,
+    page_filter=None,
+    chunk_filter=None,
+    max_entries=500_000,
+    spill_dir=None,
+    inputs=None,
+):
+    """Out-of-core variant of ``summarize_crawl`` plus the issue detail tables.
+
+    The export is read twice in row chunks: the first pass accumulates the
+    additive counts and spillable value counters, the second pass pulls out
+    the rows behind each duplicate/missing check. Results match the
+    in-memory path exactly while only one chunk (and each counter's
+    in-memory share) is resident at a time.
+    """
+    accumulator = CrawlSummaryAccumulator(
+        skip_empty_content=skip_empty_content, max_entries=max_entries, spill_dir=spill_dir
+    )
+    try:
+        for chunk in iter_crawl_chunks(source, chunksize):
+            if chunk_filter is not None:
+                chunk = chunk_filter(chunk)
+            accumulator.update(chunk)
+        summary = accumulator.finalize()
+
+        _rewind(source)
+        stages = FrameStages(inputs)
+        detailed_data = collect_issue_details_chunked(
+            iter_crawl_chunks(source, chunksize),
+            accumulator,
+            page_filter=page_filter,
+            chunk_filter=chunk_filter,
+            stages=stages,
+        )
+    finally:
+        accumulator.close()
+
+    stages.finish(summary, detailed_data)
+    return summary, detailed_data
+
+
+def stage_columns():
+    columns = list(CRAWL_ROW_COLUMNS)
+    for _, stage, _ in FRAME_STAGES:
+        columns.extend(column for column in stage.columns if column not in columns)
+    return columns
+
+
+class FrameStages:
+    """The whole-crawl checks of ``FRAME_STAGES`` that ``inputs`` allows, fed one chunk at a time.
+
+    Every chunk is interned into one ``CrawlRows`` before the stages see
+    it; ``finish`` streams the sitemap entries once through every stage
+    that reads them, then adds each stage's counts to ``summary`` and its
+    tables to ``detailed_data`` (``{"available": False}`` for stages whose
+    required input is missing).
+    """
+
+    def __init__(self, inputs=None):
+        inputs = inputs or {}
+        self.urls = UrlTable()
+        self.crawl = CrawlRows(self.urls)
+        self.sitemap_entries = inputs.get("sitemap_entries")
+        self.stages = {}
+        self.sitemap_stages = []
+        for name, stage, input_names in FRAME_STAGES:
+            if isinstance(input_names, str):
+                input_names = (input_names,)
+            if input_names is None:
+                self.stages[name] = stage(urls=self.urls)
+            elif input_names[0] is None or inputs.get(input_names[0]) is not None:
+                stage_inputs = [
+                    None if input_name == "sitemap_entries" else inputs.get(input_name)
+                    for input_name in input_names if input_name is not None
+                ]
+                self.stages[name] = stage(*stage_inputs, urls=self.urls)
+                if "sitemap_entries" in input_names and self.sitemap_entries is not None:
+                    self.sitemap_stages.append(name)
+            else:
+                self.stages[name] = None
+
+    def update(self, chunk):
+        rows = self.crawl.update(chunk)
+        for name, stage in self.stages.items():
+            if stage is not None:
+                with timed(f"report.{name}"):
+                    stage.update(chunk, rows)
+
+    def finish(self, summary, detailed_data):
+        crawl = self.crawl.finish()
+        if self.sitemap_stages:
+            entries = iter(self.sitemap_entries)
+            while True:
+                batch = list(islice(entries, SITEMAP_BATCH_SIZE))
+                if not batch:
+                    break
+                for name in self.sitemap_stages:
+                    with timed(f"report.{name}"):
+                        self.stages[name].update_sitemap(batch, crawl)
+        for name, stage in self.stages.items():
+            if stage is None:
+                summary[name] = {"available": False}
+                continue
+            with timed(f"report.{name}"):
+                stage_summary, stage_details = stage.finish(crawl)
+            summary[name] = stage_summary
+            detailed_data.update(stage_details)
+        return summary, detailed_data
+
+
+def run_frame_stages(df, summary, detailed_data, inputs=None):
+    """Run the whole-crawl checks, adding their counts to ``summary`` and tables to ``detailed_data``."""
+    stages = FrameStages(inputs)
+    stages.update(df)
+    return stages.finish(summary, detailed_data)
+
+
+def iter_crawl_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield the audit columns of a crawl export in row chunks."""
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        usecols=lambda column: column in CRAWL_COLUMNS or column in stage_columns(),
+        dtype={column: str for column in TEXT_COLUMNS},
+    )
+    for chunk in reader:
+        for column in ["Status Code", "Word Count", "Sentence Count"]:
+            if column in chunk.columns:
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+        yield chunk
+
+
+class SpillableCounter:
+    """Value -> count map that spills hash partitions to disk once it grows too big.
+
+    Counts are kept in memory until ``max_entries`` distinct values are held,
+    then flushed to one of ``partitions`` pickle files chosen by the value's
+    hash. On finalize each partition is merged on its own, so the exact
+    duplicate statistics are produced with at most one partition in memory.
+    Missing values are tracked separately as a single value, matching
+    ``pandas.Series.duplicated``. ``max_entries=None`` never spills.
+    """
+
+    def __init__(self, max_entries=500_000, partitions=16, spill_dir=None):
+        self.max_entries = max_entries
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.missing = 0
+        self._counts = {}
+        self._spill_path = None
+        self._spilled = False
+
+    def update(self, values):
+        self.missing += int(values.isna().sum())
+        value_counts = values.dropna().value_counts(sort=False)
+        counts = self._counts
+        for value, value_count in zip(value_counts.index.tolist(), value_counts.tolist()):
+            counts[value] = counts.get(value, 0) + value_count
+        self._maybe_spill()
+
+    def update_pairs(self, frame):
+        """Count rows of a two-column frame as tuple keys."""
+        value_counts = frame.value_counts(sort=False, dropna=False)
+        counts = self._counts
+        for value, value_count in zip(value_counts.index.tolist(), value_counts.tolist()):
+            counts[value] = counts.get(value, 0) + value_count
+        self._maybe_spill()
+
+    def merge(self, other):
+        """Fold in the counts of another counter, e.g. one built in a worker process."""
+        self.missing += other.missing
+        counts = self._counts
+        for value, value_count in other._iter_merged():
+            counts[value] = counts.get(value, 0) + value_count
+            if self.max_entries is not None and len(counts) > self.max_entries:
+                self._spill()
+                counts = self._counts
+
+    def duplicate_total(self, include_missing=True):
+        """Number of rows whose value occurs more than once."""
+        total = sum(value_count for _, value_count in self._iter_merged() if value_count > 1)
+        if include_missing and self.missing > 1:
+            total += self.missing
+        return total
+
+    def duplicate_values(self):
+        """Values occurring more than once, as an Index to match chunks against with ``get_indexer``.
+
+        The Index builds its hash table on the first lookup and keeps it,
+        so matching every chunk of the second pass costs no rebuild.
+        """
+        values = [value for value, value_count in self._iter_merged() if value_count > 1]
+        if values and isinstance(values[0], tuple):
+            return pd.MultiIndex.from_tuples(values)
+        return pd.Index(values, dtype=object)
+
+    def close(self):
+        self._counts = {}
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+    def _maybe_spill(self):
+        if self.max_entries is not None and len(self._counts) > self.max_entries:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix="audit-counts-", dir=self.spill_dir)
+        buckets = [[] for _ in range(self.partitions)]
+        for value, value_count in self._counts.items():
+            buckets[hash(value) % self.partitions].append((value, value_count))
+        for index, bucket in enumerate(buckets):
+            if bucket:
+                with (Path(self._spill_path) / f"part-{index}.pkl").open("ab") as handle:
+                    pickle.dump(bucket, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.debug(f"Spilled {len(self._counts)} counter entries to {self._spill_path}")
+        self._counts = {}
+        self._spilled = True
+
+    def _iter_merged(self):
+        if not self._spilled:
+            yield from self._counts.items()
+            return
+
+        if self._counts:
+            self._spill()
+        for index in range(self.partitions):
+            path = Path(self._spill_path) / f"part-{index}.pkl"
+            if not path.exists():
+                continue
+            merged = {}
+            with path.open("rb") as handle:
+                while True:
+                    try:
+                        bucket = pickle.load(handle)
+                    except EOFError:
+                        break
+                    for value, value_count in bucket:
+                        merged[value] = merged.get(value, 0) + value_count
+            yield from merged.items()
+
+
+class CrawlSummaryAccumulator:
+    """Builds the ``summarize_crawl`` result one row chunk at a time."""
+
+    def __init__(self, skip_empty_content=True, max_entries=500_000, spill_dir=None):
+        self.skip_empty_content = skip_empty_content
+        self.summary = {
+            "total_rows": 0,
+            "domain": None,
+            "has_indexability": False,
+            "has_content_counts": False,
+            "indexed_pages": 0,
+            "non_indexed_pages": 0,
+            "broken_internal_links": 0,
+            "missing_h1": 0,
+            "missing_title": 0,
+            "missing_description": 0,
+        }
+        self.counters = {
+            name: SpillableCounter(max_entries=max_entries, spill_dir=spill_dir)
+            for name in ["h1", "title", "description", "content"]
+        }
+        self._finalized = None
+
+    def update(self, chunk):
+        summary = self.summary
+        if len(chunk) == 0:
+            return
+        count("rows.crawl", len(chunk))
+        if summary["domain"] is None:
+            summary["domain"] = _domain_from_address(chunk["Address"].iloc[0])
+        summary["total_rows"] += len(chunk)
+
+        if "Indexability" in chunk.columns and "Indexability Status" in chunk.columns:
+            summary["has_indexability"] = True
+            summary["indexed_pages"] += int((chunk["Indexability"] == "Indexable").sum())
+            summary["non_indexed_pages"] += int(
+                chunk["Indexability Status"].str.contains("noindex", na=False).sum()
+            )
+
+        summary["broken_internal_links"] += int((chunk["Status Code"] == 404).sum())
+
+        if "Word Count" in chunk.columns and "Sentence Count" in chunk.columns:
+            summary["has_content_counts"] = True
+            content = chunk.loc[
+                _content_mask(chunk, self.skip_empty_content), ["Word Count", "Sentence Count"]
+            ]
+            self.counters["content"].update_pairs(content)
+
+        summary["missing_h1"] += int(chunk["H1-1"].isna().sum())
+        self.counters["h1"].update(chunk["H1-1"])
+
+        summary["missing_title"] += int(chunk["Title 1"].isna().sum())
+        titles = chunk.loc[chunk["Title 1"].notna() & (chunk["Title 1"] != ""), "Title 1"]
+        self.counters["title"].update(titles)
+
+        summary["missing_description"] += int(chunk["Meta Description 1"].isna().sum())
+        self.counters["description"].update(chunk["Meta Description 1"])
+
+    def merge(self, other):
+        """Fold in an accumulator built over a later row range."""
+        for key, value in other.summary.items():
+            if key == "domain" or isinstance(value, bool):
+                self.summary[key] = self.summary[key] or value
+            else:
+                self.summary[key] += value
+        for name, counter in self.counters.items():
+            counter.merge(other.counters[name])
+        self._finalized = None
+
+    def finalize(self):
+        if self._finalized is None:
+            summary = dict(self.summary)
+            summary["duplicate_h1"] = self.counters["h1"].duplicate_total()
+            summary["duplicate_titles"] = self.counters["title"].duplicate_total()
+            summary["duplicate_descriptions"] = self.counters["description"].duplicate_total()
+            summary["duplicate_content"] = (
+                self.counters["content"].duplicate_total() if summary["has_content_counts"] else 0
+            )
+            self._finalized = summary
+        return self._finalized
+
+    def close(self):
+        for counter in self.counters.values():
+            counter.close()
+
+
+def collect_issue_details_chunked(chunks, accumulator, page_filter=None, chunk_filter=None, stages=None):
+    """Second pass over the export collecting the rows behind each failing check.
+
+    With ``stages`` (a ``FrameStages``), every chunk is also fed to the
+    whole-crawl checks.
+    """
+    summary = accumulator.finalize()
+    counters = accumulator.counters
+
+    duplicate_titles = counters["title"].duplicate_values() if summary["duplicate_titles"] else None
+    duplicate_h1 = counters["h1"].duplicate_values() if summary["duplicate_h1"] else None
+    duplicate_descriptions = (
+        counters["description"].duplicate_values() if summary["duplicate_descriptions"] else None
+    )
+    duplicate_content = (
+        counters["content"].duplicate_values() if summary["duplicate_content"] else None
+    )
+
+    parts = {
+        "duplicate_titles": [],
+        "duplicate_content": [],
+        "h1_issues": [],
+        "description_issues": [],
+    }
+
+    for chunk in chunks:
+        if chunk_filter is not None:
+            chunk = chunk_filter(chunk)
+        if stages is not None:
+            stages.update(chunk)
+
+        if duplicate_titles is not None:
+            mask = _matches(chunk["Title 1"], duplicate_titles)
+            columns = [c for c in ["Address", "Title 1", "Title 1 Length"] if c in chunk.columns]
+            parts["duplicate_titles"].append(chunk.loc[mask, columns])
+
+        if duplicate_content is not None:
+            content = chunk.loc[
+                _content_mask(chunk, accumulator.skip_empty_content),
+                ["Address", "Word Count", "Sentence Count"],
+            ]
+            keys = pd.MultiIndex.from_frame(content[["Word Count", "Sentence Count"]])
+            parts["duplicate_content"].append(content[_matches(keys, duplicate_content)])
+
+        if summary["missing_h1"] or summary["duplicate_h1"]:
+            mask = chunk["H1-1"].isna().to_numpy() | _matches(chunk["H1-1"], duplicate_h1)
+            parts["h1_issues"].append(chunk.loc[mask, ["Address", "H1-1"]])
+
+        if summary["missing_description"] or summary["duplicate_descriptions"]:
+            mask = chunk["Meta Description 1"].isna().to_numpy() | _matches(
+                chunk["Meta Description 1"], duplicate_descriptions
+            )
+            parts["description_issues"].append(chunk.loc[mask, ["Address", "Meta Description 1"]])
+
+    detailed_data = {}
+    for name, frames in parts.items():
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            detailed_data[name] = None
+            continue
+        detail = pd.concat(frames)
+        if page_filter is not None and name in ("h1_issues", "description_issues"):
+            detail = detail[detail["Address"].apply(page_filter)]
+        detailed_data[name] = detail
+
+    return detailed_data
+
+
+def _matches(values, index):
+    """Whether each of ``values`` is in ``index`` (a ``duplicate_values`` Index, or None for none)."""
+    if index is None:
+        return np.zeros(len(values), dtype=bool)
+    return index.get_indexer(values) >= 0
+
+
+def _content_mask(df, skip_empty_content):
+    mask = df["Word Count"].notna() & df["Sentence Count"].notna()
+    if skip_empty_content:
+        mask &= ~((df["Word Count"] == 0) & (df["Sentence Count"] == 0))
+    return mask
+
+
+def _domain_from_address(address):
+    if not isinstance(address, str):
+        return None
+    if "://" in address:
+        return address.split("/")[2]
+    return address.split("/")[0]
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
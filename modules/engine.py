@@ -0,0 +1,255 @@
+import logging
+from collections import namedtuple
+from contextlib import nullcontext
+
+import pandas as pd
+import requests
+from lxml import etree
+
+from modules.checkpoint import CHECKPOINT_PATH, open_journal
+from modules.crawl_summary import (
+    DEFAULT_CHUNKSIZE,
+    run_frame_stages,
+    summarize_crawl,
+    summarize_crawl_chunked,
+)
+from modules.http_cache import set_http_cache
+from modules.page_sampling import live_pages, normalize_base_url
+from modules.parallel_audit import summarize_crawl_parallel
+from modules.report import (
+    build_seo_report,
+    collect_issue_details,
+    get_domain_from_df,
+    is_valid_page_url,
+)
+from modules.robots import fetch_robots_txt
+from modules.schema_inventory import INVENTORY_COLUMNS, inventory_schemas
+from modules.sitemap_lastmod import LastmodIndex
+from modules.sitemaps import iter_sitemap_entries
+
+logger = logging.getLogger(__name__)
+
+# Everything an audit produced: the report and issue details, and the site data they were checked against
+# (``sitemap_entries`` is the number of sitemap entries read, None when the sitemap was not fetched).
+AuditResult = namedtuple("AuditResult", ["domain", "website_url", "report", "details", "sitemap_entries", "robots", "schema_inventory"])
+
+
+def summarize_crawl_serial(df, workers=None, skip_empty_content=True, page_filter=None, inputs=None):
+    """Crawl checks, issue details and frame stages of ``df`` in the calling process."""
+    summary = summarize_crawl(df, skip_empty_content)
+    detailed_data = collect_issue_details(df, summary, skip_empty_content)
+    run_frame_stages(df, summary, detailed_data, inputs)
+    return summary, detailed_data
+
+
+# Executor name -> function(df, workers=, page_filter=, inputs=) returning (summary, detailed_data).
+EXECUTORS = {
+    "serial": summarize_crawl_serial,
+    "process": summarize_crawl_parallel,
+}
+
+
+def register_executor(name, summarize):
+    """Make ``summarize`` (same signature as ``summarize_crawl_serial``) available as executor ``name``."""
+    EXECUTORS[name] = summarize
+
+
+def analyze_screaming_frog_data(df, alt_tag_df=None, orphan_pages_df=None, sitemap_success=None, robots_success=None, executor="serial", workers=None, inlinks=None, robots=None, sitemap_entries=None, schema_inventory=None, progress=None, session=None):
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {list(EXECUTORS)}")
+
+    inputs = {"inlinks": inlinks, "orphan_pages": orphan_pages_df, "robots": robots, "sitemap_entries": sitemap_entries, "schema_inventory": schema_inventory}
+    summary, detailed_data = EXECUTORS[executor](df, workers=workers, page_filter=is_valid_page_url, inputs=inputs)
+    if sitemap_success is None:
+        sitemap_success = summary["sitemap"]["available"]
+    final_report_df = build_seo_report(summary, alt_tag_df, orphan_pages_df, sitemap_success, robots_success, progress, session)
+    return final_report_df, detailed_data
+
+def analyze_screaming_frog_export(source, alt_tag_df=None, orphan_pages_df=None, sitemap_success=None, robots_success=None, chunksize=DEFAULT_CHUNKSIZE, chunk_filter=None, inlinks=None, robots=None, sitemap_entries=None, schema_inventory=None, progress=None, session=None):
+    """Chunked variant of analyze_screaming_frog_data for exports too large to load at once.
+
+    ``source`` is a path or file object of the Screaming Frog CSV, read in
+    ``chunksize`` row chunks; ``chunk_filter`` (e.g. ``filter_pages``) is
+    applied to every chunk before it is counted. ``inlinks`` is an optional
+    all_inlinks export (path, file object or DataFrame); ``robots`` is the
+    site's parsed robots.txt from ``fetch_robots_txt`` and
+    ``sitemap_entries`` an optional iterable of ``SitemapEntry``, e.g.
+    ``iter_sitemap_entries(website_url)``, read once for the sitemap
+    coverage, hreflang and lastmod reports; ``schema_inventory`` is a
+    ``SchemaInventory`` of the crawl's pages for per-template schema
+    coverage. ``sitemap_success`` defaults to whether any sitemap URL was
+    read. ``progress`` is called with a status message before slow network
+    checks, which go through ``session`` when given.
+    """
+    summary, detailed_data = summarize_crawl_chunked(
+        source, chunksize=chunksize, page_filter=is_valid_page_url, chunk_filter=chunk_filter,
+        inputs={"inlinks": inlinks, "orphan_pages": orphan_pages_df, "robots": robots, "sitemap_entries": sitemap_entries, "schema_inventory": schema_inventory},
+    )
+    if sitemap_success is None:
+        sitemap_success = summary["sitemap"]["available"]
+    final_report_df = build_seo_report(summary, alt_tag_df, orphan_pages_df, sitemap_success, robots_success, progress, session)
+    return final_report_df, detailed_data
+
+
+def read_crawl_columns(source, columns, nrows=None):
+    """The ``columns`` a crawl export has, from a path or file object; file objects are rewound for the next reader."""
+    frame = pd.read_csv(source, usecols=lambda column: column in columns, nrows=nrows)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return frame
+
+
+class AuditEngine:
+    """Runs audits of crawls: sitemap, robots.txt and schema stages, crawl checks and the SEO report.
+
+    The Streamlit app, the API and the command line all audit through an
+    engine, so every stage, and every cache a stage goes through, is the
+    same code whichever front end started it. ``executor`` names an entry
+    of ``EXECUTORS`` (see ``register_executor``) and is given ``workers``.
+    Crawls passed as a path or file object instead of a DataFrame are
+    streamed in ``chunksize`` row chunks. ``cache`` replaces the
+    process-wide HTTP cache, for every engine (``False`` disables caching,
+    None keeps the current one). ``session``, e.g. a ``pooled_session``, is
+    the session this engine's sitemap, robots.txt and schema requests are
+    sent through (None uses the process-wide one, see ``set_shared_session``).
+    ``checkpoint`` is the journal file of resumable sitemap and schema
+    probes; journaling is off without one (the default unless
+    ``AUDIT_CHECKPOINT`` is set) and for audits not given a ``run`` name,
+    which keeps the journals of concurrent audits of one site apart.
+    """
+
+    def __init__(self, executor="serial", workers=None, chunksize=None, cache=None, session=None, checkpoint=CHECKPOINT_PATH):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {list(EXECUTORS)}")
+        self.executor = executor
+        self.workers = workers
+        self.chunksize = chunksize or DEFAULT_CHUNKSIZE
+        self.checkpoint = checkpoint
+        self.session = session
+        if cache is not None:
+            set_http_cache(cache or None)
+
+    def journal(self, probe, website_url, run=None, keep_last=False):
+        """Context manager giving the ``ProbeJournal`` of audit ``run``'s ``probe`` of the site, closed on exit.
+
+        None is given when checkpointing is off or there is no ``run``.
+        """
+        journal = open_journal(f"{probe}:{website_url}:{run}", self.checkpoint, keep_last) if run else None
+        # An empty journal is falsy (it has a length), so test for None.
+        return nullcontext() if journal is None else journal
+
+    def sitemap_entries(self, website_url, run=None):
+        """Yield every ``SitemapEntry`` of the site's sitemaps; an interrupted walk of audit ``run`` resumes from its journal."""
+        with self.journal("sitemap", website_url, run) as journal:
+            yield from iter_sitemap_entries(website_url, journal, self.session)
+
+    def robots(self, website_url):
+        return fetch_robots_txt(website_url, session=self.session)
+
+    def schema_inventory(self, urls, website_url, progress=None, run=None, lastmod=None, changed_since=None):
+        """``SchemaInventory`` of ``urls``; ``progress`` is called with the number of pages done.
+
+        The journal of audit ``run`` keeps its last completed inventory.
+        Given a sitemap ``LastmodIndex`` and ``changed_since``, pages that
+        inventory holds and the sitemap dates before ``changed_since`` are
+        taken from it instead of being fetched again.
+        """
+        with self.journal("schema-inventory", website_url, run, keep_last=True) as journal:
+            previous = None
+            if journal is not None and lastmod is not None and changed_since is not None:
+                changed = set(lastmod.changed_since(changed_since, urls))
+                _, last = journal.last_completed()
+                previous = {url: last[url] for url in urls if url not in changed and url in last}
+                logger.info(f"Reusing the schema types of {len(previous)} of {len(urls)} pages unchanged since {changed_since}")
+            return inventory_schemas(urls, progress=progress, journal=journal, session=self.session, previous=previous)
+
+    def analyze(self, crawl, alt_tag_df=None, orphan_pages_df=None, inlinks=None, sitemap_entries=None, robots=None, schema_inventory=None, chunk_filter=None, progress=None):
+        """``(report, detailed_data)`` of ``crawl``, a DataFrame or the path or file object of a crawl export.
+
+        ``sitemap_entries`` and ``robots`` are what ``sitemap_entries`` and
+        ``robots`` returned, None when they were not fetched; the entries
+        are read once, after the crawl, and the sitemap stages are reported
+        as not available when there are none. ``chunk_filter`` (e.g.
+        ``filter_pages``) applies to streamed exports only and ``progress``
+        is called with a status message before slow network checks.
+        """
+        site = {
+            "robots_success": robots is not None and robots.status_code == 200,
+            "robots": robots,
+            "sitemap_entries": sitemap_entries,
+        }
+        if isinstance(crawl, pd.DataFrame):
+            return analyze_screaming_frog_data(
+                crawl, alt_tag_df, orphan_pages_df, executor=self.executor, workers=self.workers,
+                inlinks=inlinks, schema_inventory=schema_inventory, progress=progress, session=self.session, **site
+            )
+        return analyze_screaming_frog_export(
+            crawl, alt_tag_df, orphan_pages_df, chunksize=self.chunksize, chunk_filter=chunk_filter,
+            inlinks=inlinks, schema_inventory=schema_inventory, progress=progress, session=self.session, **site
+        )
+
+    def audit(self, crawl, alt_tag_df=None, orphan_pages_df=None, inlinks=None, website_url=None, sitemap=True, robots=True, schema_inventory=False, chunk_filter=None, progress=None, run=None, changed_since=None):
+        """Every stage of the audit of ``crawl``, returned as an ``AuditResult``.
+
+        The site is ``website_url``, by default the origin of the crawl's
+        first address. Its sitemaps are walked while the crawl stages read
+        them; a sitemap that cannot be fetched or parsed ends the walk with
+        a warning rather than failing the audit. ``run`` names the audit in
+        the checkpoint journal, so a restarted audit of the same name
+        resumes its probes. With ``changed_since`` (a datetime, date string
+        or Unix seconds) and ``sitemap``, the schema inventory only fetches pages the
+        sitemap dates after it, or does not date, and takes the others from
+        the last inventory of ``run``; the sitemap is then walked once more
+        beforehand for its lastmod dates, mostly from the HTTP cache.
+        """
+        head = crawl if isinstance(crawl, pd.DataFrame) else read_crawl_columns(crawl, ["Address"], nrows=1)
+        domain = get_domain_from_df(head)
+        if website_url is None:
+            if not domain:
+                raise ValueError("Cannot extract domain from the crawl")
+            website_url = normalize_base_url(head["Address"].iloc[0])
+
+        walk = SitemapWalk(self.sitemap_entries(website_url, run), website_url) if sitemap else None
+        robots_txt = self.robots(website_url) if robots else None
+
+        inventory = None
+        if schema_inventory:
+            pages = crawl if isinstance(crawl, pd.DataFrame) else read_crawl_columns(crawl, INVENTORY_COLUMNS)
+            urls = live_pages(pages).tolist()
+            lastmod = None
+            if changed_since is not None and sitemap:
+                lastmod = LastmodIndex.from_entries(SitemapWalk(self.sitemap_entries(website_url, run), website_url))
+            inventory = self.schema_inventory(
+                urls, website_url,
+                progress=(lambda done: progress(f"Inventorying schema markup... {done:,}/{len(urls):,} pages")) if progress is not None else None,
+                run=run, lastmod=lastmod, changed_since=changed_since,
+            )
+
+        if progress is not None:
+            progress("Generating SEO analysis...")
+        report, details = self.analyze(
+            crawl, alt_tag_df, orphan_pages_df, inlinks=inlinks, sitemap_entries=walk,
+            robots=robots_txt, schema_inventory=inventory, chunk_filter=chunk_filter, progress=progress,
+        )
+        return AuditResult(domain, website_url, report, details, walk.count if walk is not None else None, robots_txt, inventory)
+
+
+class SitemapWalk:
+    """One pass over a site's sitemap entries that counts them and stops at the first failure.
+
+    A sitemap that cannot be fetched or parsed is logged and ends the walk,
+    so the stages reading it go on with the entries read so far.
+    """
+
+    def __init__(self, entries, website_url):
+        self.entries = entries
+        self.website_url = website_url
+        self.count = 0
+
+    def __iter__(self):
+        try:
+            for entry in self.entries:
+                self.count += 1
+                yield entry
+        except (requests.RequestException, etree.XMLSyntaxError) as e:
+            logger.warning(f"Sitemap analysis failed for {self.website_url}: {e}")
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+HEADING_COLUMNS = ["Address", "H1-1", "H1-2", "H2-1"]
+
+
+class HeadingStage:
+    """Heading hierarchy problems from the H1/H2 columns of the crawl export.
+
+    Counts are tallied chunk by chunk; only the rows with an issue are kept.
+    The check is not available unless the export has both ``H1-1`` and
+    ``H2-1``, since an absent H2 column says nothing about the pages' H2s.
+    """
+
+    columns = HEADING_COLUMNS
+
+    def __init__(self, urls=None):
+        self.urls = urls if urls is not None else UrlTable()
+        self.available = False
+        self.counts = {"multiple_h1": 0, "h2_without_h1": 0, "no_subheadings": 0}
+        self._issues = []
+
+    def update(self, chunk, rows):
+        if "H1-1" not in chunk.columns or "H2-1" not in chunk.columns:
+            return
+        self.available = True
+        has_h1 = chunk["H1-1"].notna().to_numpy()
+        multiple_h1 = chunk["H1-2"].notna().to_numpy() if "H1-2" in chunk.columns else np.zeros(len(chunk), dtype=bool)
+        has_h2 = chunk["H2-1"].notna().to_numpy()
+        h2_without_h1 = ~has_h1 & has_h2
+        no_subheadings = has_h1 & ~has_h2
+
+        issue = np.select(
+            [multiple_h1, h2_without_h1],
+            ["Multiple H1 tags", "H2 without H1"],
+            default="",
+        )
+        flagged = issue != ""
+        self._issues.append(pd.DataFrame({
+            "Address": chunk["Address"].to_numpy()[flagged],
+            "Issue": issue[flagged],
+        }))
+        self.counts["multiple_h1"] += int(multiple_h1.sum())
+        self.counts["h2_without_h1"] += int(h2_without_h1.sum())
+        self.counts["no_subheadings"] += int(no_subheadings.sum())
+
+    def finish(self, crawl):
+        if not self.available:
+            return {"available": False}, {}
+        issues = pd.concat(self._issues, ignore_index=True)
+        return {"available": True, **self.counts}, {"header_structure_issues": issues if not issues.empty else None}
+
+
+def analyze_heading_structure(df, urls=None):
+    """Heading hierarchy problems of an in-memory crawl frame."""
+    return run_stage(HeadingStage(urls), df)
+
+
+def format_heading_structure(summary):
+    return (
+        f"Multiple H1: {summary['multiple_h1']}, H2 without H1: {summary['h2_without_h1']}, "
+        f"No subheadings: {summary['no_subheadings']}"
+    )
@@ -0,0 +1,246 @@
+import logging
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+HREFLANG_COLUMNS = ["Address", "Status Code", "Indexability", "Language"]
+
+# Alternate links are read out of the sitemap entries this many at a time.
+HREFLANG_BATCH_SIZE = 100_000
+
+X_DEFAULT = "x-default"
+
+# language[-script][-region], e.g. "en", "zh-hans", "es-419", "pt-br"
+HREFLANG_CODE = r"^(?:x-default|[a-z]{2,3}(?:-[a-z]{4})?(?:-(?:[a-z]{2}|\d{3}))?)$"
+
+
+def hreflang_edges(sitemap_entries, urls=None, batch_size=HREFLANG_BATCH_SIZE):
+    """Edge table of every page -> alternate annotation in ``sitemap_entries``.
+
+    Entries are consumed in batches; source and target URLs are interned
+    into ``urls`` so the table only holds int32 ids and a categorical
+    (lower-cased) hreflang code. Repeated annotations are dropped.
+    """
+    urls = urls if urls is not None else UrlTable()
+    entries = iter(sitemap_entries)
+    parts = []
+    while True:
+        chunk = list(islice(entries, batch_size))
+        if not chunk:
+            break
+        parts.append(_edge_batch(chunk, urls))
+    return _edge_table(parts)
+
+
+class HreflangStage:
+    """Validate the hreflang clusters declared in the sitemaps against the crawl.
+
+    ``update`` keeps each crawled row's primary language subtag as a code
+    into a small vocabulary and ``update_sitemap`` the id edges of a batch
+    of sitemap entries; ``sitemap_entries`` given up front (entries or an
+    edge table from ``hreflang_edges``) are read at ``finish``. There
+    return tags are checked with a hash join of every (source, target) id
+    pair against the reversed pairs; clusters are the connected components
+    of the annotation graph.
+    A cluster is broken when any of its annotations has an invalid code,
+    no return link, a target that errors or is noindex, or a
+    self-reference whose code disagrees with the page's crawled
+    ``Language``.
+    """
+
+    columns = HREFLANG_COLUMNS
+
+    def __init__(self, sitemap_entries=None, urls=None):
+        self.sitemap_entries = sitemap_entries
+        self.urls = urls if urls is not None else UrlTable()
+        self.has_language = False
+        self._vocabulary = {"": 0}
+        self._languages = []
+        self._edges = []
+
+    def update(self, chunk, rows):
+        if "Language" not in chunk.columns:
+            self._languages.append(np.zeros(len(chunk), dtype=np.int32))
+            return
+        self.has_language = True
+        codes, uniques = pd.factorize(_primary_subtag(chunk["Language"].to_numpy(dtype=object)))
+        vocabulary = np.array([self._vocabulary.setdefault(subtag, len(self._vocabulary)) for subtag in uniques], dtype=np.int32)
+        self._languages.append(vocabulary[codes])
+
+    def update_sitemap(self, entries, crawl):
+        self._edges.append(_edge_batch(entries, self.urls))
+
+    def finish(self, crawl):
+        urls = self.urls
+        sitemap_entries = self.sitemap_entries
+        if isinstance(sitemap_entries, pd.DataFrame):
+            edges = sitemap_entries
+        elif sitemap_entries is not None:
+            edges = hreflang_edges(sitemap_entries, urls)
+        else:
+            edges = _edge_table(self._edges)
+        if edges.empty:
+            return {"available": False}, {}
+
+        src = edges["Source ID"].to_numpy(dtype=np.int64)
+        dst = edges["Target ID"].to_numpy(dtype=np.int64)
+        codes = edges["Hreflang"].astype("category")
+        code_ids = codes.cat.codes.to_numpy()
+        categories = pd.Series(codes.cat.categories, dtype=object)
+
+        valid_code = categories.str.fullmatch(HREFLANG_CODE).to_numpy(dtype=bool)[code_ids]
+        is_x_default = (categories == X_DEFAULT).to_numpy(dtype=bool)[code_ids]
+        is_self = src == dst
+
+        pair_keys = (src << 32) | dst
+        has_return = is_self | pd.Index(pair_keys).isin((dst << 32) | src)
+
+        target_rows = crawl.rows_by_id()[dst]
+        target_crawled = target_rows >= 0
+        target_status = np.where(target_crawled, crawl.status[np.maximum(target_rows, 0)], np.nan)
+        target_error = target_crawled & (target_status >= 300)
+        if crawl.has_indexability:
+            target_noindex = target_crawled & ~target_error & ~crawl.indexable[np.maximum(target_rows, 0)]
+        else:
+            target_noindex = np.zeros(len(edges), dtype=bool)
+
+        language_mismatch = np.zeros(len(edges), dtype=bool)
+        if self.has_language:
+            vocabulary = np.array(list(self._vocabulary), dtype=object)
+            page_language = vocabulary[np.concatenate(self._languages)]
+            declared = _primary_subtag(categories.to_numpy(dtype=object))[code_ids]
+            checked = is_self & target_crawled
+            crawled_language = page_language[np.maximum(target_rows, 0)]
+            language_mismatch = checked & (crawled_language != "") & ~is_x_default & (crawled_language != declared)
+
+        issue = np.select(
+            [~valid_code, ~has_return, target_error, target_noindex, language_mismatch],
+            ["Invalid hreflang code", "Missing return link", "Target error status", "Target noindex", "Language mismatch"],
+            default="",
+        )
+        broken_edge = issue != ""
+
+        labels = _components(src, dst)
+        cluster_ids, cluster = np.unique(labels, return_inverse=True)
+        cluster_count = len(cluster_ids)
+        broken_cluster = np.bincount(cluster, weights=broken_edge, minlength=cluster_count) > 0
+        has_x_default = np.bincount(cluster, weights=is_x_default, minlength=cluster_count) > 0
+
+        annotated = np.unique(src)
+        self_referencing = np.unique(src[is_self])
+
+        issues = pd.DataFrame({
+            "Source": urls.urls(src[broken_edge]),
+            "Hreflang": codes.to_numpy()[broken_edge],
+            "Target": urls.urls(dst[broken_edge]),
+            "Hreflang Issue": issue[broken_edge],
+        })
+        no_x_default = np.flatnonzero(~has_x_default)
+        first_source = pd.Series(src).groupby(cluster).min().to_numpy()
+        missing_x_default = pd.DataFrame({
+            "Cluster": urls.urls(first_source[no_x_default]),
+            "Pages": _pages_per_cluster(cluster, src, dst, cluster_count)[no_x_default],
+        })
+        issue_counts = issues["Hreflang Issue"].value_counts()
+
+        summary = {
+            "available": True,
+            "annotated_pages": len(annotated),
+            "edges": len(edges),
+            "clusters": cluster_count,
+            "broken_clusters": int(broken_cluster.sum()),
+            "missing_return": int(issue_counts.get("Missing return link", 0)),
+            "missing_x_default": len(missing_x_default),
+            "missing_self": len(annotated) - len(self_referencing),
+            "invalid_codes": int(issue_counts.get("Invalid hreflang code", 0)),
+            "target_errors": int(issue_counts.get("Target error status", 0) + issue_counts.get("Target noindex", 0)),
+            "language_mismatch": int(issue_counts.get("Language mismatch", 0)),
+            "not_crawled": len(np.unique(dst[~target_crawled])),
+        }
+        logger.info(f"Validated {summary['edges']} hreflang annotations in {cluster_count} clusters")
+        detailed_data = {
+            "hreflang_issues": issues if not issues.empty else None,
+            "hreflang_missing_x_default": missing_x_default if not missing_x_default.empty else None,
+        }
+        return summary, detailed_data
+
+
+def analyze_hreflang(df, sitemap_entries, urls=None):
+    """Hreflang checks of an in-memory crawl frame."""
+    return run_stage(HreflangStage(sitemap_entries, urls), df)
+
+
+def format_hreflang_summary(summary):
+    return (
+        f"{summary['broken_clusters']} of {summary['clusters']} clusters broken "
+        f"(missing return links: {summary['missing_return']}, invalid codes: {summary['invalid_codes']}, "
+        f"bad targets: {summary['target_errors']}, language mismatches: {summary['language_mismatch']}); "
+        f"without x-default: {summary['missing_x_default']}, pages without self-reference: {summary['missing_self']}"
+    )
+
+
+def _edge_batch(entries, urls):
+    batch = [(entry.loc, hreflang, href) for entry in entries for hreflang, href in entry.alternates]
+    if not batch:
+        return None
+    sources, codes, targets = zip(*batch)
+    url_codes, uniques = pd.factorize(pd.Series(sources + targets, dtype=object))
+    ids = urls.intern(uniques)[url_codes]
+    code_codes, code_uniques = pd.factorize(pd.Series(codes, dtype=object))
+    return pd.DataFrame({
+        "Source ID": ids[: len(batch)],
+        "Target ID": ids[len(batch):],
+        "Hreflang": np.asarray([code.lower() for code in code_uniques], dtype=object)[code_codes],
+    })
+
+
+def _edge_table(parts):
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return pd.DataFrame({
+            "Source ID": np.zeros(0, dtype=np.int32),
+            "Target ID": np.zeros(0, dtype=np.int32),
+            "Hreflang": pd.Categorical([]),
+        })
+    edges = pd.concat(parts, ignore_index=True)
+    edges = edges[(edges["Source ID"] >= 0) & (edges["Target ID"] >= 0)]
+    edges["Hreflang"] = edges["Hreflang"].astype("category")
+    return edges.drop_duplicates(ignore_index=True)
+
+
+def _primary_subtag(values):
+    """Lower-cased language subtag ("en" for "en-US"), "" for missing values."""
+    # Few distinct values, so the string work is done once per value
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    subtags = pd.Series(uniques, dtype=object).str.lower().str.split(r"[-_]", n=1, regex=True).str[0]
+    subtags = np.append(subtags.fillna("").to_numpy(dtype=object), "")
+    return subtags[codes]
+
+
+def _pages_per_cluster(cluster, src, dst, cluster_count):
+    members = np.unique(np.concatenate([(cluster << 32) | src, (cluster << 32) | dst]))
+    return np.bincount(members >> 32, minlength=cluster_count)
+
+
+def _components(src, dst):
+    """Connected component label (smallest member id) of every edge, by min-label propagation."""
+    nodes, inverse = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    a, b = inverse[: len(src)], inverse[len(src):]
+    labels = np.arange(len(nodes))
+    while True:
+        edge_labels = np.minimum(labels[a], labels[b])
+        updated = labels.copy()
+        np.minimum.at(updated, a, edge_labels)
+        np.minimum.at(updated, b, edge_labels)
+        # Pointer jumping collapses long chains in a few rounds
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return nodes[labels[a]]
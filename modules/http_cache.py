@@ -0,0 +1,276 @@
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from threading import Lock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from modules.instrumentation import count
+from modules.rate_limit import polite_get
+
+logger = logging.getLogger(__name__)
+
+# Set to an empty string to disable the cache.
+HTTP_CACHE_PATH = os.environ.get("AUDIT_HTTP_CACHE", str(Path.home() / ".cache" / "web-audit" / "http.sqlite"))
+
+# Compressed bodies beyond this total are evicted, least recently used first.
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Entries not revalidated for this long are dropped.
+HTTP_CACHE_MAX_AGE = 7 * 86_400
+
+# Responses without Cache-Control max-age or Expires are served without a
+# request for this long after they were stored or revalidated.
+HTTP_CACHE_FRESH_SECONDS = 3_600
+
+# Same, for 404/410 responses: a page or sitemap that appears soon after is
+# picked up on the next run instead of an hour later.
+HTTP_CACHE_NEGATIVE_SECONDS = 300
+
+# Eviction runs once per this many stores.
+EVICT_EVERY = 64
+
+STORED_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires", "Date"]
+
+# Cacheable by default (RFC 9111); caching 404s spares the probes of
+# sitemap paths and page variations a site does not have.
+CACHEABLE_STATUS = {200, 203, 404, 410}
+NEGATIVE_STATUS = {404, 410}
+
+# Warning added to a stale copy served because revalidation failed (RFC 7234).
+STALE_WARNING = '111 - "Revalidation Failed"'
+
+
+class HttpCache:
+    """On-disk cache of GET responses with conditional revalidation.
+
+    Bodies are stored zlib-compressed in a SQLite file together with the
+    response's ETag and Last-Modified validators. A cached entry is served
+    directly while fresh, then revalidated with If-None-Match /
+    If-Modified-Since so an unchanged resource costs a 304 instead of a
+    full download. Freshness comes from the response's Cache-Control
+    max-age or Expires, falling back to ``fresh_seconds`` (or
+    ``negative_seconds`` for 404/410) when it has neither. Size and age
+    limits are enforced every ``EVICT_EVERY`` stores.
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES, max_age=HTTP_CACHE_MAX_AGE, fresh_seconds=HTTP_CACHE_FRESH_SECONDS, negative_seconds=HTTP_CACHE_NEGATIVE_SECONDS):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fresh_seconds = fresh_seconds
+        self.negative_seconds = negative_seconds
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._stores = 0
+        self._lock = Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, final_url TEXT, status INTEGER, headers TEXT, body BLOB, "
+            "size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.evict()
+
+    def get(self, url, session=None, headers=None, stale_if_error=False, **kwargs):
+        """GET ``url`` through the cache; same arguments and return type as ``requests.get``.
+
+        With ``stale_if_error``, a stored copy is returned (marked with a
+        ``Warning: 111`` header, see ``is_stale``) when revalidating it
+        fails on a network error, unless the response forbids it with
+        must-revalidate or no-cache.
+        """
+        entry = self._load(url)
+        now = time.time()
+        if entry is not None and now - entry["stored_at"] < self._lifetime(entry):
+            with self._lock:
+                self.hits += 1
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            count("http.cache_hits")
+            return _to_response(entry, url)
+
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        try:
+            response = polite_get(url, session=session, headers=headers, **kwargs)
+        except requests.exceptions.RequestException as e:
+            directives = _cache_directives(entry["headers"]) if entry is not None else {}
+            if entry is None or not stale_if_error or "must-revalidate" in directives or "no-cache" in directives:
+                raise
+            logger.warning(f"Serving stale cached copy of {url}: {e}")
+            count("http.cache_stale")
+            response = _to_response(entry, url)
+            response.headers["Warning"] = STALE_WARNING
+            return response
+
+        if response.status_code == 304 and entry is not None:
+            # The 304's validators and freshness headers replace the stored
+            # ones (RFC 9111 4.3.4); the body and its Content-Type are kept
+            entry["headers"].update(
+                (name, response.headers[name]) for name in STORED_HEADERS if name != "Content-Type" and name in response.headers
+            )
+            with self._lock:
+                self.revalidated += 1
+                self._db.execute(
+                    "UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE url = ?",
+                    (_serialize_headers(entry["headers"]), now, now, url),
+                )
+            count("http.cache_revalidated")
+            return _to_response(entry, url)
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code in CACHEABLE_STATUS and "no-store" not in response.headers.get("Cache-Control", ""):
+            self._store(url, response, now)
+        return response
+
+    def evict(self):
+        """Drop entries older than ``max_age``, then the least recently used ones beyond ``max_bytes``."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.max_age,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Trim to 90% of the limit so eviction does not run on every store
+            excess = total - int(self.max_bytes * 0.9)
+            rows = self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+            doomed = []
+            for url, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((url,))
+                excess -= size
+            self._db.executemany("DELETE FROM responses WHERE url = ?", doomed)
+        logger.info(f"Evicted {len(doomed)} cached responses")
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _lifetime(self, entry):
+        headers = entry["headers"]
+        directives = _cache_directives(headers)
+        if "no-cache" in directives:
+            return 0
+        if "max-age" in directives:
+            return int(directives["max-age"]) if directives["max-age"].isdigit() else 0
+        if headers.get("Expires"):
+            try:
+                expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+                date = parsedate_to_datetime(headers["Date"]).timestamp() if headers.get("Date") else entry["stored_at"]
+            except (TypeError, ValueError):
+                # An invalid Expires means already expired (RFC 9111)
+                return 0
+            return max(expires - date, 0)
+        return self.negative_seconds if entry["status"] in NEGATIVE_STATUS else self.fresh_seconds
+
+    def _load(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT final_url, status, headers, body, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        final_url, status, headers, body, stored_at = row
+        return {
+            "final_url": final_url,
+            "status": status,
+            "headers": dict(line.split(": ", 1) for line in headers.splitlines() if ": " in line),
+            "body": body,
+            "stored_at": stored_at,
+        }
+
+    def _store(self, url, response, now):
+        body = zlib.compress(response.content, 6)
+        headers = _serialize_headers(response.headers)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.url, response.status_code, headers, body, len(body), now, now),
+            )
+            self._stores += 1
+            evict = self._stores % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+
+_default_cache = None
+_default_cache_lock = Lock()
+
+
+def get_http_cache():
+    """Process-wide cache at ``HTTP_CACHE_PATH`` (None when disabled or the file cannot be opened)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None and HTTP_CACHE_PATH:
+            try:
+                _default_cache = HttpCache(HTTP_CACHE_PATH)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"HTTP cache disabled, cannot open {HTTP_CACHE_PATH}: {e}")
+                _default_cache = False
+        return _default_cache or None
+
+
+def set_http_cache(cache):
+    """Replace the process-wide cache with ``cache``, any object with ``HttpCache.get``'s signature (None disables caching)."""
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache if cache is not None else False
+
+
+def cached_get(url, session=None, stale_if_error=False, **kwargs):
+    """Drop-in for ``requests.get`` that goes through the default cache when it is enabled.
+
+    Network requests are paced per host by ``polite_get``; cache hits are
+    not. ``stale_if_error`` is passed on to ``HttpCache.get``.
+    """
+    cache = get_http_cache()
+    if cache is None:
+        return polite_get(url, session=session, **kwargs)
+    return cache.get(url, session=session, stale_if_error=stale_if_error, **kwargs)
+
+
+def is_stale(response):
+    """Whether ``response`` is a stale cached copy served because revalidation failed."""
+    return response.headers.get("Warning") == STALE_WARNING
+
+
+def _serialize_headers(headers):
+    return "\n".join(f"{name}: {headers[name]}" for name in STORED_HEADERS if name in headers)
+
+
+def _cache_directives(headers):
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def _to_response(entry, url):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.url = entry["final_url"] or url
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = zlib.decompress(entry["body"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
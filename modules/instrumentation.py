@@ -0,0 +1,96 @@
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class AuditMetrics:
+    """Process-wide stage timings and counters of an audit.
+
+    ``timed`` records how long a named stage took (calls, total, max),
+    ``count`` adds to a named counter such as bytes downloaded or rows
+    processed. Both are thread-safe and cheap enough for per-URL hot
+    paths, and ``timed`` doubles as a function decorator. Stage names are dotted, e.g. ``schema.fetch`` or
+    ``report.canonical``. Work done in child processes is not seen here
+    unless its timing is passed back and recorded with ``add_timing``.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._timings = {}
+        self._counters = {}
+        self._started = time.time()
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(stage, time.perf_counter() - start)
+
+    def add_timing(self, stage, seconds):
+        with self._lock:
+            timing = self._timings.get(stage)
+            if timing is None:
+                self._timings[stage] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def count(self, counter, n=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def snapshot(self):
+        """JSON-serializable copy of the timings and counters recorded so far."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "calls": calls,
+                    "total_seconds": round(total, 6),
+                    "mean_seconds": round(total / calls, 6),
+                    "max_seconds": round(longest, 6),
+                }
+                for stage, (calls, total, longest) in sorted(self._timings.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"since": self._started, "stages": stages, "counters": counters}
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+
+metrics = AuditMetrics()
+
+# Module-level shortcuts on the process-wide instance
+timed = metrics.timed
+count = metrics.count
+
+
+def metrics_frame(snapshot=None):
+    """Stage timings of ``snapshot`` (the current metrics by default) as a table, slowest first."""
+    import pandas as pd
+
+    snapshot = snapshot or metrics.snapshot()
+    frame = pd.DataFrame.from_dict(snapshot["stages"], orient="index", columns=["calls", "total_seconds", "mean_seconds", "max_seconds"])
+    return frame.rename_axis("stage").sort_values("total_seconds", ascending=False).reset_index()
+
+
+def dump_metrics(path):
+    """Write the current metrics as JSON to ``path`` (``-`` for stdout)."""
+    payload = json.dumps(metrics.snapshot(), indent=2)
+    if path == "-":
+        sys.stdout.write(payload + "\n")
+        return
+    Path(path).write_text(payload + "\n", encoding="utf-8")
+    logger.info(f"Wrote audit metrics to {path}")
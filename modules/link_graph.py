@@ -0,0 +1,291 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+# Columns of the Screaming Frog "all_inlinks" (Bulk Export > Links) export.
+INLINK_COLUMNS = ["Type", "Source", "Destination", "Status Code", "Follow", "Anchor"]
+
+LINK_CRAWL_COLUMNS = ["Address", "Indexability", "Status Code"]
+
+ORPHAN_LIST_COLUMNS = ["Address"]
+
+# Link exports are narrow, so they are read in larger chunks than the crawl.
+INLINK_CHUNKSIZE = 1_000_000
+
+# Pages deeper than this many clicks from the home page are flagged.
+MAX_CLICK_DEPTH = 3
+
+
+class LinkGraph:
+    """Internal hyperlink graph in CSR form over the ids of a ``UrlTable``.
+
+    ``indptr``/``indices`` hold the unique followed source -> destination
+    edges between the first ``node_count`` ids of ``urls``. Links pointing
+    at 4xx/5xx destinations are kept aside in ``broken_links`` with their
+    source page.
+    """
+
+    def __init__(self, urls, indptr, indices, broken_links):
+        self.urls = urls
+        self.indptr = indptr
+        self.indices = indices
+        self.broken_links = broken_links
+
+    @property
+    def node_count(self):
+        return len(self.indptr) - 1
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_inlinks(cls, source, chunksize=INLINK_CHUNKSIZE, urls=None):
+        """Build the graph from an all_inlinks export read in row chunks.
+
+        The distinct URLs of each chunk are interned into ``urls``, so only
+        the id arrays of each chunk are kept; duplicate edges are collapsed
+        with a sort over packed (source, destination) keys, which also
+        gives the CSR row order.
+        """
+        urls = urls if urls is not None else UrlTable()
+        if isinstance(source, pd.DataFrame):
+            chunks = [source]
+        else:
+            chunks = pd.read_csv(
+                source,
+                chunksize=chunksize,
+                usecols=lambda column: column in INLINK_COLUMNS,
+                dtype={"Source": str, "Destination": str, "Type": str, "Follow": str, "Anchor": str},
+            )
+
+        edge_keys = []
+        broken = []
+
+        for chunk in chunks:
+            if "Type" in chunk.columns:
+                chunk = chunk[chunk["Type"].isin(["Hyperlink", "AHREF"])]
+            chunk = chunk[chunk["Source"].notna() & chunk["Destination"].notna()]
+
+            if "Status Code" in chunk.columns:
+                broken_rows = chunk[pd.to_numeric(chunk["Status Code"], errors="coerce") >= 400]
+                if not broken_rows.empty:
+                    columns = [c for c in ["Source", "Destination", "Status Code", "Anchor"] if c in chunk.columns]
+                    broken.append(broken_rows[columns])
+
+            if "Follow" in chunk.columns:
+                chunk = chunk[chunk["Follow"].astype(str).str.lower() != "false"]
+
+            codes, uniques = pd.factorize(pd.concat([chunk["Source"], chunk["Destination"]], ignore_index=True))
+            encoded = urls.intern(uniques).astype(np.int64)[codes]
+            src = encoded[: len(chunk)]
+            dst = encoded[len(chunk):]
+            # Self-links neither rescue an orphan nor pass link equity
+            keep = src != dst
+            edge_keys.append(np.unique((src[keep] << 32) | dst[keep]))
+
+        n = len(urls)
+        keys = np.unique(np.concatenate(edge_keys)) if edge_keys else np.zeros(0, dtype=np.int64)
+        src = (keys >> 32).astype(np.int32)
+        dst = (keys & 0xFFFFFFFF).astype(np.int32)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+        broken_links = pd.concat(broken, ignore_index=True) if broken else pd.DataFrame(
+            columns=["Source", "Destination", "Status Code"]
+        )
+        graph = cls(urls, indptr, dst, broken_links)
+        logger.info(f"Built link graph with {graph.node_count} URLs and {graph.edge_count} edges")
+        return graph
+
+    def lookup(self, urls):
+        """Node ids for ``urls`` (-1 for URLs outside the graph)."""
+        ids = self.urls.lookup(urls).astype(np.int64)
+        return np.where(ids < self.node_count, ids, -1)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=self.node_count)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def crawl_depth(self, start):
+        """Click depth of every URL from ``start`` by frontier-at-a-time BFS (-1 if unreachable)."""
+        depth = np.full(self.node_count, -1, dtype=np.int64)
+        if start < 0:
+            return depth
+        depth[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            level += 1
+            neighbours = self._neighbours(frontier)
+            neighbours = np.unique(neighbours[depth[neighbours] < 0])
+            depth[neighbours] = level
+            frontier = neighbours
+        return depth
+
+    def link_score(self, damping=0.85, iterations=50, tolerance=1e-9):
+        """PageRank over followed internal links, rescaled to 0-100 on a log scale."""
+        n = self.node_count
+        if n == 0:
+            return np.zeros(0)
+        out_degree = self.out_degree()
+        src = np.repeat(np.arange(n, dtype=np.int32), out_degree)
+        dangling = out_degree == 0
+        weights = np.zeros(n)
+        weights[~dangling] = 1.0 / out_degree[~dangling]
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(iterations):
+            spread = np.bincount(self.indices, weights=(rank * weights)[src], minlength=n)
+            updated = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+
+        log_rank = np.log(rank)
+        low, high = log_rank.min(), log_rank.max()
+        if high == low:
+            return np.full(n, 100.0)
+        return np.round(100 * (log_rank - low) / (high - low), 1)
+
+    def _neighbours(self, nodes):
+        starts = self.indptr[nodes]
+        lengths = self.indptr[nodes + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return self.indices[offsets + np.arange(total)].astype(np.int64)
+
+
+class LinkGraphStage:
+    """Orphans, click depth, link score and broken links from an all_inlinks export.
+
+    Needs only the crawl's URL ids, status and indexability, so ``update``
+    keeps nothing; the graph is built over the same ``urls`` at ``finish``.
+    """
+
+    columns = LINK_CRAWL_COLUMNS
+
+    def __init__(self, inlinks, urls=None):
+        self.inlinks = inlinks
+        self.urls = urls if urls is not None else UrlTable()
+
+    def update(self, chunk, rows):
+        pass
+
+    def finish(self, crawl):
+        inlinks = self.inlinks
+        graph = inlinks if isinstance(inlinks, LinkGraph) else LinkGraph.from_inlinks(inlinks, urls=self.urls)
+
+        page_ids = crawl.page_ids.astype(np.int64)
+        if graph.urls is not self.urls:
+            page_ids = graph.lookup(crawl.addresses(np.arange(len(crawl))))
+        page_ids = np.where(page_ids < graph.node_count, page_ids, -1)
+        in_degree = graph.in_degree()
+        inlinks_per_page = np.where(page_ids >= 0, in_degree[np.maximum(page_ids, 0)], 0)
+
+        start = _home_page_id(graph, crawl.addresses(np.arange(min(len(crawl), 1))))
+        depth = graph.crawl_depth(start)
+        score = graph.link_score()
+        page_depth = np.where(page_ids >= 0, depth[np.maximum(page_ids, 0)], -1)
+        page_score = np.where(page_ids >= 0, score[np.maximum(page_ids, 0)], 0.0)
+        is_start = (page_ids == start) & (start >= 0)
+
+        def pages(mask):
+            rows = np.flatnonzero(mask)
+            return pd.DataFrame({
+                "Address": crawl.addresses(rows),
+                "Unique Inlinks": inlinks_per_page[rows],
+                "Crawl Depth": np.where(page_depth[rows] >= 0, page_depth[rows], np.nan),
+                "Link Score": page_score[rows],
+            })
+
+        orphans = pages(crawl.indexable & (inlinks_per_page == 0) & ~is_start)
+        deep = pages((page_depth > MAX_CLICK_DEPTH) | (page_depth < 0))
+        reachable = page_depth >= 0
+        broken = graph.broken_links
+
+        summary = {
+            "available": True,
+            "pages": len(crawl),
+            "edges": graph.edge_count,
+            "orphans": len(orphans),
+            "broken_links": len(broken),
+            "broken_link_sources": int(broken["Source"].nunique()) if not broken.empty else 0,
+            "max_depth": int(page_depth.max()) if reachable.any() else None,
+            "within_depth_pct": round(100 * float(((page_depth >= 0) & (page_depth <= MAX_CLICK_DEPTH)).sum()) / max(len(crawl), 1), 1),
+            "unreachable": int((~reachable).sum()),
+        }
+        detailed_data = {
+            "orphan_pages": orphans if not orphans.empty else None,
+            "broken_internal_links": broken if not broken.empty else None,
+            "deep_pages": deep.sort_values("Crawl Depth", ascending=False, na_position="first") if not deep.empty else None,
+        }
+        return summary, detailed_data
+
+
+def analyze_link_graph(crawl_df, inlinks, urls=None):
+    """Link graph checks of an in-memory crawl frame."""
+    return run_stage(LinkGraphStage(inlinks, urls), crawl_df)
+
+
+class OrphanListStage:
+    """Distinct orphan URLs of a pre-computed orphan export, joined to the crawl on URL ids."""
+
+    columns = ORPHAN_LIST_COLUMNS
+
+    def __init__(self, orphan_pages_df, urls=None):
+        self.orphan_pages_df = orphan_pages_df
+        self.urls = urls if urls is not None else UrlTable()
+
+    def update(self, chunk, rows):
+        pass
+
+    def finish(self, crawl):
+        orphan_pages_df = self.orphan_pages_df
+        if orphan_pages_df is None or "Address" not in orphan_pages_df.columns:
+            return {"available": False}, {}
+        orphan_ids = np.unique(self.urls.intern(orphan_pages_df["Address"]))
+        orphan_ids = orphan_ids[orphan_ids >= 0]
+        summary = {
+            "available": True,
+            "orphans": len(orphan_ids),
+            "crawled": int(np.isin(orphan_ids, crawl.page_ids).sum()),
+        }
+        return summary, {}
+
+
+def analyze_orphan_list(crawl_df, orphan_pages_df, urls=None):
+    """Orphan export counts of an in-memory crawl frame."""
+    return run_stage(OrphanListStage(orphan_pages_df, urls), crawl_df)
+
+
+def format_information_architecture(summary):
+    return (
+        f"{summary['within_depth_pct']}% of pages within {MAX_CLICK_DEPTH} clicks, "
+        f"max depth: {summary['max_depth']}, unreachable: {summary['unreachable']}, "
+        f"internal links: {summary['edges']}"
+    )
+
+
+def _home_page_id(graph, addresses):
+    if len(addresses) == 0 or not isinstance(addresses[0], str):
+        return -1
+    first = addresses[0]
+    parts = first.split("/")
+    candidates = [f"{parts[0]}//{parts[2]}/", f"{parts[0]}//{parts[2]}", first] if "://" in first else [first]
+    for candidate in candidates:
+        node = graph.lookup([candidate])[0]
+        if node >= 0:
+            return int(node)
+    return -1
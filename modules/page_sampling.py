@@ -0,0 +1,243 @@
+import logging
+from collections.abc import Iterator
+from urllib.parse import urljoin, urlparse
+
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_language import detect_url_language
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_COLUMNS = ["Address", "Status Code", "Indexability"]
+
+# Fallback paths probed when there is neither a crawl nor a sitemap to sample from.
+URL_VARIATIONS = [
+    "",
+    "/about",
+    "/about-us",
+    "/products",
+    "/services",
+    "/solutions",
+    "/blog",
+    "/blogs",
+    "/cyberglossary",
+    "/news",
+    "/resources",
+    "/how-to",
+    "/tutorials",
+    "/guides",
+    "/faq",
+    "/help",
+    "/support",
+    "/contact",
+    "/contact-us",
+    "/reviews",
+    "/testimonials",
+    "/portfolio",
+    "/cases",
+    "/case-studies",
+    "/team",
+    "/careers",
+    "/jobs",
+    "/catalog",
+    "/pricing",
+    "/plans",
+    "/login",
+    "/signup",
+    "/register",
+    "/resources/cyberglossary",
+]
+
+# Representative pages per template, and the cap on pages probed overall.
+PAGES_PER_TEMPLATE = 2
+MAX_SAMPLED_PAGES = 50
+
+# Path segments beyond this depth are folded into "{...}".
+MAX_TEMPLATE_DEPTH = 3
+
+NON_PAGE_EXTENSION = r"\.(?:jpg|jpeg|png|gif|bmp|webp|svg|ico|pdf|docx?|xlsx?|pptx?|zip|css|js|xml|txt|mp4|mp3)$"
+
+# Applied in order to the lower-cased path (no trailing slash). RE2
+# compatible, so the same rules run through pyarrow compute.
+TEMPLATE_RULES = [
+    (rf"^((?:/[^/]+){{{MAX_TEMPLATE_DEPTH}}})/.+$", r"\1/{...}"),
+    (r"/\d+(/|$)", r"/{n}\1"),
+    (r"/\d+(/|$)", r"/{n}\1"),
+    (r"/[0-9a-f][0-9a-f-]{15,}(/|$)", r"/{id}\1"),
+    (r"^/[a-z]{2}(?:[-_][a-z]{2,4})?(/[^/])", r"/{lang}\1"),
+    (r"^(/[^/]+(?:/[^/]+)*)/[^/{][^/]*$", r"\1/{slug}"),
+]
+
+
+def path_templates(urls):
+    """Origin and path template of every URL, e.g. ``https://a.com/en/blog/my-post`` -> ``/{lang}/blog/{slug}``.
+
+    Numbers, long hex ids and language prefixes become placeholders, and
+    the last segment of any path at least two segments deep becomes
+    ``{slug}``, so pages rendered by the same template share a key while
+    top-level pages (``/pricing``) stay on their own.
+    """
+    urls = pd.Series(urls, dtype=object).reset_index(drop=True)
+    origins = urls.str.extract(r"^([a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]+)", expand=False)
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        paths = pa.array(urls, type=pa.large_string(), from_pandas=True)
+        paths = pc.replace_substring_regex(paths, r"^[a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]+", "")
+        paths = pc.utf8_lower(pc.replace_substring_regex(paths, r"[?#].*$", ""))
+        paths = pc.replace_substring_regex(paths, r"/+$", "")
+        for pattern, replacement in TEMPLATE_RULES:
+            paths = pc.replace_substring_regex(paths, pattern, replacement)
+        templates = pd.Series(paths.to_numpy(zero_copy_only=False), dtype=object)
+    else:
+        paths = urls.str.replace(r"^[a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]+", "", regex=True)
+        paths = paths.str.replace(r"[?#].*$", "", regex=True).str.lower().str.replace(r"/+$", "", regex=True)
+        for pattern, replacement in TEMPLATE_RULES:
+            paths = paths.str.replace(pattern, replacement, regex=True)
+        templates = paths
+    return origins.fillna(""), templates.fillna("").replace("", "/")
+
+
+def normalize_base_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def variation_urls(domain):
+    """``URL_VARIATIONS`` as absolute URLs on ``domain``'s origin."""
+    base_url = normalize_base_url(domain)
+    return [urljoin(base_url, variation) for variation in URL_VARIATIONS]
+
+
+def sample_pages(urls, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES):
+    """Pick up to ``per_template`` representative pages of every (category, template) group.
+
+    Members of a group are spread evenly over its URLs in sorted order.
+    Groups are filled round by round, largest first, until ``max_pages``
+    are chosen, so every big template is covered before any gets a second
+    page. ``detect_url_language`` runs once per (origin, template) on its
+    first URL, which gives the category of all of its pages.
+    """
+    return _sample(_template_groups(urls), per_template, max_pages)
+
+
+def _template_groups(urls):
+    urls = pd.Series(pd.unique(pd.Series(urls, dtype=object).dropna()), dtype=object)
+    origins, templates = path_templates(urls)
+    pages = pd.DataFrame({"URL": urls, "Origin": origins, "Template": templates})
+    pages = pages.sort_values(["Origin", "Template", "URL"], ignore_index=True)
+    origin_group = pages.groupby(["Origin", "Template"], sort=False).ngroup().to_numpy()
+    first_urls = pages["URL"].to_numpy()[np.flatnonzero(np.diff(origin_group, prepend=-1))]
+    categories = np.asarray([detect_url_language(url)[1] or "Other" for url in first_urls.tolist()], dtype=object)
+    pages["Category"] = categories[origin_group] if len(pages) else pd.Series(dtype=object)
+    pages = pages.sort_values(["Category", "Template", "URL"], ignore_index=True)
+    group = pages.groupby(["Category", "Template"], sort=False).ngroup().to_numpy()
+    sizes = np.bincount(group) if len(group) else np.zeros(0, dtype=np.int64)
+    return pages, group, sizes
+
+
+def _sample(groups, per_template, max_pages):
+    pages, group, sizes = groups
+    columns = ["URL", "Template", "Category", "Language", "Template Pages"]
+    if pages.empty:
+        return pd.DataFrame(columns=columns)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    picks = []
+    for group_id, (start, size) in enumerate(zip(starts.tolist(), sizes.tolist())):
+        count = min(per_template, size)
+        offsets = np.unique(np.linspace(0, size - 1, count).round().astype(int))
+        for round_number, offset in enumerate(offsets.tolist()):
+            picks.append((round_number, -size, group_id, start + offset))
+    picks.sort()
+    rows = [row for _, _, _, row in picks[:max_pages]]
+
+    sample = pages.loc[rows, ["URL", "Template", "Category"]].reset_index(drop=True)
+    sample["Template Pages"] = sizes[group[rows]]
+    first_urls = pages["URL"].to_numpy()[starts[group[rows]]]
+    detected = {url: detect_url_language(url)[0] for url in pd.unique(first_urls).tolist()}
+    sample["Language"] = [detected[url] for url in first_urls.tolist()]
+    return sample[columns]
+
+
+def live_pages(df):
+    """Addresses of the crawl's HTML pages that returned 200 and are indexable."""
+    address = df["Address"].reset_index(drop=True)
+    return address[_live_mask(df)]
+
+
+class SchemaSampleStage:
+    """Representative live pages of the crawl and sitemap for schema detection.
+
+    Crawled pages count when they returned 200 and are indexable; only
+    their URL ids are kept per chunk. Sitemap URLs are added as listed,
+    from ``sitemap_urls`` or a batch of entries at a time through
+    ``update_sitemap``. A one-shot iterator of sitemap URLs is left to the
+    sitemap stage, which consumes it.
+    """
+
+    columns = SAMPLING_COLUMNS
+
+    def __init__(self, sitemap_urls=None, urls=None, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES):
+        self.sitemap_urls = sitemap_urls
+        self.urls = urls if urls is not None else UrlTable()
+        self.per_template = per_template
+        self.max_pages = max_pages
+        self._ids = []
+
+    def update(self, chunk, rows):
+        self._ids.append(rows.page_ids[_live_mask(chunk)])
+
+    def update_sitemap(self, entries, crawl):
+        ids = self.urls.intern([entry.loc for entry in entries])
+        ids = pd.unique(ids[ids >= 0])
+        listed = ~pd.Series(self.urls.urls(ids), dtype=object).str.contains(NON_PAGE_EXTENSION, case=False, regex=True, na=True).to_numpy()
+        self._ids.append(ids[listed])
+
+    def finish(self, crawl):
+        urls = self.urls
+        ids = list(self._ids)
+        sitemap_urls = self.sitemap_urls
+        if sitemap_urls is not None and not isinstance(sitemap_urls, Iterator):
+            sitemap_urls = pd.Series(list(sitemap_urls), dtype=object)
+            listed = ~sitemap_urls.str.contains(NON_PAGE_EXTENSION, case=False, regex=True, na=True).to_numpy()
+            ids.append(urls.intern(sitemap_urls[listed]))
+        ids = pd.unique(np.concatenate(ids)) if ids else np.zeros(0, dtype=np.int32)
+        ids = ids[ids >= 0]
+        if not len(ids):
+            return {"available": False}, {}
+
+        groups = _template_groups(urls.urls(ids))
+        sample = _sample(groups, self.per_template, self.max_pages)
+        summary = {
+            "available": True,
+            "candidates": len(ids),
+            "templates": len(groups[2]),
+            "pages": sample["URL"].tolist(),
+        }
+        return summary, {"schema_sample": sample}
+
+
+def sample_schema_pages(df, sitemap_urls=None, urls=None, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES):
+    """Schema sample of an in-memory crawl frame."""
+    return run_stage(SchemaSampleStage(sitemap_urls, urls, per_template, max_pages), df)
+
+
+def _live_mask(df):
+    address = df["Address"]
+    live = address.notna().to_numpy() & ~address.str.contains(NON_PAGE_EXTENSION, case=False, regex=True, na=False).to_numpy()
+    if "Status Code" in df.columns:
+        live &= (pd.to_numeric(df["Status Code"], errors="coerce") == 200).to_numpy()
+    if "Indexability" in df.columns:
+        live &= (df["Indexability"] == "Indexable").to_numpy()
+    return live
@@ -0,0 +1,126 @@
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import pairwise
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from modules.crawl_summary import (
+    CRAWL_COLUMNS,
+    CrawlSummaryAccumulator,
+    FrameStages,
+    collect_issue_details_chunked,
+    stage_columns,
+)
+from modules.instrumentation import count, timed
+
+logger = logging.getLogger(__name__)
+
+# Below this many rows per worker the pool start-up costs more than it saves,
+# so crawls of fewer than twice as many rows are summarized in one process.
+MIN_PARTITION_ROWS = 50_000
+
+
+@timed("report.summary_parallel")
+def summarize_crawl_parallel(df, workers=None, skip_empty_content=True, page_filter=None, inputs=None):
+    """Evaluate the per-row crawl checks over row-range partitions in a process pool.
+
+    Each partition is handed to its worker through a shared memory block
+    (Arrow IPC when pyarrow is installed, a pickle otherwise) and comes back
+    as a partial ``CrawlSummaryAccumulator``. Partials are merged in row
+    order, so duplicate groups that span partitions are counted exactly.
+    Returns the same ``(summary, detailed_data)`` pair as
+    ``summarize_crawl_chunked``.
+
+    Only this counting pass is partitioned. The issue detail pass and the
+    frame stages then run over the whole frame in this process: the
+    stages intern URLs into one ``UrlTable`` in row order and have no
+    merge step, and the detail pass is a small share of the work. The
+    stages take most of the time of an audit (about two thirds of a
+    200k-row synthetic crawl), which bounds the speed-up of the pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(df) // MIN_PARTITION_ROWS))
+    columns = [column for column in CRAWL_COLUMNS if column in df.columns]
+    columns += [column for column in stage_columns() if column in df.columns and column not in columns]
+    frame = df[columns]
+
+    accumulator = CrawlSummaryAccumulator(skip_empty_content=skip_empty_content)
+    if workers == 1:
+        accumulator.update(frame)
+    else:
+        # Partitions are counted in the workers, out of reach of the metrics
+        count("rows.crawl", len(frame))
+        bounds = np.linspace(0, len(frame), workers + 1, dtype=int)
+        blocks = []
+        try:
+            for start, stop in pairwise(bounds):
+                blocks.append(_to_shared_memory(frame.iloc[start:stop]))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                partials = executor.map(
+                    _summarize_partition,
+                    [
+                        (block.name, size, encoding, skip_empty_content)
+                        for block, size, encoding in blocks
+                    ],
+                )
+                for partial in partials:
+                    accumulator.merge(partial)
+        finally:
+            for block, _, _ in blocks:
+                block.close()
+                block.unlink()
+
+    summary = accumulator.finalize()
+    stages = FrameStages(inputs)
+    detailed_data = collect_issue_details_chunked([frame], accumulator, page_filter=page_filter, stages=stages)
+    stages.finish(summary, detailed_data)
+    return summary, detailed_data
+
+
+def _to_shared_memory(partition):
+    payload, encoding = _encode_partition(partition)
+    block = shared_memory.SharedMemory(create=True, size=max(len(payload), 1))
+    block.buf[: len(payload)] = payload
+    return block, len(payload), encoding
+
+
+def _encode_partition(partition):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(partition, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes(), "arrow"
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.debug(f"Falling back to pickle for partition: {e}")
+
+    return pickle.dumps(partition, protocol=pickle.HIGHEST_PROTOCOL), "pickle"
+
+
+def _summarize_partition(args):
+    name, size, encoding, skip_empty_content = args
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        if encoding == "arrow":
+            import pyarrow as pa
+
+            # Copy out of the block: to_pandas() may keep zero-copy views alive
+            reader = pa.ipc.open_stream(pa.py_buffer(bytes(block.buf[:size])))
+            partition = reader.read_all().to_pandas()
+        else:
+            partition = pickle.loads(bytes(block.buf[:size]))
+    finally:
+        block.close()
+
+    accumulator = CrawlSummaryAccumulator(skip_empty_content=skip_empty_content, max_entries=None)
+    accumulator.update(partition)
+    return accumulator
@@ -0,0 +1,232 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from functools import wraps
+from pathlib import Path
+from threading import Event, Lock, Thread, get_ident
+
+logger = logging.getLogger(__name__)
+
+# Profiles of the app and API are saved under this directory, one per run.
+PROFILE_DIR = os.environ.get("AUDIT_PROFILE_DIR", str(Path.home() / ".cache" / "web-audit" / "profiles"))
+
+# Seconds between stack samples, and allocation sites listed per profile.
+PROFILE_SAMPLE_INTERVAL = 0.005
+ALLOCATION_TOP_N = 50
+
+# Artifact name -> file written in a profile's directory.
+PROFILE_ARTIFACTS = {
+    "pstats": "profile.pstats",
+    "speedscope": "profile.speedscope.json",
+    "allocations": "allocations.txt",
+}
+
+# Only one run is profiled at a time: cProfile and tracemalloc are process-wide.
+_active = Lock()
+
+
+class StackSampler:
+    """Wall-clock sampling profiler of every thread of the process.
+
+    A background thread records the Python stack of each other thread
+    every ``interval`` seconds, so threads blocked on the network show up
+    next to the ones burning CPU. Stacks are stored as frame-table indexes
+    and exported in speedscope's sampled format, one profile per thread.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._frames = {}
+        self._stacks = {}
+        self._samples = {}
+        self._thread_names = {}
+        self._stop = Event()
+        self._thread = None
+        self._started = None
+        self._stopped = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._stopped = time.perf_counter()
+
+    def _run(self):
+        own = get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+                    index = self._frames.get(key)
+                    if index is None:
+                        index = self._frames[key] = len(self._frames)
+                    stack.append(index)
+                    frame = frame.f_back
+                stack = tuple(reversed(stack))
+                stack_id = self._stacks.setdefault(stack, len(self._stacks))
+                self._samples.setdefault(ident, []).append(stack_id)
+                self._thread_names.setdefault(ident, names.get(ident, str(ident)))
+
+    def to_speedscope(self, name):
+        """The samples as a speedscope file (https://www.speedscope.app/file-format-schema.json)."""
+        stacks = [None] * len(self._stacks)
+        for stack, stack_id in self._stacks.items():
+            stacks[stack_id] = list(stack)
+        frames = [None] * len(self._frames)
+        for (function, filename, line), index in self._frames.items():
+            frames[index] = {"name": function, "file": filename, "line": line}
+        duration = (self._stopped or time.perf_counter()) - self._started
+        profiles = []
+        for ident, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names[ident],
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": duration,
+                "samples": [stacks[stack_id] for stack_id in samples],
+                "weights": [self.interval] * len(samples),
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "web-audit",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class AuditProfiler:
+    """Opt-in profile of one audit run, saved as downloadable artifacts.
+
+    While active it runs a deterministic ``cProfile`` of the calling
+    thread and of functions wrapped with ``profiled`` in any other thread
+    (saved together as pstats), a ``StackSampler`` of all threads (saved
+    as speedscope JSON, for flamegraphs) and ``tracemalloc`` (the top
+    ``top_n`` allocation sites and the peak, as text). Work done in child
+    processes, such as the schema parse pool, is not captured. Artifacts
+    go to ``directory``, by default a new folder under ``PROFILE_DIR``
+    named by ``profile_id``; when it cannot be written the run goes on
+    without them. Raises RuntimeError on start when another run is already
+    being profiled.
+    """
+
+    def __init__(self, name, directory=None, interval=PROFILE_SAMPLE_INTERVAL, top_n=ALLOCATION_TOP_N):
+        self.name = name
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.directory = Path(directory) if directory else Path(PROFILE_DIR) / self.profile_id
+        self.top_n = top_n
+        self.artifacts = {}
+        self._sampler = StackSampler(interval)
+        self._profile = None
+        self._thread_profiles = []
+        self._thread_profiles_lock = Lock()
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if not _active.acquire(blocking=False):
+            raise RuntimeError("Another audit run is already being profiled")
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            logger.warning(f"Deterministic profile disabled, another profiler is active: {e}")
+            self._profile = None
+        self._sampler.start()
+
+    def profiled(self, function):
+        """``function`` wrapped to be profiled in whichever thread calls it, e.g. an executor worker.
+
+        cProfile only sees the thread that enabled it, so each call gets a
+        profile of its own, merged into the pstats artifact on ``stop``.
+        """
+        @wraps(function)
+        def call(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                logger.warning(f"Deterministic profile of {threading.current_thread().name} disabled, another profiler is active: {e}")
+                return function(*args, **kwargs)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._thread_profiles_lock:
+                    self._thread_profiles.append(profile)
+        return call
+
+    def stop(self):
+        """Stop profiling and write the artifacts; returns ``{artifact: path}``, empty when they could not be written."""
+        try:
+            if self._profile is not None:
+                self._profile.disable()
+            self._sampler.stop()
+            # The profiler's own bookkeeping is left out of the allocation sites
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+            current, peak = tracemalloc.get_traced_memory()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        finally:
+            _active.release()
+
+        profiles = [self._profile, *self._thread_profiles] if self._profile is not None else self._thread_profiles
+        artifacts = {name: self.directory / filename for name, filename in PROFILE_ARTIFACTS.items()}
+        try:
+            # e.g. a read-only home directory on a serverless host
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if profiles:
+                pstats.Stats(*profiles).dump_stats(artifacts["pstats"])
+            else:
+                del artifacts["pstats"]
+            artifacts["speedscope"].write_text(json.dumps(self._sampler.to_speedscope(self.name)), encoding="utf-8")
+            artifacts["allocations"].write_text(format_allocations(snapshot, current, peak, self.top_n), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Profile {self.profile_id} not saved, cannot write to {self.directory}: {e}")
+            return self.artifacts
+        self.artifacts = artifacts
+        logger.info(f"Saved profile {self.profile_id} to {self.directory}")
+        return self.artifacts
+
+
+def format_allocations(snapshot, current, peak, top_n=ALLOCATION_TOP_N):
+    lines = [f"Traced memory: {current / 2**20:.1f} MB current, {peak / 2**20:.1f} MB peak", ""]
+    lines.append(f"Top {top_n} allocation sites still held at the end of the run:")
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        lines.append(str(stat))
+    return "\n".join(lines) + "\n"
+
+
+def profile_artifact(profile_id, artifact):
+    """Path of a saved artifact of ``profile_id`` under ``PROFILE_DIR``, None if there is none."""
+    if artifact not in PROFILE_ARTIFACTS or not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+        return None
+    path = Path(PROFILE_DIR) / profile_id / PROFILE_ARTIFACTS[artifact]
+    return path if path.is_file() else None
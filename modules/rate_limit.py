@@ -0,0 +1,177 @@
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from threading import Condition, Lock
+from urllib.parse import urlsplit
+
+import requests
+
+from modules.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Requests per second a host starts at, and the bounds the controller moves it in.
+INITIAL_RATE = 4.0
+MIN_RATE = 0.25
+MAX_RATE = 20.0
+
+# Concurrent requests per host, adapted the same way.
+INITIAL_CONCURRENCY = 2.0
+MAX_CONCURRENCY = 16.0
+
+# Responses faster than this grow the rate and concurrency.
+FAST_RESPONSE_SECONDS = 1.0
+
+# Status codes that mean "slow down".
+THROTTLE_STATUS = {429, 503}
+
+# Pause after a throttle response without Retry-After, and the cap on Retry-After.
+DEFAULT_BACKOFF_SECONDS = 2.0
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+# Throttled requests are retried this many times before the response is returned.
+MAX_RETRIES = 3
+
+
+class HostLimiter:
+    """Token bucket plus AIMD concurrency window for one host.
+
+    ``acquire`` blocks until a request may start: fewer than
+    ``concurrency`` requests in flight, a token in the bucket (refilled at
+    ``rate`` per second) and no Retry-After pause pending. ``release``
+    feeds the outcome back: until the host first pushes back every fast
+    success adds 1 to both (slow start, doubling per round trip); after
+    that fast successes add ``1/concurrency`` and ``1/rate`` (about +1 per
+    round trip). Throttling or connection failures halve both and pause
+    the host.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, concurrency=INITIAL_CONCURRENCY):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.tokens = 1.0
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.slow_start = True
+        self._cooldown_until = 0.0
+        self._refilled_at = time.monotonic()
+        self._condition = Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.in_flight >= int(self.concurrency):
+                    self._condition.wait()
+                    continue
+                wait = max(self.blocked_until - now, (1.0 - self.tokens) / self.rate)
+                if wait <= 0:
+                    self.tokens -= 1.0
+                    self.in_flight += 1
+                    return
+                self._condition.wait(wait)
+
+    def release(self, status_code=None, elapsed=0.0, retry_after=None):
+        """Record a finished request; ``status_code`` None means it failed without a response."""
+        with self._condition:
+            self.in_flight -= 1
+            if status_code is None or status_code in THROTTLE_STATUS:
+                self.throttled += 1
+                self.slow_start = False
+                now = time.monotonic()
+                # Requests that were already in flight report the same
+                # congestion; only the first of them shrinks the window
+                if now >= self._cooldown_until:
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self.rate = max(MIN_RATE, self.rate / 2)
+                pause = DEFAULT_BACKOFF_SECONDS
+                if status_code is not None:
+                    pause = min(retry_after if retry_after is not None else DEFAULT_BACKOFF_SECONDS, MAX_RETRY_AFTER_SECONDS)
+                    self.blocked_until = max(self.blocked_until, now + pause)
+                self._cooldown_until = max(self._cooldown_until, now + pause)
+            elif elapsed < FAST_RESPONSE_SECONDS:
+                if self.slow_start:
+                    self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1.0)
+                    self.rate = min(MAX_RATE, self.rate + 1.0)
+                else:
+                    self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1.0 / self.concurrency)
+                    self.rate = min(MAX_RATE, self.rate + 1.0 / self.rate)
+            self._condition.notify_all()
+
+    def _refill(self, now):
+        # Bucket depth follows the concurrency window, so bursts stay bounded
+        self.tokens = min(max(1.0, self.concurrency), self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+
+_host_limiters = {}
+_host_limiters_lock = Lock()
+
+
+def host_limiter(url):
+    """Shared limiter of ``url``'s host."""
+    host = urlsplit(url).netloc.lower()
+    with _host_limiters_lock:
+        if host not in _host_limiters:
+            _host_limiters[host] = HostLimiter()
+        return _host_limiters[host]
+
+
+# Requests made without a session of their own go through this one when it is set.
+_shared_session = None
+
+
+def pooled_session(hosts=10, per_host=int(MAX_CONCURRENCY)):
+    """``requests.Session`` keeping up to ``per_host`` keep-alive connections open to each of ``hosts`` hosts."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=hosts, pool_maxsize=per_host)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def set_shared_session(session):
+    """Send every request made without a session through ``session`` (None opens a connection per request)."""
+    global _shared_session
+    _shared_session = session
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), None if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def polite_get(url, session=None, max_retries=MAX_RETRIES, **kwargs):
+    """``requests.get`` paced by the host's limiter, retrying 429/503 after their Retry-After."""
+    limiter = host_limiter(url)
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = (session or _shared_session or requests).get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            limiter.release(None)
+            raise
+        elapsed = time.monotonic() - start
+        metrics.add_timing("http.request", elapsed)
+        metrics.count("http.requests")
+        metrics.count("http.bytes", len(response.content))
+        retry_after = None
+        if response.status_code in THROTTLE_STATUS:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        limiter.release(response.status_code, elapsed, retry_after)
+
+        if response.status_code not in THROTTLE_STATUS or attempt == max_retries:
+            return response
+        logger.info(f"{url} throttled with {response.status_code}, retry {attempt + 1} of {max_retries}")
+    return response
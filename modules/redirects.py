@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from modules.chains import resolve_chains
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+REDIRECT_COLUMNS = ["Address", "Status Code", "Redirect URL", "Redirect Type"]
+
+
+class RedirectStage:
+    """Follows every redirecting page through the crawl to its final destination.
+
+    ``update`` keeps only the redirecting rows of each chunk, with their
+    ``Redirect URL`` interned into ``urls``; ``finish`` joins the targets
+    back onto crawl rows on URL ids and resolves chains and loops in a
+    single linear walk.
+    """
+
+    columns = REDIRECT_COLUMNS
+
+    def __init__(self, urls=None):
+        self.urls = urls if urls is not None else UrlTable()
+        self.available = False
+        self._rows = []
+        self._target_ids = []
+        self._types = []
+
+    def update(self, chunk, rows):
+        if "Redirect URL" not in chunk.columns:
+            return
+        self.available = True
+        redirect_url = chunk["Redirect URL"]
+        is_redirect = ((rows.status >= 300) & (rows.status < 400)) & redirect_url.notna().to_numpy()
+        local = np.flatnonzero(is_redirect)
+        self._rows.append(rows.offset + local)
+        self._target_ids.append(self.urls.intern(redirect_url.iloc[local]))
+        if "Redirect Type" in chunk.columns:
+            self._types.append(chunk["Redirect Type"].to_numpy(dtype=object)[local])
+
+    def trace(self, crawl):
+        """One row per redirecting page with its final URL, final status code, chain length and loop flag."""
+        n = len(crawl)
+        rows = np.concatenate(self._rows) if self._rows else np.zeros(0, dtype=np.int64)
+        target_ids = np.concatenate(self._target_ids) if self._target_ids else np.zeros(0, dtype=np.int32)
+        is_redirect = np.zeros(n, dtype=bool)
+        is_redirect[rows] = True
+        target_by_row = np.full(n, -1, dtype=np.int64)
+        target_by_row[rows] = target_ids
+
+        first_row = crawl.rows_by_id()
+        next_row = np.full(n, -1, dtype=np.int64)
+        next_row[rows] = np.where(target_ids >= 0, first_row[np.maximum(target_ids, 0)], -1)
+        final_row, hops, in_loop = resolve_chains(next_row)
+
+        final = np.where(in_loop[rows], 0, final_row[rows])
+        # A chain whose last hop leaves the crawl ends on a redirect we can't follow
+        unresolved = is_redirect[final] & ~in_loop[rows]
+        chain_length = hops[rows] + unresolved.astype(np.int64)
+
+        final_url = crawl.addresses(final)
+        final_url[unresolved] = self.urls.urls(target_by_row[final[unresolved]])
+        final_status = np.where(unresolved | in_loop[rows], np.nan, crawl.status[final].astype(np.float64))
+
+        traced = pd.DataFrame({
+            "Address": crawl.addresses(rows),
+            "Status Code": crawl.status_codes(rows),
+            "Redirect URL": self.urls.urls(target_ids),
+            "Final URL": np.where(in_loop[rows], None, final_url),
+            "Final Status Code": final_status,
+            "Redirect Chain Length": chain_length,
+            "Redirect Loop": in_loop[rows],
+        })
+        if self._types:
+            traced.insert(3, "Redirect Type", np.concatenate(self._types))
+        return traced
+
+    def finish(self, crawl):
+        """Redirect counts and chain-length histogram for the report plus detail tables."""
+        if not self.available:
+            return {"available": False}, {}
+
+        traced = self.trace(crawl)
+        loops = traced[traced["Redirect Loop"]]
+        to_errors = traced[traced["Final Status Code"] >= 400]
+        chains = traced[~traced["Redirect Loop"] & (traced["Redirect Chain Length"] > 1)]
+
+        lengths = traced.loc[~traced["Redirect Loop"], "Redirect Chain Length"].to_numpy()
+        histogram = np.bincount(lengths) if len(lengths) else np.zeros(1, dtype=np.int64)
+        histogram_data = pd.DataFrame({
+            "Redirect Chain Length": np.arange(len(histogram)),
+            "Redirects": histogram,
+        })
+        histogram_data = histogram_data[histogram_data["Redirects"] > 0]
+
+        summary = {
+            "available": True,
+            "redirects": len(traced),
+            "chains": len(chains),
+            "longest_chain": int(lengths.max()) if len(lengths) else 0,
+            "loops": len(loops),
+            "to_errors": len(to_errors),
+            "histogram": dict(zip(histogram_data["Redirect Chain Length"].tolist(), histogram_data["Redirects"].tolist())),
+            "worst_offender": None,
+        }
+
+        # Worst offenders first
+        worst = chains.sort_values("Redirect Chain Length", ascending=False, kind="stable")
+        if not worst.empty:
+            summary["worst_offender"] = worst["Address"].iloc[0]
+        detailed_data = {
+            "redirect_chains": worst if not worst.empty else None,
+            "redirect_loops": loops if not loops.empty else None,
+            "redirects_to_errors": to_errors if not to_errors.empty else None,
+            "redirect_chain_lengths": histogram_data if not histogram_data.empty else None,
+        }
+        return summary, detailed_data
+
+
+def analyze_redirects(df, urls=None):
+    """Redirect counts and detail tables of an in-memory crawl frame."""
+    return run_stage(RedirectStage(urls), df)
+
+
+def format_redirect_histogram(histogram):
+    if not histogram:
+        return "no redirects"
+    return ", ".join(f"{length} hop{'s' if length != 1 else ''}: {count}" for length, count in histogram.items())
+
+
+def format_redirect_chains(summary):
+    value = f"{summary['chains']} of {summary['redirects']} redirects chained ({format_redirect_histogram(summary['histogram'])})"
+    if summary["worst_offender"]:
+        value += f"; longest: {summary['longest_chain']} hops from {summary['worst_offender']}"
+    return value
@@ -0,0 +1,662 @@
+import pandas as pd
+import re
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+import logging
+from urllib3.exceptions import InsecureRequestWarning
+from modules.canonical import format_canonical_summary
+from modules.headings import format_heading_structure
+from modules.hreflang import format_hreflang_summary
+from modules.instrumentation import count, timed
+from modules.link_graph import format_information_architecture
+from modules.page_sampling import variation_urls
+from modules.redirects import format_redirect_chains
+from modules.robots import format_robots_summary
+from modules.schema_inventory import format_schema_inventory_summary
+from modules.schema_markup import extract_schema_types
+from modules.sitemap_coverage import format_sitemap_coverage
+from modules.sitemap_lastmod import format_lastmod_summary
+from modules.sitemaps import parse_sitemap_entries
+from modules.url_language import detect_url_language
+
+# Disable SSL warnings
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+logger = logging.getLogger(__name__)
+
+def is_valid_page_url(url):
+    if re.search(r'\.(jpg|jpeg|png|gif|bmp|pdf|doc|docx|xls|xlsx|css|js)$', url, re.IGNORECASE):
+        return False
+    if "wp-content" in url.lower() or "wp-uploads" in url.lower():
+        return False
+    return True
+
+def get_domain_from_df(df):
+    if df is not None and len(df) > 0 and "Address" in df.columns:
+        first_url = df["Address"].iloc[0]
+        if "://" in first_url:
+            return first_url.split("/")[2]
+        else:
+            return first_url.split("/")[0]
+    return None
+
+def filter_pages(df, include_query_params=False, custom_exclusions=None):
+    original_count = len(df)
+    
+    default_exclusions = {
+        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+        '.zip', '.rar', '.tar', '.gz', '.7z',
+        '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp',
+        '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm', '.mp3', '.wav', '.ogg',
+        '.css', '.js', '.xml', '.json', '.txt', '.csv',
+        '.woff', '.woff2', '.ttf', '.eot', '.otf'
+    }
+    
+    if custom_exclusions:
+        default_exclusions.update(custom_exclusions)
+    
+    filtered_df = df.copy()
+    
+    filter_stats = {
+        'original_count': original_count,
+        'excluded_extensions': 0,
+        'excluded_query_params': 0,
+        'excluded_fragments': 0,
+        'final_count': 0
+    }
+    
+    extension_mask = filtered_df['Address'].str.lower().str.contains(
+        '|'.join([f'\\{ext}' for ext in default_exclusions]), 
+        regex=True, 
+        na=False
+    )
+    excluded_by_extension = filtered_df[extension_mask]
+    filter_stats['excluded_extensions'] = len(excluded_by_extension)
+    filtered_df = filtered_df[~extension_mask]
+
+    if not include_query_params:
+        query_mask = filtered_df['Address'].str.contains(r'\?', regex=True, na=False)
+        excluded_by_query = filtered_df[query_mask]
+        filter_stats['excluded_query_params'] = len(excluded_by_query)
+        filtered_df = filtered_df[~query_mask]
+    
+    fragment_mask = filtered_df['Address'].str.contains(r'#', regex=True, na=False)
+    excluded_by_fragment = filtered_df[fragment_mask]
+    filter_stats['excluded_fragments'] = len(excluded_by_fragment)
+    filtered_df = filtered_df[~fragment_mask]
+    
+    api_mask = filtered_df['Address'].str.contains(r'/api/|/ajax/|/json/|\.json|\.xml', regex=True, na=False)
+    excluded_by_api = filtered_df[api_mask]
+    filter_stats['excluded_api'] = len(excluded_by_api)
+    filtered_df = filtered_df[~api_mask]
+    
+    admin_mask = filtered_df['Address'].str.contains(r'/admin/|/wp-admin/|/administrator/|/backend/', regex=True, na=False)
+    excluded_by_admin = filtered_df[admin_mask]
+    filter_stats['excluded_admin'] = len(excluded_by_admin)
+    filtered_df = filtered_df[~admin_mask]
+    
+    filter_stats['final_count'] = len(filtered_df)
+    
+    return filtered_df, filter_stats
+
+def check_schema_markup(domain, max_workers=10, timeout=8, page_urls=None, session=None):
+    """Schema types found on ``page_urls``, by default the common page variations of ``domain``.
+
+    Returns the set of types and the list of URLs that could not be fetched or parsed.
+    """
+    all_schemas = set()
+    failed_urls = []
+    if page_urls is None:
+        page_urls = variation_urls(domain)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(executor.submit(extract_schema_types, url, timeout, session), url) for url in page_urls]
+        for future, url in futures:
+            try:
+                # Requests carry their own timeout; time spent queued behind the host limiter does not count
+                schema_names = future.result()
+            except Exception as e:
+                count("schema.fetch_errors")
+                logger.warning(f"Schema check of {url} failed: {e}")
+                schema_names = None
+            if schema_names is None:
+                failed_urls.append(url)
+            else:
+                all_schemas.update(schema_names)
+
+    return all_schemas, failed_urls
+
+@timed("report.schema_markup")
+def update_schema_markup_analysis(domain, report, expected_outcomes, sources, sample=None, inventory=None, progress=None, session=None):
+    if domain:
+        try:
+            failed_urls = []
+            if inventory and inventory["available"]:
+                found_schemas = set(inventory["types_found"])
+            else:
+                if progress is not None:
+                    progress(f"Checking schema markup for {domain}... (this may take a moment)")
+                found_schemas, failed_urls = check_schema_markup(
+                    domain, page_urls=sample["pages"] if sample and sample["available"] else None, session=session
+                )
+            
+            if found_schemas:
+                schema_list = sorted(list(found_schemas))
+                current_value = f"Found {len(schema_list)} types: {', '.join(schema_list)}"
+
+                if len(schema_list) >= 5:
+                    status = "✅ Pass"
+                elif len(schema_list) >= 2:
+                    status = "ℹ️ Review"
+                else:
+                    status = "❌ Fail"
+            else:
+                current_value = "No schema markup detected"
+                status = "❌ Fail"
+            if failed_urls:
+                pages = "page" if len(failed_urls) == 1 else "pages"
+                current_value += f" ({len(failed_urls)} {pages} could not be fetched)"
+                
+        except Exception as e:
+            current_value = f"Error checking schemas: {str(e)}"
+            status = "ℹ️ Not Available"
+            logger.warning(f"Schema analysis of {domain} failed: {e}")
+    else:
+        current_value = "Cannot extract domain from data"
+        status = "ℹ️ Not Available"
+    
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Schema Markup")
+    report["Current Value"].append(current_value)
+    report["Expected Value"].append(expected_outcomes["Schema Markup"])
+    report["Source"].append(sources["Schema Markup"])
+    report["Status"].append(status)
+
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Schema coverage by template")
+    report["Expected Value"].append(expected_outcomes["Schema coverage by template"])
+    report["Source"].append(sources["Schema coverage by template"])
+    if inventory and inventory["available"]:
+        report["Current Value"].append(format_schema_inventory_summary(inventory))
+        if inventory["with_schema"] == 0:
+            report["Status"].append("❌ Fail")
+        elif inventory["gap_pages"] > 0:
+            report["Status"].append("ℹ️ Review")
+        else:
+            report["Status"].append("✅ Pass")
+    else:
+        report["Current Value"].append("N/A")
+        report["Status"].append("ℹ️ Not Available")
+    
+@timed("report.build")
+def build_seo_report(summary, alt_tag_df=None, orphan_pages_df=None, sitemap_success=None, robots_success=None, progress=None, session=None):
+    expected_outcomes = {
+        "Website performance on desktop": "Score > 90",
+        "Website performance on mobile": "Score > 80",
+        "Core Web Vitals on desktop": "Pass",
+        "Core Web Vitals on mobile": "Pass",
+        "Accessibility Score": "Score > 90",
+        "SEO Score": "Score > 90",
+        "Mobile friendliness": "Pass",
+        "Indexed pages": "All active pages are indexed",
+        "Non indexed pages": "No active pages are in no index state.\nMinimal or no indexed pages",
+        "Robots.txt file optimization": "Optimized",
+        "Sitemap file optimization": "All active website URLs are part of sitemap",
+        "Sitemap lastmod": "Accurate lastmod on every sitemap URL",
+        "Hreflang annotations": "Reciprocal hreflang clusters with x-default",
+        "Broken internal links (404)": "0 broken links",
+        "Redirect chains": "No redirect chains",
+        "Redirect loops": "No redirect loops",
+        "Redirects to 4xx/5xx": "No redirects to error pages",
+        "Broken external links": "0 broken links",
+        "Broken backlinks": "0 broken backlinks",
+        "Broken Images": "0 broken Images",
+        "Orphan page": "No orphan page",
+        "Canonical Errors": "No page with canonical error",
+        "Information architecture": "Site structure & navigation is well defined & easy to understand",
+        "Header tags structure": "Content structure is well-defined and easy to understand",
+        "Backlinks": "No of backlinks",
+        "Domain authority": "DA >70",
+        "Spam Score": "Score <5",
+        "Duplicate content": "Minimal or no pages with issues",
+        "Img alt tag": "Minimal or no pages with issues",
+        "Duplicate & missing H1": "Minimal or no pages with issues",
+        "Duplicate & missing meta title": "Minimal or no pages with issues",
+        "Duplicate & missing description": "Minimal or no pages with issues",
+        "Schema Markup": "Schema implementation opportunities",
+        "Schema coverage by template": "Every page carries the schema types of its template",
+    }
+
+    sources = {
+        "Website performance on desktop": "Pagespeedinsights",
+        "Website performance on mobile": "Pagespeedinsights",
+        "Core Web Vitals on desktop": "Pagespeedinsights",
+        "Core Web Vitals on mobile": "Pagespeedinsights",
+        "Accessibility Score": "Pagespeedinsights",
+        "SEO Score": "Pagespeedinsights",
+        "Mobile friendliness": "Manual",
+        "Indexed pages": "Google search console",
+        "Non indexed pages": "Google search console",
+        "Robots.txt file optimization": "Manual",
+        "Sitemap file optimization": "Manual",
+        "Sitemap lastmod": "Manual",
+        "Hreflang annotations": "Manual",
+        "Broken internal links (404)": "Screaming frog",
+        "Redirect chains": "Screaming frog",
+        "Redirect loops": "Screaming frog",
+        "Redirects to 4xx/5xx": "Screaming frog",
+        "Broken external links": "Ahrefs",
+        "Broken backlinks": "Ahrefs",
+        "Broken Images": "Manual",
+        "Orphan page": "Screaming frog",
+        "Canonical Errors": "Screaming frog",
+        "Information architecture": "Screaming frog",
+        "Header tags structure": "Screaming frog",
+        "Backlinks": "Ahrefs",
+        "Domain authority": "Moz",
+        "Spam Score": "Moz",
+        "Duplicate content": "Screaming frog",
+        "Img alt tag": "Screaming frog",
+        "Duplicate & missing H1": "Screaming frog",
+        "Duplicate & missing meta title": "Screaming frog",
+        "Duplicate & missing description": "Screaming frog",
+        "Schema Markup": "Automated Schema Detection",
+        "Schema coverage by template": "Automated Schema Detection"
+    }
+
+    report = {
+        "Category": [],
+        "Parameters": [],
+        "Current Value": [],
+        "Expected Value": [],
+        "Source": [],
+        "Status": [],
+    }
+
+    performance_metrics = [
+        "Website performance on desktop",
+        "Website performance on mobile",
+        "Core Web Vitals on desktop",
+        "Core Web Vitals on mobile",
+        "Accessibility Score",
+        "SEO Score",
+        "Mobile friendliness",
+    ]
+
+    for metric in performance_metrics:
+        report["Category"].append("Performance & Core Web Vitals")
+        report["Parameters"].append(metric)
+        report["Current Value"].append("N/A")
+        report["Expected Value"].append(expected_outcomes[metric])
+        report["Source"].append(sources[metric])
+        report["Status"].append("ℹ️ Not Available")
+
+    if summary["has_indexability"]:
+        indexed_pages = summary["indexed_pages"]
+        report["Category"].append("Crawling & Indexing")
+        report["Parameters"].append("Indexed pages")
+        report["Current Value"].append(indexed_pages)
+        report["Expected Value"].append(expected_outcomes["Indexed pages"])
+        report["Source"].append(sources["Indexed pages"])
+        report["Status"].append("ℹ️ Review")
+
+        non_indexed_pages = summary["non_indexed_pages"]
+        report["Category"].append("Crawling & Indexing")
+        report["Parameters"].append("Non indexed pages")
+        report["Current Value"].append(non_indexed_pages)
+        report["Expected Value"].append(expected_outcomes["Non indexed pages"])
+        report["Source"].append(sources["Non indexed pages"])
+        report["Status"].append("ℹ️ Review" if non_indexed_pages > 0 else "✅ Pass")
+    else:
+        report["Category"].append("Crawling & Indexing")
+        report["Parameters"].append("Indexed pages")
+        report["Current Value"].append("N/A")
+        report["Expected Value"].append(expected_outcomes["Indexed pages"])
+        report["Source"].append(sources["Indexed pages"])
+        report["Status"].append("ℹ️ Not Available")
+
+        report["Category"].append("Crawling & Indexing")
+        report["Parameters"].append("Non indexed pages")
+        report["Current Value"].append("N/A")
+        report["Expected Value"].append(expected_outcomes["Non indexed pages"])
+        report["Source"].append(sources["Non indexed pages"])
+        report["Status"].append("ℹ️ Not Available")
+
+    robots = summary["robots"]
+    report["Category"].append("Crawling & Indexing")
+    report["Parameters"].append("Robots.txt file optimization")
+    report["Expected Value"].append(expected_outcomes["Robots.txt file optimization"])
+    report["Source"].append(sources["Robots.txt file optimization"])
+    if robots["available"]:
+        report["Current Value"].append(format_robots_summary(robots, summary["sitemap"]))
+        disallowed = summary["sitemap"].get("disallowed", 0)
+        report["Status"].append("❌ Fail" if robots["blocked_indexable"] + disallowed > 0 else "✅ Pass")
+    else:
+        report["Current Value"].append("Available" if robots_success else "N/A")
+        report["Status"].append("✅ Pass" if robots_success else "ℹ️ Not Available")
+
+    sitemap = summary["sitemap"]
+    report["Category"].append("Crawling & Indexing")
+    report["Parameters"].append("Sitemap file optimization")
+    report["Expected Value"].append(expected_outcomes["Sitemap file optimization"])
+    report["Source"].append(sources["Sitemap file optimization"])
+    if sitemap["available"]:
+        report["Current Value"].append(format_sitemap_coverage(sitemap))
+        sitemap_issues = sitemap["errors"] + sitemap["redirects"] + sitemap["non_canonical"] + sitemap["noindex"] + sitemap["not_crawled"]
+        if sitemap["indexable_not_in_sitemap"] > 0:
+            report["Status"].append("❌ Fail")
+        elif sitemap_issues > 0:
+            report["Status"].append("ℹ️ Review")
+        else:
+            report["Status"].append("✅ Pass")
+    else:
+        report["Current Value"].append("Available" if sitemap_success else "N/A")
+        report["Status"].append("✅ Pass" if sitemap_success else "ℹ️ Not Available")
+
+    lastmod = summary["lastmod"]
+    report["Category"].append("Crawling & Indexing")
+    report["Parameters"].append("Sitemap lastmod")
+    report["Expected Value"].append(expected_outcomes["Sitemap lastmod"])
+    report["Source"].append(sources["Sitemap lastmod"])
+    if lastmod["available"]:
+        report["Current Value"].append(format_lastmod_summary(lastmod))
+        if lastmod["missing_lastmod"] + lastmod["future_lastmod"] > 0 or lastmod["uniform_lastmod"]:
+            report["Status"].append("ℹ️ Review")
+        else:
+            report["Status"].append("✅ Pass")
+    else:
+        report["Current Value"].append("N/A")
+        report["Status"].append("ℹ️ Not Available")
+
+    hreflang = summary["hreflang"]
+    report["Category"].append("Crawling & Indexing")
+    report["Parameters"].append("Hreflang annotations")
+    report["Expected Value"].append(expected_outcomes["Hreflang annotations"])
+    report["Source"].append(sources["Hreflang annotations"])
+    if hreflang["available"]:
+        report["Current Value"].append(format_hreflang_summary(hreflang))
+        if hreflang["broken_clusters"] > 0:
+            report["Status"].append("❌ Fail")
+        elif hreflang["missing_x_default"] + hreflang["missing_self"] > 0:
+            report["Status"].append("ℹ️ Review")
+        else:
+            report["Status"].append("✅ Pass")
+    else:
+        report["Current Value"].append("N/A")
+        report["Status"].append("ℹ️ Not Available")
+
+    # Site Health & Structure
+    links = summary["links"]
+    broken_internal_links = summary["broken_internal_links"]
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Broken internal links (404)")
+    if links["available"]:
+        report["Current Value"].append(
+            f"{broken_internal_links} broken pages, {links['broken_links']} links from {links['broken_link_sources']} source pages"
+        )
+        broken_internal_links += links["broken_links"]
+    else:
+        report["Current Value"].append(broken_internal_links)
+    report["Expected Value"].append(expected_outcomes["Broken internal links (404)"])
+    report["Source"].append(sources["Broken internal links (404)"])
+    report["Status"].append("❌ Fail" if broken_internal_links > 0 else "✅ Pass")
+
+    redirects = summary["redirects"]
+    if redirects["available"]:
+        report["Category"].append("Site Health & Structure")
+        report["Parameters"].append("Redirect chains")
+        report["Current Value"].append(format_redirect_chains(redirects))
+        report["Expected Value"].append(expected_outcomes["Redirect chains"])
+        report["Source"].append(sources["Redirect chains"])
+        report["Status"].append("ℹ️ Review" if redirects["chains"] > 0 else "✅ Pass")
+
+        report["Category"].append("Site Health & Structure")
+        report["Parameters"].append("Redirect loops")
+        report["Current Value"].append(redirects["loops"])
+        report["Expected Value"].append(expected_outcomes["Redirect loops"])
+        report["Source"].append(sources["Redirect loops"])
+        report["Status"].append("❌ Fail" if redirects["loops"] > 0 else "✅ Pass")
+
+        report["Category"].append("Site Health & Structure")
+        report["Parameters"].append("Redirects to 4xx/5xx")
+        report["Current Value"].append(redirects["to_errors"])
+        report["Expected Value"].append(expected_outcomes["Redirects to 4xx/5xx"])
+        report["Source"].append(sources["Redirects to 4xx/5xx"])
+        report["Status"].append("❌ Fail" if redirects["to_errors"] > 0 else "✅ Pass")
+    else:
+        for param in ["Redirect chains", "Redirect loops", "Redirects to 4xx/5xx"]:
+            report["Category"].append("Site Health & Structure")
+            report["Parameters"].append(param)
+            report["Current Value"].append("N/A")
+            report["Expected Value"].append(expected_outcomes[param])
+            report["Source"].append(sources[param])
+            report["Status"].append("ℹ️ Not Available")
+
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Broken external links")
+    report["Current Value"].append("N/A")
+    report["Expected Value"].append(expected_outcomes["Broken external links"])
+    report["Source"].append(sources["Broken external links"])
+    report["Status"].append("ℹ️ Not Available")
+
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Broken backlinks")
+    report["Current Value"].append("N/A")
+    report["Expected Value"].append(expected_outcomes["Broken backlinks"])
+    report["Source"].append(sources["Broken backlinks"])
+    report["Status"].append("ℹ️ Not Available")
+
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Broken Images")
+    report["Current Value"].append("N/A")
+    report["Expected Value"].append(expected_outcomes["Broken Images"])
+    report["Source"].append(sources["Broken Images"])
+    report["Status"].append("ℹ️ Not Available")
+
+    orphan_pages_count = 0
+    if links["available"]:
+        orphan_pages_count = links["orphans"]
+    elif summary["orphans"]["available"]:
+        orphan_pages_count = summary["orphans"]["orphans"]
+    elif orphan_pages_df is not None and not orphan_pages_df.empty:
+        orphan_pages_count = len(orphan_pages_df)
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Orphan page")
+    report["Current Value"].append(orphan_pages_count)
+    report["Expected Value"].append(expected_outcomes["Orphan page"])
+    report["Source"].append(sources["Orphan page"])
+    report["Status"].append("❌ Fail" if orphan_pages_count > 0 else "✅ Pass")
+
+    canonical = summary["canonical"]
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Canonical Errors")
+    report["Current Value"].append(format_canonical_summary(canonical))
+    report["Expected Value"].append(expected_outcomes["Canonical Errors"])
+    report["Source"].append(sources["Canonical Errors"])
+    if canonical["errors"] > 0:
+        report["Status"].append("❌ Fail")
+    elif canonical["missing"] > 0:
+        report["Status"].append("ℹ️ Review")
+    else:
+        report["Status"].append("✅ Pass")
+
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Information architecture")
+    report["Expected Value"].append(expected_outcomes["Information architecture"])
+    report["Source"].append(sources["Information architecture"])
+    if links["available"]:
+        report["Current Value"].append(format_information_architecture(links))
+        report["Status"].append("✅ Pass" if links["within_depth_pct"] >= 90 else "ℹ️ Review")
+    else:
+        report["Current Value"].append("N/A")
+        report["Status"].append("ℹ️ Not Available")
+
+    headings = summary["headings"]
+    report["Category"].append("Site Health & Structure")
+    report["Parameters"].append("Header tags structure")
+    report["Expected Value"].append(expected_outcomes["Header tags structure"])
+    report["Source"].append(sources["Header tags structure"])
+    if headings["available"]:
+        report["Current Value"].append(format_heading_structure(headings))
+        heading_issues = headings["multiple_h1"] + headings["h2_without_h1"]
+        report["Status"].append("ℹ️ Review" if heading_issues > 0 else "✅ Pass")
+    else:
+        report["Current Value"].append("N/A")
+        report["Status"].append("ℹ️ Not Available")
+
+    link_profile_metrics = ["Backlinks", "Domain authority", "Spam Score"]
+    for metric in link_profile_metrics:
+        report["Category"].append("Link Profile & Authority")
+        report["Parameters"].append(metric)
+        report["Current Value"].append("N/A")
+        report["Expected Value"].append(expected_outcomes[metric])
+        report["Source"].append(sources[metric])
+        report["Status"].append("ℹ️ Not Available")
+
+    duplicate_content = summary["duplicate_content"]
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Duplicate content")
+    report["Current Value"].append(duplicate_content)
+    report["Expected Value"].append(expected_outcomes["Duplicate content"])
+    report["Source"].append(sources["Duplicate content"])
+    report["Status"].append("❌ Fail" if duplicate_content > 0 else "✅ Pass")
+
+    images_missing_alt_text = 0
+    if alt_tag_df is not None and not alt_tag_df.empty:
+        images_missing_alt_text = len(alt_tag_df)
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Img alt tag")
+    report["Current Value"].append(images_missing_alt_text)
+    report["Expected Value"].append(expected_outcomes["Img alt tag"])
+    report["Source"].append(sources["Img alt tag"])
+    report["Status"].append("❌ Fail" if images_missing_alt_text > 0 else "✅ Pass")
+
+    missing_h1 = summary["missing_h1"]
+    duplicate_h1 = summary["duplicate_h1"]
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Duplicate & missing H1")
+    report["Current Value"].append(f"Missing: {missing_h1}, Duplicate: {duplicate_h1}")
+    report["Expected Value"].append(expected_outcomes["Duplicate & missing H1"])
+    report["Source"].append(sources["Duplicate & missing H1"])
+    report["Status"].append(
+        "❌ Fail" if missing_h1 > 0 or duplicate_h1 > 0 else "✅ Pass"
+    )
+
+    missing_title = summary["missing_title"]
+    duplicate_titles = summary["duplicate_titles"]
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Duplicate & missing meta title")
+    report["Current Value"].append(
+        f"Missing: {missing_title}, Duplicate: {duplicate_titles}"
+    )
+    report["Expected Value"].append(expected_outcomes["Duplicate & missing meta title"])
+    report["Source"].append(sources["Duplicate & missing meta title"])
+    report["Status"].append(
+        "❌ Fail" if missing_title > 0 or duplicate_titles > 0 else "✅ Pass"
+    )
+
+    missing_description = summary["missing_description"]
+    duplicate_descriptions = summary["duplicate_descriptions"]
+    report["Category"].append("Metadata & Schema")
+    report["Parameters"].append("Duplicate & missing description")
+    report["Current Value"].append(
+        f"Missing: {missing_description}, Duplicate: {duplicate_descriptions}"
+    )
+    report["Expected Value"].append(
+        expected_outcomes["Duplicate & missing description"]
+    )
+    report["Source"].append(sources["Duplicate & missing description"])
+    report["Status"].append(
+        "❌ Fail"
+        if missing_description > 0 or duplicate_descriptions > 0
+        else "✅ Pass"
+    )
+    update_schema_markup_analysis(summary["domain"], report, expected_outcomes, sources, summary.get("schema_sample"), summary.get("schema_inventory"), progress, session)
+
+    final_report_df = pd.DataFrame(report)
+    if not final_report_df.empty:
+        final_report_df = final_report_df.set_index(["Category", "Parameters"])
+
+    return final_report_df
+
+@timed("report.issue_details")
+def collect_issue_details(df, summary, skip_empty_content=True):
+    """Rows behind the crawl checks of ``summary``; ``skip_empty_content`` must match the one it was computed with."""
+    duplicate_data = None
+    if summary["duplicate_titles"] > 0:
+        df_with_titles = df[df["Title 1"].notna() & (df["Title 1"] != "")]
+        duplicate_data = df_with_titles[
+            df_with_titles["Title 1"].duplicated(keep=False)
+        ][["Address", "Title 1", "Title 1 Length"]]
+
+    duplicate_content_data = None
+    if (
+        summary["duplicate_content"] > 0
+        and "Word Count" in df.columns
+        and "Sentence Count" in df.columns
+    ):
+        content_mask = df["Word Count"].notna() & df["Sentence Count"].notna()
+        if skip_empty_content:
+            content_mask &= ~((df["Word Count"] == 0) & (df["Sentence Count"] == 0))
+        duplicate_content_data = df[content_mask]
+        duplicate_content_data = duplicate_content_data[
+            duplicate_content_data.duplicated(subset=["Word Count", "Sentence Count"], keep=False)
+        ][["Address", "Word Count", "Sentence Count"]]
+
+    h1_issues_data = None
+    if summary["missing_h1"] > 0 or summary["duplicate_h1"] > 0:
+        h1_issues_data = df[df["H1-1"].isna() | df["H1-1"].duplicated(keep=False)][
+            ["Address", "H1-1"]
+        ]
+        h1_issues_data = h1_issues_data[h1_issues_data["Address"].apply(is_valid_page_url)]
+
+    description_issues_data = None
+    if summary["missing_description"] > 0 or summary["duplicate_descriptions"] > 0:
+        description_issues_data = df[
+            df["Meta Description 1"].isna()
+            | df["Meta Description 1"].duplicated(keep=False)
+        ][["Address", "Meta Description 1"]]
+        description_issues_data = description_issues_data[description_issues_data["Address"].apply(is_valid_page_url)]
+
+    return {
+        "duplicate_titles": duplicate_data,
+        "duplicate_content": duplicate_content_data,
+        "h1_issues": h1_issues_data,
+        "description_issues": description_issues_data,
+    }
+
+
+def parse_sitemap(sitemap_content):
+    return list({entry.loc for entry in parse_sitemap_entries(sitemap_content)})
+
+def sitemap_languages(sitemap_entries):
+    """URL -> language subtag declared by the page's own hreflang alternate in the sitemap."""
+    languages = {}
+    for entry in sitemap_entries:
+        for hreflang, href in entry.alternates:
+            if href == entry.loc and hreflang.lower() != 'x-default':
+                languages[entry.loc] = hreflang.lower().split('-')[0]
+                break
+    return languages
+
+@timed("sitemap.classify")
+def analyze_sitemap_categories(urls, languages=None):
+    category_counts = Counter()
+    language_counts = Counter()
+    categorized_urls = []
+    languages = languages or {}
+    
+    for url in urls:
+        language, category = detect_url_language(url)
+        # Sitemap hreflang annotations are authoritative over the URL heuristics
+        language = languages.get(url, language)
+        if category:
+            category_counts[category] += 1
+        language_counts[language] += 1
+        categorized_urls.append({
+            'URL': url,
+            'Language': language,
+            'Category': category if category else 'Other'
+        })
+    
+    return category_counts, language_counts, categorized_urls
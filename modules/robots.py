@@ -0,0 +1,237 @@
+import logging
+import re
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+import requests
+
+from modules.crawl_rows import run_stage
+from modules.http_cache import cached_get, is_stale
+from modules.instrumentation import count
+from modules.url_table import UrlTable, canonicalize_url, canonicalize_urls
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_COLUMNS = ["Address", "Indexability"]
+
+# Product token whose group is evaluated; other agents fall back to "*".
+ROBOTS_USER_AGENT = "googlebot"
+
+
+class RobotsRule:
+    """One allow/disallow line, compiled to a prefix test or a regex for ``*`` and ``$`` patterns."""
+
+    def __init__(self, allow, pattern):
+        self.allow = allow
+        self.pattern = pattern
+        self.length = len(pattern)
+        if "*" in pattern or pattern.endswith("$"):
+            anchored = pattern.endswith("$")
+            body = pattern[:-1] if anchored else pattern
+            regex = ".*".join(re.escape(part) for part in body.split("*"))
+            self.regex = "^" + regex + ("$" if anchored else "")
+        else:
+            self.regex = None
+
+    def __str__(self):
+        return f"{'Allow' if self.allow else 'Disallow'}: {self.pattern}"
+
+
+class RobotsTxt:
+    """Parsed robots.txt of one origin with a compiled matcher per user agent."""
+
+    def __init__(self, origin, text="", status_code=200):
+        # Same form as the canonicalized URLs it is compared against, e.g. without ":443"
+        self.origin = canonicalize_url(origin).rstrip("/")
+        self.status_code = status_code
+        self.sitemaps = []
+        self.groups = {}
+        self._matchers = {}
+        self._parse(text)
+
+    def matcher(self, user_agent=ROBOTS_USER_AGENT):
+        """Rules of the group for ``user_agent`` (the ``*`` group if it has none), compiled once."""
+        user_agent = user_agent.lower()
+        if user_agent not in self._matchers:
+            rules = self.groups.get(user_agent, self.groups.get("*", []))
+            self._matchers[user_agent] = [RobotsRule(allow, pattern) for allow, pattern in rules]
+        return self._matchers[user_agent]
+
+    def allowed(self, urls, user_agent=ROBOTS_USER_AGENT):
+        """Allow flags for ``urls`` plus the index of the deciding rule (-1 when none matched).
+
+        Every rule is applied to the whole batch at once; the longest
+        matching pattern wins and Allow wins ties. URLs are compared in
+        canonical form; those on other origins are not governed by this
+        file and are always allowed.
+        """
+        rules = self.matcher(user_agent)
+        urls = pd.Series(canonicalize_urls(urls), dtype=object).fillna("")
+        allowed = np.ones(len(urls), dtype=bool)
+        decided_by = np.full(len(urls), -1, dtype=np.int64)
+        if not rules or not len(urls):
+            return allowed, decided_by
+
+        paths, same_origin = _origin_paths(urls, self.origin)
+
+        best = np.full(len(urls), -1, dtype=np.int64)
+        for index, rule in enumerate(rules):
+            matched = _match(paths, rule) & same_origin
+            better = matched & ((rule.length > best) | ((rule.length == best) & rule.allow))
+            best[better] = rule.length
+            allowed[better] = rule.allow
+            decided_by[better] = index
+
+        # robots.txt itself is always fetchable
+        is_robots = _equals(paths, "/robots.txt") & same_origin
+        allowed[is_robots] = True
+        return allowed, decided_by
+
+    def _parse(self, text):
+        agents = []
+        rules = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            key, value = (part.strip() for part in line.split(":", 1))
+            key = key.lower()
+            if key == "user-agent":
+                if in_rules:
+                    self._add_group(agents, rules)
+                    agents, rules, in_rules = [], [], False
+                agents.append(value.lower())
+            elif key in ("allow", "disallow"):
+                in_rules = True
+                if value:
+                    rules.append((key == "allow", value))
+            elif key == "sitemap":
+                self.sitemaps.append(value)
+        self._add_group(agents, rules)
+
+    def _add_group(self, agents, rules):
+        for agent in agents:
+            self.groups.setdefault(agent, []).extend(rules)
+
+
+def fetch_robots_txt(website_url, timeout=5, session=None):
+    """Fetch and parse the robots.txt of ``website_url``'s origin.
+
+    Repeat fetches are served by the HTTP cache while its copy is fresh.
+    A 4xx response means no restrictions (an empty file); ``None`` is
+    returned when the file could not be fetched or the server errored.
+    """
+    parts = urlsplit(website_url if "://" in website_url else "https://" + website_url)
+    origin = canonicalize_url(f"{parts.scheme}://{parts.netloc}").rstrip("/")
+    try:
+        response = cached_get(origin + "/robots.txt", session=session, timeout=timeout, headers={'User-Agent': 'Mozilla/5.0'}, verify=False, stale_if_error=True)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch robots.txt for {origin}: {e}")
+        return None
+    if is_stale(response):
+        count("robots.stale")
+        logger.warning(f"robots.txt of {origin} could not be refetched; robots checks are degraded to a stale cached copy")
+    if response.status_code == 200:
+        return RobotsTxt(origin, response.text)
+    if 400 <= response.status_code < 500:
+        return RobotsTxt(origin, status_code=response.status_code)
+    return None
+
+
+class RobotsStage:
+    """Crawled pages blocked by robots.txt, with the rule that blocks them.
+
+    Each chunk's addresses are checked as they arrive; only the blocked
+    count and the blocked indexable rows are kept.
+    """
+
+    columns = ROBOTS_COLUMNS
+
+    def __init__(self, robots, urls=None):
+        self.robots = robots
+        self.urls = urls if urls is not None else UrlTable()
+        self.blocked_pages = 0
+        self._blocked_indexable = []
+
+    def update(self, chunk, rows):
+        rules = self.robots.matcher()
+        allowed, decided_by = self.robots.allowed(chunk["Address"])
+        blocked = ~allowed
+        flagged = blocked & rows.indexable
+        self.blocked_pages += int(blocked.sum())
+        self._blocked_indexable.append(pd.DataFrame({
+            "Address": chunk["Address"].to_numpy()[flagged],
+            "Robots Rule": [str(rules[index]) for index in decided_by[flagged].tolist()],
+        }))
+
+    def finish(self, crawl):
+        blocked_indexable = pd.concat(self._blocked_indexable, ignore_index=True) if self._blocked_indexable else pd.DataFrame(
+            columns=["Address", "Robots Rule"]
+        )
+        summary = {
+            "available": True,
+            "status_code": self.robots.status_code,
+            "rules": len(self.robots.matcher()),
+            "sitemaps": len(self.robots.sitemaps),
+            "blocked_pages": self.blocked_pages,
+            "blocked_indexable": len(blocked_indexable),
+        }
+        return summary, {"robots_blocked_indexable": blocked_indexable if not blocked_indexable.empty else None}
+
+
+def analyze_robots(df, robots, urls=None):
+    """Robots.txt checks of an in-memory crawl frame."""
+    return run_stage(RobotsStage(robots, urls), df)
+
+
+def format_robots_summary(summary, sitemap=None):
+    value = (
+        f"Rules: {summary['rules']}, blocked pages: {summary['blocked_pages']} "
+        f"(indexable: {summary['blocked_indexable']})"
+    )
+    if sitemap is not None and sitemap.get("available"):
+        value += f", disallowed sitemap URLs: {sitemap['disallowed']}"
+    return value
+
+
+def _equals(paths, value):
+    if isinstance(paths, pd.Series):
+        return (paths == value).to_numpy(dtype=bool)
+    import pyarrow.compute as pc
+
+    return pc.equal(paths, value).to_numpy(zero_copy_only=False)
+
+
+def _origin_paths(urls, origin):
+    """Path (plus query) of every URL, and whether it belongs to ``origin``."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        pa = None
+
+    if pa is None:
+        same_origin = (urls.str.startswith(origin + "/") | (urls == origin)).to_numpy(dtype=bool)
+        paths = urls.str.slice(len(origin)).where(urls.str.len() > len(origin), "/")
+        return paths, same_origin
+
+    urls = pa.array(urls, type=pa.large_string(), from_pandas=True)
+    same_origin = pc.or_(pc.starts_with(urls, origin + "/"), pc.equal(urls, origin))
+    paths = pc.utf8_slice_codeunits(urls, len(origin))
+    paths = pc.if_else(pc.equal(paths, ""), "/", paths)
+    return paths, same_origin.to_numpy(zero_copy_only=False)
+
+
+def _match(paths, rule):
+    if isinstance(paths, pd.Series):
+        if rule.regex is None:
+            return paths.str.startswith(rule.pattern).to_numpy(dtype=bool)
+        return paths.str.contains(rule.regex, regex=True).to_numpy(dtype=bool)
+
+    import pyarrow.compute as pc
+
+    if rule.regex is None:
+        return pc.starts_with(paths, rule.pattern).to_numpy(zero_copy_only=False)
+    return pc.match_substring_regex(paths, rule.regex).to_numpy(zero_copy_only=False)
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from modules.crawl_rows import run_stage
+from modules.instrumentation import timed
+from modules.page_sampling import path_templates
+from modules.schema_markup import (
+    SCHEMA_CHECKLIST,
+    SCHEMA_PARSE_ERRORS,
+    page_schema_types,
+)
+from modules.schema_pipeline import FETCH_FAILED, fetch_page
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_COLUMNS = ["Address", "Status Code", "Indexability"]
+
+# Pages fetched at once, and the URLs queued ahead of the fetchers.
+INVENTORY_CONCURRENCY = 16
+INVENTORY_QUEUE_SIZE = 64
+INVENTORY_TIMEOUT = 10
+
+# Bit i of a page's mask is set when it carries the i-th SCHEMA_CHECKLIST type.
+SCHEMA_TYPES = [schema_type for _, schema_type in SCHEMA_CHECKLIST]
+SCHEMA_BITS = {schema_type: 1 << bit for bit, schema_type in enumerate(SCHEMA_TYPES)}
+
+# Set on pages carrying any type outside the checklist.
+OTHER_TYPES_BIT = 1 << 31
+
+# A type found on at least this share of a template's pages is expected on
+# all of them; the pages without it are reported as gaps.
+TEMPLATE_COVERAGE_SHARE = 0.5
+
+
+class SchemaInventory:
+    """Per-URL schema types of a set of pages, as bitsets over ``SCHEMA_CHECKLIST``.
+
+    ``masks`` is a uint32 array aligned with ``urls`` and ``status`` holds
+    each page's HTTP status (``FETCH_FAILED`` without a response). Types
+    outside the checklist set ``OTHER_TYPES_BIT`` and are counted by name
+    in ``other_types``.
+    """
+
+    def __init__(self, urls, masks, status, other_types=None):
+        self.urls = np.asarray(urls, dtype=object)
+        self.masks = masks
+        self.status = status
+        self.other_types = other_types if other_types is not None else Counter()
+
+    def __len__(self):
+        return len(self.urls)
+
+    def has(self, schema_type):
+        """Boolean array of the pages carrying ``schema_type`` (a SCHEMA_CHECKLIST type)."""
+        return (self.masks & SCHEMA_BITS[schema_type]) != 0
+
+    def type_counts(self):
+        """Pages per SCHEMA_CHECKLIST type."""
+        return {schema_type: int(self.has(schema_type).sum()) for schema_type in SCHEMA_TYPES}
+
+    def types_found(self):
+        """Every schema type seen on at least one page, checklist or not."""
+        found = {schema_type for schema_type, count in self.type_counts().items() if count}
+        return sorted(found | set(self.other_types))
+
+    def templates(self):
+        """Template key of every page (the origin is prefixed when pages span several)."""
+        origins, templates = path_templates(self.urls)
+        if origins.nunique() > 1:
+            return (origins + templates).to_numpy(dtype=object)
+        return templates.to_numpy(dtype=object)
+
+    def to_frame(self):
+        # Pages share few distinct masks, so each is spelled out once
+        codes, masks = pd.factorize(self.masks)
+        names = np.array(SCHEMA_TYPES, dtype=object)
+        bits = (masks.astype(np.uint32)[:, None] >> np.arange(len(SCHEMA_TYPES), dtype=np.uint32)) & 1
+        labels = np.array([", ".join(names[row.astype(bool)]) for row in bits], dtype=object)
+        return pd.DataFrame({"URL": self.urls, "Status Code": self.status, "Checklist Types": labels[codes]})
+
+    def template_coverage(self, templates=None):
+        """Pages per template and the share of them carrying each checklist type found on the site."""
+        templates = self.templates() if templates is None else templates
+        codes, keys = pd.factorize(templates)
+        fetched = self.status == 200
+        pages = np.bincount(codes[fetched], minlength=len(keys))
+        coverage = pd.DataFrame({"Template": keys, "Pages": pages})
+        for schema_type in SCHEMA_TYPES:
+            has = self.has(schema_type)
+            if not has.any():
+                continue
+            with_type = np.bincount(codes[has], minlength=len(keys))
+            coverage[schema_type] = np.round(np.divide(with_type, pages, out=np.zeros(len(keys)), where=pages > 0), 2)
+        coverage = coverage[coverage["Pages"] > 0]
+        return coverage.sort_values("Pages", ascending=False, kind="stable", ignore_index=True)
+
+    def coverage_gaps(self, min_share=TEMPLATE_COVERAGE_SHARE, templates=None):
+        """Pages lacking a type that at least ``min_share`` of their template's pages carry."""
+        templates = self.templates() if templates is None else templates
+        codes, _ = pd.factorize(templates)
+        fetched = self.status == 200
+        pages = np.bincount(codes[fetched], minlength=codes.max() + 1 if len(codes) else 0)
+        gaps = []
+        for schema_type in SCHEMA_TYPES:
+            has = self.has(schema_type)
+            if not has.any():
+                continue
+            share = np.divide(np.bincount(codes[has], minlength=len(pages)), pages, out=np.zeros(len(pages)), where=pages > 0)
+            missing = np.flatnonzero(fetched & ~has & (share[codes] >= min_share))
+            if len(missing):
+                gaps.append(pd.DataFrame({
+                    "URL": self.urls[missing],
+                    "Template": templates[missing],
+                    "Missing Schema": schema_type,
+                    "Template Coverage": np.round(share[codes[missing]], 2),
+                }))
+        if not gaps:
+            return pd.DataFrame(columns=["URL", "Template", "Missing Schema", "Template Coverage"])
+        return pd.concat(gaps, ignore_index=True).sort_values(["Template", "URL"], kind="stable", ignore_index=True)
+
+
+def schema_type_mask(schema_names):
+    """Bitset of the SCHEMA_CHECKLIST types among ``schema_names`` and the names outside it.
+
+    Names are compared without their vocabulary, so
+    ``http://schema.org/Product`` and ``schema:Product`` count as ``Product``.
+    """
+    mask = 0
+    other = []
+    for name in schema_names:
+        name = str(name).rstrip("/").rsplit("/", 1)[-1].rsplit("#", 1)[-1].rsplit(":", 1)[-1]
+        bit = SCHEMA_BITS.get(name)
+        if bit is None:
+            other.append(name)
+            mask |= OTHER_TYPES_BIT
+        else:
+            mask |= bit
+    return mask, other
+
+
+def fetch_schema_types(url, timeout=INVENTORY_TIMEOUT, session=None):
+    """HTTP status and schema type names of one page (no types for failed or non-HTML responses)."""
+    url, status, html = fetch_page(url, timeout, session)
+    if html is None:
+        return status, []
+    try:
+        with timed("schema.parse"):
+            return status, page_schema_types(html, url)
+    except (requests.RequestException, *SCHEMA_PARSE_ERRORS) as e:
+        logger.warning(f"Failed to parse schema markup of {url}: {type(e).__name__}: {e}")
+        return status, []
+
+
+async def inventory_schemas_async(urls, concurrency=INVENTORY_CONCURRENCY, timeout=INVENTORY_TIMEOUT, queue_size=INVENTORY_QUEUE_SIZE, progress=None, journal=None, session=None, previous=None):
+    """Fetch ``urls`` through a bounded pipeline and collect their schema types.
+
+    A producer feeds URL indexes into a queue of ``queue_size``, so
+    ``urls`` may be a lazy iterable of any length; ``concurrency`` workers
+    fetch and parse pages on a thread pool (requests are still paced per
+    host by the rate limiter). ``progress`` is called with the number of
+    pages done after each page. With a ``ProbeJournal`` every page is
+    journaled as it completes and pages an interrupted inventory already
+    fetched are taken from the journal. ``previous`` maps URLs to the
+    ``(status, schema_names)`` results of an earlier inventory to take
+    instead of fetching, such as pages unchanged since then; they are
+    journaled like fetched pages. Pages are fetched through ``session``
+    when given.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    page_urls = []
+    results = {}
+    completed = journal.completed() if journal is not None else {}
+    reused = {url: result for url, result in (previous or {}).items() if url not in completed}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def worker():
+            while True:
+                index = await queue.get()
+                if index is None:
+                    return
+                results[index] = await loop.run_in_executor(pool, fetch_schema_types, page_urls[index], timeout, session)
+                if journal is not None:
+                    await loop.run_in_executor(pool, journal.record, page_urls[index], *results[index])
+                if progress is not None:
+                    progress(len(results))
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            seen = set()
+            for url in urls:
+                if url in seen:
+                    continue
+                seen.add(url)
+                page_urls.append(url)
+                if url in completed:
+                    results[len(page_urls) - 1] = completed.pop(url)
+                    continue
+                if url in reused:
+                    results[len(page_urls) - 1] = reused[url]
+                    if journal is not None:
+                        await loop.run_in_executor(pool, journal.record, url, *reused[url])
+                    continue
+                await queue.put(len(page_urls) - 1)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            if journal is not None:
+                journal.finish()
+        finally:
+            for task in workers:
+                task.cancel()
+
+    masks = np.zeros(len(page_urls), dtype=np.uint32)
+    status = np.full(len(page_urls), FETCH_FAILED, dtype=np.int16)
+    other_types = Counter()
+    for index, (status_code, schema_names) in results.items():
+        status[index] = status_code
+        masks[index], other = schema_type_mask(schema_names)
+        other_types.update(other)
+    inventory = SchemaInventory(page_urls, masks, status, other_types)
+    logger.info(f"Inventoried schema markup of {len(inventory)} pages")
+    return inventory
+
+
+def inventory_schemas(urls, concurrency=INVENTORY_CONCURRENCY, timeout=INVENTORY_TIMEOUT, queue_size=INVENTORY_QUEUE_SIZE, progress=None, journal=None, session=None, previous=None):
+    """Blocking wrapper of ``inventory_schemas_async`` for callers without a running event loop."""
+    return asyncio.run(inventory_schemas_async(urls, concurrency, timeout, queue_size, progress, journal, session, previous))
+
+
+class SchemaInventoryStage:
+    """Schema coverage of the inventoried pages, aggregated by URL template.
+
+    The inventory carries its own URLs, so the crawl is not read at all.
+    """
+
+    columns = INVENTORY_COLUMNS
+
+    def __init__(self, inventory, urls=None):
+        self.inventory = inventory
+        self.urls = urls if urls is not None else UrlTable()
+
+    def update(self, chunk, rows):
+        pass
+
+    def finish(self, crawl):
+        inventory = self.inventory
+        if not isinstance(inventory, SchemaInventory) or len(inventory) == 0:
+            return {"available": False}, {}
+
+        templates = inventory.templates()
+        coverage = inventory.template_coverage(templates)
+        gaps = inventory.coverage_gaps(templates=templates)
+        fetched = inventory.status == 200
+        summary = {
+            "available": True,
+            "pages": len(inventory),
+            "fetched": int(fetched.sum()),
+            "failed": int((~fetched).sum()),
+            "with_schema": int((fetched & (inventory.masks != 0)).sum()),
+            "templates": len(coverage),
+            "coverage_gaps": len(gaps),
+            "gap_pages": int(gaps["URL"].nunique()),
+            "type_counts": inventory.type_counts(),
+            "types_found": inventory.types_found(),
+        }
+        detailed_data = {
+            "schema_template_coverage": coverage if not coverage.empty else None,
+            "schema_coverage_gaps": gaps if not gaps.empty else None,
+        }
+        return summary, detailed_data
+
+
+def analyze_schema_inventory(df, inventory, urls=None):
+    """Schema inventory checks of an in-memory crawl frame."""
+    return run_stage(SchemaInventoryStage(inventory, urls), df)
+
+
+def format_schema_inventory_summary(summary):
+    value = (
+        f"Schema on {summary['with_schema']} of {summary['fetched']} pages across {summary['templates']} templates, "
+        f"pages missing a type their template uses: {summary['gap_pages']}"
+    )
+    if summary["failed"]:
+        value += f", not fetched: {summary['failed']}"
+    return value
+
@@ -0,0 +1,294 @@
+import json
+import logging
+import re
+from collections import namedtuple
+
+import requests
+from lxml import etree
+
+from modules.http_cache import cached_get
+from modules.instrumentation import count, timed
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECKLIST = [
+    ("Breadcrumbs", "BreadcrumbList"),
+    ("FAQ", "FAQPage"),
+    ("Article", "Article"),
+    ("Video", "VideoObject"),
+    ("Organization", "Organization"),
+    ("How-to", "HowTo"),
+    ("WebPage", "WebPage"),
+    ("Product", "Product"),
+    ("Review", "Review"),
+    ("Person", "Person"),
+    ("Event", "Event"),
+    ("Recipe", "Recipe"),
+    ("LocalBusiness", "LocalBusiness"),
+    ("CreativeWork", "CreativeWork"),
+    ("ItemList", "ItemList"),
+    ("JobPosting", "JobPosting"),
+    ("Course", "Course"),
+    ("ImageObject", "ImageObject"),
+    ("Service", "Service"),
+]
+
+SCHEMA_REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+# Pages without any of these cannot carry JSON-LD, microdata or RDFa types.
+SCHEMA_MARKERS = ("ld+json", "itemtype", "typeof")
+
+
+# Prefixes of the RDFa 1.1 initial context that pages use without declaring them.
+RDFA_PREFIXES = {
+    "schema": "http://schema.org/",
+    "og": "http://ogp.me/ns#",
+    "dc": "http://purl.org/dc/terms/",
+    "dcterms": "http://purl.org/dc/terms/",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "gr": "http://purl.org/goodrelations/v1#",
+    "v": "http://rdf.data-vocabulary.org/#",
+}
+
+# "name: iri" pairs of an RDFa prefix attribute.
+RDFA_PREFIX_DECLARATION = re.compile(r"([A-Za-z_][\w.-]*):\s+(\S+)")
+
+# Key holding an object's type in each extruct syntax.
+SCHEMA_TYPE_KEYS = [("json-ld", "@type"), ("microdata", "type"), ("rdfa", "@type")]
+
+SchemaTypeNode = namedtuple("SchemaTypeNode", ["types", "parent_types", "depth", "top_level", "path"])
+
+# What extruct, rdflib and lxml raise on markup they cannot parse: invalid
+# JSON-LD is a ValueError, broken microdata or RDFa trees surface as lxml
+# errors or as Type/Key/AttributeErrors from the extractors.
+SCHEMA_PARSE_ERRORS = (ValueError, TypeError, KeyError, AttributeError, etree.LxmlError)
+
+
+def extract_schemas(url, timeout=10, session=None):
+    try:
+        response = cached_get(url, session=session, headers=SCHEMA_REQUEST_HEADERS, timeout=timeout)
+        response.raise_for_status()
+        return parse_schemas(response.text, response.url)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Failed to fetch {url} for schema extraction: {e}")
+        return None
+
+def extract_schema_types(url, timeout=10, session=None):
+    """Schema type names of the page at ``url`` (None if it cannot be fetched).
+
+    Cheaper than ``extract_schema_names(extract_schemas(url))``: the full
+    extruct parse only runs when ``scan_schema_types`` cannot vouch for
+    the page.
+    """
+    try:
+        with timed("schema.fetch"):
+            response = cached_get(url, session=session, headers=SCHEMA_REQUEST_HEADERS, timeout=timeout)
+        response.raise_for_status()
+        with timed("schema.parse"):
+            return page_schema_types(response.text, response.url)
+    except requests.exceptions.RequestException as e:
+        count("schema.fetch_errors")
+        logger.warning(f"Failed to fetch {url} for schema extraction: {e}")
+        return None
+
+def page_schema_types(html, url):
+    """Schema type names of a page's HTML, from the fast scan when possible."""
+    schema_names = scan_schema_types(html)
+    if schema_names is None:
+        schema_names = extract_schema_names(parse_schemas(html, url))
+    return schema_names
+
+def scan_schema_types(html):
+    """Type names of the JSON-LD blocks and top-level microdata/RDFa items, without building a DOM.
+
+    Pages without schema markers are answered without parsing; others are
+    tokenized by lxml into ``_SchemaTypeScanner``, which only keeps
+    ld+json script bodies and ``itemtype``/``typeof`` attributes.
+    Returns None when a JSON-LD block is not valid JSON, so the caller can
+    fall back to extruct's more lenient parse.
+    """
+    lowered = html.lower()
+    if not any(marker in lowered for marker in SCHEMA_MARKERS):
+        return []
+    scanner = _SchemaTypeScanner()
+    parser = etree.HTMLParser(target=scanner)
+    try:
+        parser.feed(html)
+        parser.close()
+    except etree.Error:
+        return None
+
+    items = []
+    for block in scanner.json_ld:
+        block = block.strip()
+        if not block:
+            continue
+        try:
+            items.append(json.loads(block, strict=False))
+        except ValueError:
+            return None
+    schema_names = set(extract_schema_names({"json-ld": items}))
+    schema_names.update(scanner.item_types)
+    return sorted(schema_names)
+
+
+class _SchemaTypeScanner:
+    """lxml parser target that collects ld+json script bodies and item types; no tree is built.
+
+    RDFa ``typeof`` tokens are expanded to absolute IRIs with the ``vocab``
+    and ``prefix`` attributes in scope, as extruct does; terms without a
+    vocabulary are dropped. extruct flattens RDFa, so every typed RDFa
+    node counts as top-level, whereas microdata items that are another
+    item's ``itemprop`` stay nested.
+    """
+
+    def __init__(self):
+        self.json_ld = []
+        self.item_types = []
+        self._script = None
+        self._scopes = [(None, RDFA_PREFIXES)]
+
+    def start(self, tag, attrib):
+        if tag == "script" and attrib.get("type", "").split(";")[0].strip().lower() == "application/ld+json":
+            self._script = []
+        if "itemprop" not in attrib and "itemscope" in attrib and attrib.get("itemtype"):
+            self.item_types.extend(attrib["itemtype"].split())
+
+        vocab, prefixes = self._scopes[-1]
+        if "vocab" in attrib:
+            vocab = attrib["vocab"].strip() or None
+        if attrib.get("prefix"):
+            prefixes = {**prefixes, **dict(RDFA_PREFIX_DECLARATION.findall(attrib["prefix"]))}
+        self._scopes.append((vocab, prefixes))
+        if attrib.get("typeof"):
+            self.item_types.extend(
+                iri for iri in (_expand_rdfa_term(token, vocab, prefixes) for token in attrib["typeof"].split()) if iri
+            )
+
+    def data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+
+    def end(self, tag):
+        if len(self._scopes) > 1:
+            self._scopes.pop()
+        if tag == "script" and self._script is not None:
+            self.json_ld.append("".join(self._script))
+            self._script = None
+
+    def close(self):
+        return None
+
+
+def _expand_rdfa_term(token, vocab, prefixes):
+    """Absolute IRI of an RDFa type token (None when it cannot be resolved)."""
+    prefix, colon, reference = token.partition(":")
+    if not colon:
+        return vocab + token if vocab else None
+    if prefix == "_":
+        return None
+    if prefix in prefixes and not reference.startswith("//"):
+        return prefixes[prefix] + reference
+    return token
+
+
+def parse_schemas(html, url):
+    """JSON-LD, microdata and RDFa items of a page's HTML."""
+    # extruct pulls in rdflib and mf2py; it is loaded by the first page that needs the full parse
+    import extruct
+    from w3lib.html import get_base_url
+
+    base_url = get_base_url(html, url)
+    return extruct.extract(html, base_url=base_url, syntaxes=["json-ld", "microdata", "rdfa"])
+
+def walk_schema_types(data, type_keys=("@type",), max_depth=None, with_paths=False):
+    """Yield a ``SchemaTypeNode`` for every object in ``data`` that declares a type.
+
+    ``data`` is one syntax of extruct's output or a parsed JSON-LD
+    document. The walk is depth-first over an explicit stack, so deeply
+    nested documents cannot hit the recursion limit. Objects reached only
+    through lists and ``@graph`` are top-level; any other object is nested
+    and carries the types of its nearest typed ancestor. Paths such as
+    ``@graph[1].offers`` are only spelled out for typed objects, and only
+    with ``with_paths``.
+    """
+    stack = [(data, (), 0, True, None)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node, parent_types, depth, top_level, link = pop()
+        if type(node) is list:
+            children = enumerate(node)
+            child_types = parent_types
+        elif type(node) is dict:
+            types = ()
+            for type_key in type_keys:
+                value = node.get(type_key)
+                if value.__class__ is str:
+                    types += (value,)
+                elif value.__class__ is list:
+                    types += tuple(item for item in value if isinstance(item, str))
+            if types:
+                yield SchemaTypeNode(types, parent_types, depth, top_level, _schema_path(link) if with_paths else None)
+            children = node.items()
+            child_types = types or parent_types
+        else:
+            continue
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        start = len(stack)
+        depth += 1
+        for key, value in children:
+            if value.__class__ is dict or value.__class__ is list:
+                push((
+                    value,
+                    child_types,
+                    depth,
+                    top_level and (key.__class__ is int or key == "@graph"),
+                    (link, key) if with_paths else None,
+                ))
+        if with_paths:
+            # Pop children in document order
+            stack[start:] = reversed(stack[start:])
+
+def collect_schema_types(schemas):
+    """Top-level type names and ``(parent type, nested type)`` pairs of extruct output, in one pass.
+
+    Objects nested under an untyped root (e.g. a ``mainEntity`` of a
+    JSON-LD block without ``@type``) count as top-level.
+    """
+    top_level = set()
+    nested = set()
+    for syntax, type_key in SCHEMA_TYPE_KEYS:
+        for node in walk_schema_types(schemas.get(syntax, []), (type_key,)):
+            if node.top_level or not node.parent_types:
+                top_level.update(node.types)
+            else:
+                nested.update((parent, schema_type) for parent in node.parent_types for schema_type in node.types)
+    return top_level, nested
+
+def extract_schema_names(schemas):
+    return sorted(collect_schema_types(schemas)[0])
+
+def _schema_path(link):
+    keys = []
+    while link is not None:
+        link, key = link
+        keys.append(key)
+    path = ""
+    for key in reversed(keys):
+        if isinstance(key, int):
+            path += f"[{key}]"
+        else:
+            path += f".{key}" if path else key
+    return path or "root"
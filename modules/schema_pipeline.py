@@ -0,0 +1,162 @@
+import logging
+import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from threading import Lock, Thread
+
+import requests
+
+from modules.http_cache import cached_get
+from modules.instrumentation import metrics, timed
+from modules.schema_markup import (
+    SCHEMA_PARSE_ERRORS,
+    SCHEMA_REQUEST_HEADERS,
+    extract_schema_names,
+    page_schema_types,
+    parse_schemas,
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads waiting on the network, and processes parsing HTML.
+FETCH_WORKERS = 16
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Fetched pages waiting for a parser; fetchers block once it is full.
+PAGE_QUEUE_SIZE = 32
+
+# Status of pages whose request failed without a response.
+FETCH_FAILED = -1
+
+_FETCHER_DONE = object()
+
+
+def fetch_page(url, timeout=10, session=None):
+    """``(url, status, html)`` of one page; ``html`` is None unless it is a 200 HTML response."""
+    try:
+        with timed("schema.fetch"):
+            response = cached_get(url, session=session, headers=SCHEMA_REQUEST_HEADERS, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.info(f"Failed to fetch {url} for schema extraction: {e}")
+        return url, FETCH_FAILED, None
+    if response.status_code != 200 or "html" not in response.headers.get("Content-Type", "text/html"):
+        return url, response.status_code, None
+    return url, response.status_code, response.text
+
+
+def iter_schema_types(urls, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS, queue_size=PAGE_QUEUE_SIZE, timeout=10, full=False, journal=None, session=None, previous=None):
+    """Yield ``(url, status, schema_names, schemas)`` for every page, in completion order.
+
+    Fetcher threads pull URLs from ``urls`` (consumed lazily) and put the
+    raw HTML on a queue of ``queue_size`` pages; the calling thread hands
+    it to a process pool of ``parse_workers``, keeping at most two pages
+    per process in flight. A slow parse stage therefore fills the queue
+    and stalls the fetchers instead of buffering the site in memory, while
+    fetching and parsing overlap. ``schema_names`` is None for pages that
+    could not be fetched or did not return 200. ``schemas`` is the full
+    extruct data, parsed from the same HTML, with ``full`` and None
+    otherwise.
+
+    With a ``ProbeJournal``, every result is journaled once the caller has
+    consumed it, and URLs the journal already holds are replayed from it
+    instead of being fetched again; the journal is finished when all
+    ``urls`` are done. ``previous`` maps URLs to the ``(status, [names,
+    schemas])`` results of an earlier run (``ProbeJournal.last_completed``)
+    to replay instead of fetching, such as pages the sitemap dates before
+    that run; they are journaled like fresh results.
+    """
+    pages = queue.Queue(maxsize=queue_size)
+    replayed = deque()
+    completed = journal.completed() if journal is not None else {}
+    reused = {url: result for url, result in (previous or {}).items() if url not in completed}
+    url_iter = _skip_completed(urls, completed | reused, replayed) if completed or reused else iter(urls)
+    url_lock = Lock()
+    stop = False
+
+    def fetcher():
+        try:
+            while not stop:
+                with url_lock:
+                    url = next(url_iter, None)
+                if url is None:
+                    break
+                pages.put(fetch_page(url, timeout, session))
+        finally:
+            pages.put(_FETCHER_DONE)
+
+    fetchers = [Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+    for thread in fetchers:
+        thread.start()
+
+    finished = 0
+    in_flight = {}
+    max_in_flight = 2 * parse_workers
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            while finished < len(fetchers) or in_flight or replayed:
+                while replayed:
+                    url, status, schema_names, schemas = replayed.popleft()
+                    yield url, status, schema_names, schemas
+                    if journal is not None and url in reused:
+                        journal.record(url, status, [schema_names, schemas])
+                if in_flight and (finished == len(fetchers) or len(in_flight) >= max_in_flight):
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                else:
+                    done = [future for future in in_flight if future.done()]
+                for future in done:
+                    url, status = in_flight.pop(future)
+                    schema_names, schemas, elapsed = future.result()
+                    # Parsed in a child process, so its timing travels back with the result
+                    metrics.add_timing("schema.parse", elapsed)
+                    yield url, status, schema_names, schemas
+                    if journal is not None:
+                        journal.record(url, status, [schema_names, schemas])
+                if finished == len(fetchers) or len(in_flight) >= max_in_flight:
+                    continue
+
+                page = pages.get()
+                if page is _FETCHER_DONE:
+                    finished += 1
+                    continue
+                url, status, html = page
+                if html is None:
+                    yield url, status, None, None
+                    if journal is not None:
+                        journal.record(url, status, [None, None])
+                else:
+                    in_flight[pool.submit(_parse_page, html, url, full)] = (url, status)
+        if journal is not None:
+            journal.finish()
+    finally:
+        stop = True
+        # Unblock fetchers still waiting on a full queue
+        while any(thread.is_alive() for thread in fetchers):
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _skip_completed(urls, completed, replayed):
+    # Runs on the fetcher threads; the results of completed URLs go to the
+    # calling thread through ``replayed``
+    for url in urls:
+        if url in completed:
+            status, (schema_names, schemas) = completed.pop(url)
+            replayed.append((url, status, schema_names, schemas))
+        else:
+            yield url
+
+
+def _parse_page(html, url, full=False):
+    start = time.perf_counter()
+    try:
+        if full:
+            schemas = parse_schemas(html, url)
+            return extract_schema_names(schemas), schemas, time.perf_counter() - start
+        return page_schema_types(html, url), None, time.perf_counter() - start
+    except SCHEMA_PARSE_ERRORS as e:
+        logger.warning(f"Failed to parse schema markup of {url}: {type(e).__name__}: {e}")
+        return [], None, time.perf_counter() - start
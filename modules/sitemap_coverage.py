@@ -0,0 +1,159 @@
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable, canonicalize_urls, toggle_trailing_slash
+
+SITEMAP_COLUMNS = ["Address", "Status Code", "Indexability", "Canonical Link Element 1"]
+
+# Sitemap URLs are canonicalized and looked up this many at a time.
+SITEMAP_BATCH_SIZE = 100_000
+
+
+class SitemapStage:
+    """Match sitemap URLs against the crawl in both directions.
+
+    ``update`` keeps one "non-canonical" flag per crawled row. Once the
+    crawl is complete, ``update_sitemap`` takes the sitemap entries a batch
+    at a time and looks their URLs up by id (falling back to the trailing
+    slash variant), so only a per-id "listed" flag and the sitemap URLs
+    missing from the crawl are kept instead of a set of every sitemap URL.
+    ``sitemap_urls`` given up front are streamed the same way at
+    ``finish``. With a parsed ``robots`` file each batch is also checked for
+    URLs it disallows.
+    """
+
+    columns = SITEMAP_COLUMNS
+
+    def __init__(self, sitemap_urls=None, robots=None, urls=None, batch_size=SITEMAP_BATCH_SIZE):
+        self.sitemap_urls = sitemap_urls
+        self.robots = robots
+        self.urls = urls if urls is not None else UrlTable()
+        self.batch_size = batch_size
+        self._non_canonical = []
+        self._crawled = None
+        self._listed_ids = None
+        self._sitemap_count = 0
+        self._missing_urls = []
+        self._disallowed_urls = []
+
+    def update(self, chunk, rows):
+        if "Canonical Link Element 1" in chunk.columns:
+            canonical_ids = self.urls.intern(chunk["Canonical Link Element 1"])
+            non_canonical = (rows.page_ids >= 0) & (canonical_ids >= 0) & (canonical_ids != rows.page_ids)
+        else:
+            non_canonical = np.zeros(len(chunk), dtype=bool)
+        self._non_canonical.append(non_canonical)
+
+    def update_sitemap(self, entries, crawl):
+        self._update_urls([entry.loc for entry in entries], crawl)
+
+    def finish(self, crawl):
+        if self.sitemap_urls is not None:
+            sitemap_urls = iter(self.sitemap_urls)
+            while True:
+                batch = list(islice(sitemap_urls, self.batch_size))
+                if not batch:
+                    break
+                self._update_urls(batch, crawl)
+        if self._sitemap_count == 0:
+            return {"available": False}, {}
+
+        page_ids = crawl.page_ids
+        valid = page_ids >= 0
+        non_canonical = np.concatenate(self._non_canonical) if self._non_canonical else np.zeros(0, dtype=bool)
+
+        # Duplicates within the sitemap collapse onto the same id or canonical URL
+        listed_ids = self._listed_ids
+        listed = valid & listed_ids[np.maximum(page_ids, 0)]
+        not_crawled = pd.DataFrame({"URL": pd.unique(np.concatenate(self._missing_urls))})
+        disallowed = pd.DataFrame({"URL": pd.unique(canonicalize_urls(self._disallowed_urls))})
+
+        status = crawl.status
+        indexable = crawl.indexable
+        issue = np.select(
+            [status >= 400, (status >= 300) & (status < 400), non_canonical, ~indexable],
+            ["Error status", "Redirect", "Non-canonical", "Noindex"],
+            default="",
+        )
+        listed_rows = np.flatnonzero(listed & (issue != ""))
+        listed_issues = pd.DataFrame({
+            "Address": crawl.addresses(listed_rows),
+            "Status Code": crawl.status_codes(listed_rows),
+            "Indexability": crawl.indexability(listed_rows),
+            "Sitemap Issue": issue[listed_rows],
+        })
+        unlisted = pd.DataFrame({"Address": crawl.addresses(np.flatnonzero(valid & ~listed & indexable & (issue == "")))})
+
+        listed_count = int(listed_ids.sum())
+        indexable_count = int((valid & indexable & (issue == "")).sum())
+        issue_counts = listed_issues["Sitemap Issue"].value_counts()
+        summary = {
+            "available": True,
+            "sitemap_urls": listed_count + len(not_crawled),
+            "indexable_pages": indexable_count,
+            "indexable_not_in_sitemap": len(unlisted),
+            "coverage_pct": round(100 * (indexable_count - len(unlisted)) / max(indexable_count, 1), 1),
+            "not_crawled": len(not_crawled),
+            "errors": int(issue_counts.get("Error status", 0)),
+            "redirects": int(issue_counts.get("Redirect", 0)),
+            "non_canonical": int(issue_counts.get("Non-canonical", 0)),
+            "noindex": int(issue_counts.get("Noindex", 0)),
+            "disallowed": len(disallowed),
+        }
+        detailed_data = {
+            "indexable_not_in_sitemap": unlisted if not unlisted.empty else None,
+            "sitemap_not_crawled": not_crawled if not not_crawled.empty else None,
+            "sitemap_issues": listed_issues if not listed_issues.empty else None,
+            "sitemap_disallowed": disallowed if not disallowed.empty else None,
+        }
+        return summary, detailed_data
+
+    def _update_urls(self, batch, crawl):
+        urls = self.urls
+        if self._crawled is None:
+            page_ids = crawl.page_ids
+            self._crawled = np.zeros(len(urls), dtype=bool)
+            self._crawled[page_ids[page_ids >= 0]] = True
+            self._listed_ids = np.zeros(len(urls), dtype=bool)
+        crawled = self._crawled
+
+        batch = [url for url in batch if isinstance(url, str) and url.strip()]
+        if not batch:
+            return
+        self._sitemap_count += len(batch)
+        ids = urls.lookup(batch, match_trailing_slash=True)
+        found = (ids >= 0) & (ids < len(crawled))
+        found[found] = crawled[ids[found]]
+        # A known URL may still be one that was never crawled (a canonical or
+        # redirect target, or a sitemap URL other stages interned as the
+        # entries stream by), so its trailing slash variant is tried as well
+        retry = np.flatnonzero(~found & (ids >= 0))
+        if len(retry):
+            variant_ids = urls.lookup([toggle_trailing_slash(url) for url in urls.urls(ids[retry]).tolist()])
+            variant_found = (variant_ids >= 0) & (variant_ids < len(crawled))
+            variant_found[variant_found] = crawled[variant_ids[variant_found]]
+            ids[retry[variant_found]] = variant_ids[variant_found]
+            found[retry[variant_found]] = True
+        self._listed_ids[ids[found]] = True
+        self._missing_urls.append(canonicalize_urls([batch[i] for i in np.flatnonzero(~found).tolist()]))
+        if self.robots is not None:
+            allowed, _ = self.robots.allowed(batch)
+            self._disallowed_urls.extend(batch[i] for i in np.flatnonzero(~allowed).tolist())
+
+
+def reconcile_sitemap(df, sitemap_urls, robots=None, urls=None, batch_size=SITEMAP_BATCH_SIZE):
+    """Sitemap coverage checks of an in-memory crawl frame."""
+    return run_stage(SitemapStage(sitemap_urls, robots, urls, batch_size), df)
+
+
+def format_sitemap_coverage(summary):
+    return (
+        f"{summary['coverage_pct']}% of indexable pages in sitemap "
+        f"({summary['indexable_not_in_sitemap']} missing); sitemap URLs: {summary['sitemap_urls']} "
+        f"(not crawled: {summary['not_crawled']}, errors: {summary['errors']}, redirects: {summary['redirects']}, "
+        f"non-canonical: {summary['non_canonical']}, noindex: {summary['noindex']})"
+    )
+
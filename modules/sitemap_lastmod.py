@@ -0,0 +1,259 @@
+import logging
+import time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from modules.crawl_rows import run_stage
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+LASTMOD_COLUMNS = ["Address", "Indexability"]
+
+# Sentinel epoch of sitemap URLs without a (parseable) <lastmod>.
+LASTMOD_MISSING = np.iinfo(np.int64).min
+
+# Sitemap entries are parsed this many at a time.
+LASTMOD_BATCH_SIZE = 100_000
+
+DAY = 86_400
+
+# Upper bounds (in days) of the freshness histogram buckets.
+FRESHNESS_BUCKETS = [
+    ("< 7 days", 7),
+    ("7-30 days", 30),
+    ("30-90 days", 90),
+    ("90-365 days", 365),
+    ("> 1 year", None),
+]
+
+# Sitemap pages not modified for this many days are reported as stale.
+STALE_DAYS = 365
+
+# A lastmod shared by this share of the sitemap is most likely the build time.
+UNIFORM_LASTMOD_SHARE = 0.9
+
+
+class LastmodIndex:
+    """Sitemap URL id -> last modification time (int64 Unix seconds).
+
+    Ids refer to ``urls``; ``epochs`` holds ``LASTMOD_MISSING`` for URLs
+    listed without a usable <lastmod>. A URL listed more than once keeps
+    its most recent date.
+    """
+
+    def __init__(self, urls, ids, epochs):
+        self.urls = urls
+        self.ids = ids
+        self.epochs = epochs
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_entries(cls, sitemap_entries, urls=None, batch_size=LASTMOD_BATCH_SIZE):
+        """Build the index from ``SitemapEntry`` records, parsing each distinct lastmod string once."""
+        urls = urls if urls is not None else UrlTable()
+        entries = iter(sitemap_entries)
+        id_parts = []
+        epoch_parts = []
+        while True:
+            batch = list(islice(entries, batch_size))
+            if not batch:
+                break
+            ids, epochs = _lastmod_batch(batch, urls)
+            id_parts.append(ids)
+            epoch_parts.append(epochs)
+        return cls.from_parts(urls, id_parts, epoch_parts)
+
+    @classmethod
+    def from_parts(cls, urls, id_parts, epoch_parts):
+        """Build the index from per-batch URL ids and epochs, keeping the most recent date of every id."""
+        ids = np.concatenate(id_parts) if id_parts else np.zeros(0, dtype=np.int32)
+        epochs = np.concatenate(epoch_parts) if epoch_parts else np.zeros(0, dtype=np.int64)
+        keep = ids >= 0
+        ids, epochs = ids[keep], epochs[keep]
+        # Newest date first within each id, then the first row of every id
+        order = np.lexsort((-epochs.astype(np.float64), ids))
+        ids, epochs = ids[order], epochs[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        index = cls(urls, ids[first], epochs[first])
+        logger.info(f"Indexed lastmod of {len(index)} sitemap URLs")
+        return index
+
+    def to_frame(self):
+        known = self.epochs != LASTMOD_MISSING
+        lastmod = np.full(len(self), np.datetime64("NaT"), dtype="datetime64[s]")
+        lastmod[known] = self.epochs[known].astype("datetime64[s]")
+        return pd.DataFrame({"URL": self.urls.urls(self.ids), "Lastmod": lastmod})
+
+    def ages(self, now=None):
+        """Age in days of every entry (NaN without lastmod)."""
+        now = time.time() if now is None else now
+        known = self.epochs != LASTMOD_MISSING
+        return np.where(known, (now - self.epochs.astype(np.float64)) / DAY, np.nan)
+
+    def freshness_histogram(self, now=None):
+        """Page counts per age bucket, plus URLs without lastmod or dated in the future."""
+        ages = self.ages(now)
+        counts = []
+        lower = 0
+        for label, upper in FRESHNESS_BUCKETS:
+            in_bucket = ages >= lower
+            if upper is not None:
+                in_bucket &= ages < upper
+            counts.append((label, int(in_bucket.sum())))
+            lower = upper
+        counts.append(("Future date", int((ages < 0).sum())))
+        counts.append(("No lastmod", int(np.isnan(ages).sum())))
+        return pd.DataFrame(counts, columns=["Age", "Pages"])
+
+    def changed_since(self, since, urls=None, include_unknown=True):
+        """URLs modified after ``since`` (datetime, date string or Unix seconds).
+
+        With ``urls`` only those URLs are filtered, in their original form
+        and order; URLs missing from the sitemap count as unknown. Unknown
+        modification times are included unless ``include_unknown`` is false,
+        so an incremental run never skips a page it cannot prove unchanged.
+        """
+        since = _to_epoch(since)
+        if urls is None:
+            changed = self.epochs > since
+            if include_unknown:
+                changed |= self.epochs == LASTMOD_MISSING
+            return self.urls.urls(self.ids[changed]).tolist()
+
+        urls = list(urls)
+        epochs = self.lookup(urls)
+        changed = epochs > since
+        if include_unknown:
+            changed |= epochs == LASTMOD_MISSING
+        return [url for url, keep in zip(urls, changed.tolist()) if keep]
+
+    def lookup(self, urls):
+        """Lastmod epoch of ``urls`` (``LASTMOD_MISSING`` when unknown)."""
+        ids = self.urls.lookup(urls, match_trailing_slash=True)
+        epoch_by_id = np.full(len(self.urls), LASTMOD_MISSING, dtype=np.int64)
+        epoch_by_id[self.ids] = self.epochs
+        return np.where(ids >= 0, epoch_by_id[np.maximum(ids, 0)], LASTMOD_MISSING)
+
+
+def parse_lastmod(values):
+    """W3C datetime strings to int64 Unix seconds (``LASTMOD_MISSING`` if absent or invalid)."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    epochs = np.full(len(uniques) + 1, LASTMOD_MISSING, dtype=np.int64)
+    valid = parsed.notna().to_numpy()
+    epochs[:-1][valid] = parsed[valid].astype("datetime64[ns, UTC]").to_numpy(dtype="datetime64[s]").astype(np.int64)
+    # Missing values factorize to -1, i.e. the trailing sentinel
+    return epochs[codes]
+
+
+class LastmodStage:
+    """Freshness of the sitemap's lastmod dates and the stale pages behind them.
+
+    Only the crawl's URL ids and indexability are needed, so ``update``
+    keeps nothing; ``update_sitemap`` keeps the URL id and lastmod epoch of
+    a batch of sitemap entries. ``lastmod`` given up front (a
+    ``LastmodIndex`` or entries) is read at ``finish``.
+    """
+
+    columns = LASTMOD_COLUMNS
+
+    def __init__(self, lastmod=None, urls=None, now=None):
+        self.lastmod = lastmod
+        self.urls = urls if urls is not None else UrlTable()
+        self.now = now
+        self._ids = []
+        self._epochs = []
+
+    def update(self, chunk, rows):
+        pass
+
+    def update_sitemap(self, entries, crawl):
+        ids, epochs = _lastmod_batch(entries, self.urls)
+        self._ids.append(ids)
+        self._epochs.append(epochs)
+
+    def finish(self, crawl):
+        lastmod = self.lastmod
+        if isinstance(lastmod, LastmodIndex):
+            index = lastmod
+        elif lastmod is not None:
+            index = LastmodIndex.from_entries(lastmod, urls=self.urls)
+        else:
+            index = LastmodIndex.from_parts(self.urls, self._ids, self._epochs)
+        if len(index) == 0:
+            return {"available": False}, {}
+
+        now = time.time() if self.now is None else self.now
+        ages = index.ages(now)
+        known = ~np.isnan(ages)
+        histogram = index.freshness_histogram(now)
+
+        ids = index.ids if index.urls is self.urls else self.urls.lookup(index.urls.urls(index.ids))
+        rows = np.where(ids >= 0, crawl.rows_by_id()[np.maximum(ids, 0)], -1)
+        entry_indexability = np.full(len(index), None, dtype=object)
+        entry_indexability[rows >= 0] = crawl.indexability(rows[rows >= 0])
+
+        stale = np.flatnonzero(known & (ages >= STALE_DAYS))
+        stale = stale[np.argsort(-ages[stale], kind="stable")]
+        stale_pages = pd.DataFrame({
+            "URL": index.urls.urls(index.ids[stale]),
+            "Lastmod": index.epochs[stale].astype("datetime64[s]"),
+            "Age (days)": np.floor(ages[stale]).astype(np.int64),
+            "Indexability": entry_indexability[stale],
+        })
+
+        top_share = 0.0
+        if known.any():
+            top_share = float(pd.Series(index.epochs[known]).value_counts().iloc[0]) / int(known.sum())
+
+        summary = {
+            "available": True,
+            "sitemap_urls": len(index),
+            "with_lastmod": int(known.sum()),
+            "missing_lastmod": int((~known).sum()),
+            "future_lastmod": int((ages < 0).sum()),
+            "stale_pages": len(stale_pages),
+            "changed_last_30_days": int((known & (ages >= 0) & (ages < 30)).sum()),
+            "median_age_days": round(float(np.median(ages[known])), 1) if known.any() else None,
+            "uniform_lastmod": int(known.sum()) > 1 and top_share >= UNIFORM_LASTMOD_SHARE,
+        }
+        detailed_data = {
+            "lastmod_freshness": histogram,
+            "stale_sitemap_pages": stale_pages if not stale_pages.empty else None,
+        }
+        return summary, detailed_data
+
+
+def analyze_lastmod(df, lastmod, urls=None, now=None):
+    """Lastmod freshness checks of an in-memory crawl frame."""
+    return run_stage(LastmodStage(lastmod, urls, now), df)
+
+
+def format_lastmod_summary(summary):
+    value = (
+        f"Lastmod on {summary['with_lastmod']} of {summary['sitemap_urls']} URLs, "
+        f"median age: {summary['median_age_days']} days, changed in last 30 days: {summary['changed_last_30_days']}, "
+        f"stale (> {STALE_DAYS} days): {summary['stale_pages']}, future dates: {summary['future_lastmod']}"
+    )
+    if summary["uniform_lastmod"]:
+        value += "; most URLs share one lastmod"
+    return value
+
+
+def _lastmod_batch(entries, urls):
+    return urls.intern([entry.loc for entry in entries]), parse_lastmod([entry.lastmod for entry in entries])
+
+
+def _to_epoch(since):
+    if isinstance(since, (int, float, np.integer, np.floating)):
+        return int(since)
+    timestamp = pd.Timestamp(since)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return int(timestamp.timestamp())
@@ -0,0 +1,167 @@
+import io
+import logging
+from collections import namedtuple
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+from lxml import etree
+
+from modules.http_cache import cached_get, is_stale
+from modules.instrumentation import count, timed
+from modules.url_table import UrlTable
+
+logger = logging.getLogger(__name__)
+
+# One <url> of a urlset: its <loc>, the (hreflang, href) pairs of its
+# <xhtml:link rel="alternate"> children and its raw <lastmod> text.
+SitemapEntry = namedtuple("SitemapEntry", ["loc", "alternates", "lastmod"], defaults=((), None))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg', '.tiff', '.ico')
+
+SITEMAP_PATHS = ["/sitemap.xml", "/sitemap_index.xml", "/sitemap-1.xml", "/sitemaps/sitemap.xml", "/sitemaps/sitemap_index.xml"]
+
+
+def parse_sitemap_entries(sitemap_content, nested_sitemaps=None):
+    """Yield a ``SitemapEntry`` per page of a sitemap document.
+
+    The document is parsed incrementally and every element is freed once
+    it has been read, so memory stays flat however large the sitemap is.
+    Namespaces are matched by local name only. ``<loc>`` values of a
+    sitemap index are appended to ``nested_sitemaps`` when a list is given.
+    """
+    if isinstance(sitemap_content, str):
+        sitemap_content = sitemap_content.encode("utf-8")
+    try:
+        for _, element in etree.iterparse(
+            io.BytesIO(sitemap_content), tag=("{*}url", "{*}sitemap"), recover=True, huge_tree=True
+        ):
+            loc = None
+            lastmod = None
+            alternates = []
+            for child in element:
+                if not isinstance(child.tag, str):
+                    continue
+                name = etree.QName(child).localname
+                if name == "loc" and child.text:
+                    loc = child.text.strip()
+                elif name == "lastmod" and child.text:
+                    lastmod = child.text.strip()
+                elif name == "link" and child.get("rel") == "alternate" and child.get("hreflang") and child.get("href"):
+                    alternates.append((child.get("hreflang").strip(), child.get("href").strip()))
+
+            is_index = etree.QName(element).localname == "sitemap"
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if not loc:
+                continue
+            if is_index:
+                if nested_sitemaps is not None:
+                    nested_sitemaps.append(loc)
+            elif not loc.lower().endswith(IMAGE_EXTENSIONS):
+                yield SitemapEntry(loc, tuple(alternates), lastmod)
+    except etree.LxmlError as e:
+        logger.error(f"Error parsing sitemap: {e}")
+
+
+def fetch_sitemap_urls(website_url, session=None):
+    return unique_sitemap_urls(iter_sitemap_urls(website_url, session=session))
+
+
+def unique_sitemap_urls(sitemap_urls):
+    urls = UrlTable()
+    ids = urls.intern(list(sitemap_urls))
+    return urls.urls(np.unique(ids[ids >= 0])).tolist()
+
+
+def iter_sitemap_urls(website_url, journal=None, session=None):
+    """Yield page URLs sitemap by sitemap, so large sitemaps can be consumed without collecting them first.
+
+    URLs listed in more than one sitemap are yielded once per sitemap.
+    """
+    for entry in iter_sitemap_entries(website_url, journal, session):
+        yield entry.loc
+
+
+def iter_sitemap_entries(website_url, journal=None, session=None):
+    """Yield a ``SitemapEntry`` (page URL plus its hreflang alternates) for every page of the site's sitemaps.
+
+    With a ``ProbeJournal``, nested sitemaps whose entries were all
+    consumed are journaled, so an interrupted walk of a large sitemap
+    index resumes from the journal instead of refetching every child.
+    Requests go through ``session`` when given.
+    """
+    base_url = website_url.rstrip('/')
+    processed_sitemaps = set()
+
+    for path in SITEMAP_PATHS:
+        sitemap_url = base_url + path
+        if sitemap_url in processed_sitemaps:
+            continue
+
+        try:
+            with timed("sitemap.fetch"):
+                response = cached_get(sitemap_url, session=session, timeout=10, headers={'User-Agent': 'Mozilla/5.0'}, verify=False, stale_if_error=True)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to fetch sitemap {sitemap_url}: {e}")
+            continue
+        _check_stale(response, sitemap_url)
+        if response.status_code == 200:
+            processed_sitemaps.add(sitemap_url)
+            yield from iter_sitemap_document(response.content, base_url, processed_sitemaps, journal, session)
+            logger.info(f"Successfully parsed sitemap: {sitemap_url}")
+    if journal is not None:
+        journal.finish()
+
+
+def iter_sitemap_document(sitemap_content, base_url, processed_sitemaps, journal=None, session=None):
+    """Yield the entries of one sitemap, following nested sitemaps of a sitemap index."""
+    nested_sitemaps = []
+    yield from parse_sitemap_entries(sitemap_content, nested_sitemaps)
+    yield from _iter_nested_sitemaps(nested_sitemaps, base_url, processed_sitemaps, journal, session)
+
+
+def _iter_nested_sitemaps(nested_sitemaps, base_url, processed_sitemaps, journal, session=None):
+    for nested_sitemap_url in nested_sitemaps:
+        if not nested_sitemap_url.startswith('http'):
+            nested_sitemap_url = urljoin(base_url, nested_sitemap_url)
+        if nested_sitemap_url in processed_sitemaps:
+            continue
+
+        processed_sitemaps.add(nested_sitemap_url)
+        completed = journal.get(nested_sitemap_url) if journal is not None else None
+        if completed is not None:
+            entries, nested = completed[1]
+            for loc, alternates, lastmod in entries:
+                yield SitemapEntry(loc, tuple(map(tuple, alternates)), lastmod)
+            yield from _iter_nested_sitemaps(nested, base_url, processed_sitemaps, journal, session)
+            continue
+
+        try:
+            with timed("sitemap.fetch"):
+                nested_response = cached_get(nested_sitemap_url, session=session, timeout=10, headers={'User-Agent': 'Mozilla/5.0'}, verify=False, stale_if_error=True)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to fetch nested sitemap {nested_sitemap_url}: {e}")
+            continue
+        _check_stale(nested_response, nested_sitemap_url)
+        if nested_response.status_code != 200:
+            continue
+        if journal is None:
+            yield from iter_sitemap_document(nested_response.content, base_url, processed_sitemaps, session=session)
+            continue
+
+        entries = []
+        nested = []
+        for entry in parse_sitemap_entries(nested_response.content, nested):
+            yield entry
+            entries.append(entry)
+        journal.record(nested_sitemap_url, nested_response.status_code, [entries, nested])
+        yield from _iter_nested_sitemaps(nested, base_url, processed_sitemaps, journal, session)
+
+
+def _check_stale(response, sitemap_url):
+    if is_stale(response):
+        count("sitemap.stale")
+        logger.warning(f"Sitemap {sitemap_url} could not be refetched; sitemap checks are degraded to a stale cached copy")
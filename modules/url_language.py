@@ -0,0 +1,137 @@
+import re
+from urllib.parse import urlparse
+
+
+def detect_url_language(url):
+    parsed_url = urlparse(url)
+    path = parsed_url.path.lower()
+    hostname = parsed_url.hostname.lower() if parsed_url.hostname else ''
+
+    language = None
+    category = None
+
+    country_lang_map = {
+        '.cn': 'zh',    # China
+        '.jp': 'ja',    # Japan
+        '.kr': 'ko',    # Korea
+        '.tw': 'zh',    # Taiwan
+        '.hk': 'zh',    # Hong Kong
+        '.it': 'it',    # Italy
+        '.es': 'es',    # Spain
+        '.fr': 'fr',    # France
+        '.de': 'de',    # Germany
+        '.pt': 'pt',    # Portugal
+        '.nl': 'nl',    # Netherlands
+        '.pl': 'pl',    # Poland
+        '.se': 'sv',    # Sweden
+        '.no': 'no',    # Norway
+        '.fi': 'fi',    # Finland
+        '.dk': 'da',    # Denmark
+        '.cz': 'cs',    # Czech Republic
+        '.hu': 'hu',    # Hungary
+        '.ro': 'ro',    # Romania
+        '.hr': 'hr',    # Croatia
+        '.rs': 'sr',    # Serbia
+        '.bg': 'bg',    # Bulgaria
+        '.sk': 'sk',    # Slovakia
+        '.si': 'sl'     # Slovenia
+    }
+
+    language_patterns = {
+        'en': [r'/en/', r'/en-', r'/english/', r'/us/', r'/uk/', r'/au/', r'/international/'],
+        'it': [r'/it/', r'/it-', r'/italiano/', r'/italian/', r'/ch/'],
+        'es': [r'/es/', r'/es-', r'/espanol/', r'/spanish/', r'/mx/', r'/cl/', r'/co/', r'/latam/'],
+        'fr': [r'/fr/', r'/fr-', r'/french/', r'/ca/', r'/ch/', r'/be/'],
+        'de': [r'/de/', r'/de-', r'/deutsch/', r'/german/', r'/at/', r'/ch/'],
+        'pt': [r'/pt/', r'/pt-', r'/portuguese/', r'/br/', r'/pt/', r'/ao/'],
+        'ru': [r'/ru/', r'/ru-', r'/russian/', r'/by/', r'/kz/'],
+        'nl': [r'/nl/', r'/nl-', r'/dutch/', r'/netherlands/'],
+        'vi': [r'/vi/', r'/vi-', r'/vietnamese/'],
+        'pl': [r'/pl/', r'/pl-', r'/polish/'],
+        'hu': [r'/hu/', r'/hu-', r'/hungarian/'],
+        'tr': [r'/tr/', r'/tr-', r'/turkish/'],
+        'th': [r'/th/', r'/th-', r'/thai/'],
+        'cs': [r'/cs/', r'/cs-', r'/czech/'],
+        'el': [r'/el/', r'/el-', r'/greek/'],
+        'ja': [r'/ja/', r'/ja-', r'/japanese/', r'/jp/'],
+        'zh': [r'/zh/', r'/zh-', r'/zhs/', r'/chinese/', r'/cn/', r'/hk/', r'/tw/', r'/zh-cn/', r'/zh-tw/', r'/zh-hk/', r'/zht/'],
+        'ko': [r'/ko/', r'/ko-', r'/korean/', r'/kr/'],
+        'ar': [r'/ar/', r'/ar-', r'/arabic/', r'/sa/', r'/ae/'],
+    }
+
+    category_patterns = {
+        'blogs': [r'/blogs/', r'/blogs-', r'/en/blogs/', r'/blog/',r'/insights/'],
+        'corporate': [r'/corporate/', r'/corporate-', r'/en/corporate/', r'/corp/'],
+        'how-to': [r'/how-to/', r'/how-to-', r'/en/how-to/', r'/howto/'],
+        'products': [r'/products/', r'/products-'],
+        'resources': [r'/resources/', r'/resources-'],
+        'company': [r'/company/', r'/company-'],
+        'partners': [r'/partners/', r'/partners-'],
+        'solutions': [r'/solutions/', r'/solutions-'],
+        'support': [r'/support/', r'/help/', r'/faq/'],
+        'about': [r'/about/', r'/about-us/'],
+        'contact': [r'/contact/', r'/contact-us/'],
+        'news': [r'/news/', r'/press/'],
+        'careers': [r'/careers/', r'/jobs/'],
+        'legal': [r'/legal/', r'/privacy/', r'/terms/'],
+    }
+
+    specific_domain_patterns = {
+        'zh': [r'teamviewer\.cn', r'teamviewer\.com\.cn'],
+        'ja': [r'teamviewer\.com/ja'],
+        'it': [r'teamviewer\.com/it'],
+        'es': [r'teamviewer\.com/latam']
+    }
+
+    for lang, patterns in specific_domain_patterns.items():
+        if any(re.search(pattern, url, re.IGNORECASE) for pattern in patterns):
+            language = lang
+            break
+
+    if not language:
+        for domain_suffix, lang in country_lang_map.items():
+            if hostname.endswith(domain_suffix):
+                language = lang
+                break
+
+    path_parts = path.split('/')
+    
+    # Check for language identifiers
+    for lang, patterns in language_patterns.items():
+        for pattern in patterns:
+            clean_pattern = pattern.strip('/')
+            if clean_pattern in path_parts:
+                language = lang
+                break
+        if language:
+            break
+        
+    for cat, patterns in category_patterns.items():
+        for pattern in patterns:
+            clean_pattern = pattern.strip('/')
+            if clean_pattern in path_parts:
+                category = cat
+                break
+        if category:
+            break
+
+    if not language and parsed_url.query:
+        lang_param = re.search(r'(?:^|&)lang=([a-zA-Z]{2})', parsed_url.query)
+        if lang_param and lang_param.group(1).lower() in language_patterns:
+            language = lang_param.group(1).lower()
+
+    product_lang_patterns = {
+        'es': [r'/distribucion-de-licencias-tensor'],
+        'zh': [r'/anydesk\.com/zhs/solutions/']
+    }
+
+    if not language:
+        for lang, patterns in product_lang_patterns.items():
+            if any(re.search(pattern, url, re.IGNORECASE) for pattern in patterns):
+                language = lang
+                break
+
+    if not language:
+        language = 'en'
+
+    return language, category
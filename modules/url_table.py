@@ -0,0 +1,217 @@
+import logging
+from urllib.parse import urlsplit, urlunsplit
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# URLs of this shape are already canonical and skip the per-URL parse.
+CANONICAL_URL = r"https?://[a-z0-9.\-]+/[^#\s]*"
+
+# The delta dict is merged into the sorted main index once it grows past
+# this many entries or the size of the main index, whichever is larger.
+MIN_MERGE_SIZE = 4096
+
+
+def canonicalize_url(url):
+    """Canonical form of a URL: lower-case scheme and host, no default port or fragment, "/" for an empty path."""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def canonicalize_urls(urls):
+    """Vectorized canonicalize_url; missing values stay None."""
+    urls = pd.Series(urls, dtype=object).reset_index(drop=True)
+    canonical = urls.to_numpy(dtype=object, copy=True)
+    valid, needs_parse = _parse_mask(urls)
+    canonical[~valid] = None
+    canonical[needs_parse] = [canonicalize_url(url) for url in canonical[needs_parse].tolist()]
+    return canonical
+
+
+def _parse_mask(urls):
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        try:
+            array = pa.array(urls, type=pa.large_string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            array = None
+        if array is not None:
+            valid = array.is_valid().to_numpy(zero_copy_only=False)
+            canonical = pc.match_substring_regex(array, f"^{CANONICAL_URL}$").fill_null(False)
+            return valid, valid & ~canonical.to_numpy(zero_copy_only=False)
+
+    # .str yields NaN for anything that is not a string
+    valid = urls.str.len().notna().to_numpy(dtype=bool)
+    return valid, valid & ~urls.str.fullmatch(CANONICAL_URL).fillna(False).to_numpy(dtype=bool)
+
+
+def toggle_trailing_slash(url):
+    """The same URL with its trailing slash added or removed ("/" itself is left alone)."""
+    path_end = url.find("?")
+    path, query = (url, "") if path_end < 0 else (url[:path_end], url[path_end:])
+    if path.endswith("/"):
+        if path.count("/") <= 3:
+            return url
+        return path[:-1] + query
+    return path + "/" + query
+
+
+class UrlTable:
+    """Interns canonical URLs into a dense int32 id space.
+
+    Canonical strings are stored once, in id order, in Arrow string arrays
+    (numpy object arrays without pyarrow). Lookups go through a sorted
+    array of 64-bit hashes of the merged ids, verified against the stored
+    string, plus a small dict of ids added since the last merge. The dict
+    is folded into the sorted index whenever it outgrows it, so the total
+    merge cost stays O(n log n).
+    """
+
+    def __init__(self, urls=None):
+        self._chunks = []
+        self._store = None
+        self._size = 0
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._key_ids = np.zeros(0, dtype=np.int32)
+        self._delta = {}
+        if urls is not None:
+            self.intern(urls)
+
+    def __len__(self):
+        return self._size
+
+    def intern(self, urls):
+        """Ids of ``urls``, adding the ones not seen before (-1 for missing values)."""
+        canonical = canonicalize_urls(urls)
+        ids = self._find(canonical)
+        new = (ids < 0) & _present(canonical)
+        if new.any():
+            new_urls = pd.unique(canonical[new])
+            start = self._size
+            self._append(new_urls)
+            self._delta.update(zip(new_urls.tolist(), range(start, start + len(new_urls))))
+            ids[new] = start + pd.Index(new_urls).get_indexer(canonical[new])
+            if len(self._delta) > max(MIN_MERGE_SIZE, len(self._keys)):
+                self._merge_delta()
+        return ids
+
+    def lookup(self, urls, match_trailing_slash=False):
+        """Ids of ``urls`` without adding them (-1 if unknown).
+
+        With ``match_trailing_slash`` a URL that is not in the table falls
+        back to its variant with the trailing slash toggled.
+        """
+        canonical = canonicalize_urls(urls)
+        ids = self._find(canonical)
+        if match_trailing_slash:
+            retry = np.flatnonzero((ids < 0) & _present(canonical))
+            if len(retry):
+                variants = np.asarray([toggle_trailing_slash(url) for url in canonical[retry].tolist()], dtype=object)
+                ids[retry] = self._find(variants)
+        return ids
+
+    def urls(self, ids):
+        """Canonical URL strings of ``ids`` as an object array."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._store is None:
+            self._store = _concat_chunks(self._chunks)
+            self._chunks = [self._store]
+        if isinstance(self._store, np.ndarray):
+            return self._store[ids]
+        return self._store.take(ids).to_numpy(zero_copy_only=False)
+
+    def _find(self, canonical):
+        ids = np.full(len(canonical), -1, dtype=np.int32)
+        present = np.flatnonzero(_present(canonical))
+        if not len(present):
+            return ids
+
+        if len(self._keys):
+            values = canonical[present]
+            keys = pd.util.hash_array(values, categorize=False)
+            positions = np.searchsorted(self._keys, keys)
+            positions = np.minimum(positions, len(self._keys) - 1)
+            hit = np.flatnonzero(self._keys[positions] == keys)
+            candidates = self._key_ids[positions[hit]]
+            # Guard against 64-bit hash collisions
+            same = self.urls(candidates) == values[hit]
+            ids[present[hit[same]]] = candidates[same]
+            for position in hit[~same].tolist():
+                ids[present[position]] = self._probe(values[position], keys[position])
+
+        if self._delta:
+            missing = present[ids[present] < 0]
+            get = self._delta.get
+            ids[missing] = [get(url, -1) for url in canonical[missing].tolist()]
+        return ids
+
+    def _probe(self, url, key):
+        start = np.searchsorted(self._keys, key, side="left")
+        stop = np.searchsorted(self._keys, key, side="right")
+        for candidate in self._key_ids[start:stop].tolist():
+            if self.urls([candidate])[0] == url:
+                return candidate
+        return -1
+
+    def _append(self, new_urls):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            pa = None
+        chunk = pa.array(new_urls, type=pa.large_string()) if pa is not None else np.asarray(new_urls, dtype=object)
+        self._chunks.append(chunk)
+        self._store = None
+        self._size += len(new_urls)
+
+    def _merge_delta(self):
+        urls = np.asarray(list(self._delta), dtype=object)
+        ids = np.fromiter(self._delta.values(), dtype=np.int32, count=len(self._delta))
+        keys = np.concatenate([self._keys, pd.util.hash_array(urls, categorize=False)])
+        key_ids = np.concatenate([self._key_ids, ids])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._key_ids = key_ids[order]
+        self._delta = {}
+        logger.debug(f"Merged URL table index to {len(self._keys)} entries")
+
+
+def rows_by_id(ids, size):
+    """Dense id -> first row index map (-1 for ids without a row), for O(n) joins on URL ids."""
+    ids = np.asarray(ids)
+    rows = np.full(size, -1, dtype=np.int64)
+    present = np.flatnonzero(ids >= 0)[::-1]
+    # Reversed so that the first row of a repeated id is written last
+    rows[ids[present]] = present
+    return rows
+
+
+def _present(canonical):
+    return pd.notna(canonical)
+
+
+def _concat_chunks(chunks):
+    if not chunks:
+        return np.zeros(0, dtype=object)
+    if isinstance(chunks[0], np.ndarray):
+        return np.concatenate(chunks)
+    import pyarrow as pa
+
+    return pa.concat_arrays(chunks)
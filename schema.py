@@ -1,242 +1,195 @@
-import requests
+import hashlib
 import json
-import extruct
-from w3lib.html import get_base_url
-from urllib.parse import urljoin, urlparse
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
+from pathlib import Path
+import pandas as pd
+from modules.checkpoint import ProbeJournal
+from modules.instrumentation import dump_metrics
+from modules.profiling import AuditProfiler
+from modules.page_sampling import MAX_SAMPLED_PAGES, PAGES_PER_TEMPLATE, normalize_base_url, sample_pages, variation_urls
+from modules.schema_markup import collect_schema_types
+from modules.schema_pipeline import PARSE_WORKERS, iter_schema_types
+from modules.sitemap_lastmod import LastmodIndex
+from modules.sitemaps import iter_sitemap_entries
 
-SCHEMA_CHECKLIST = [
-    ("Breadcrumbs", "BreadcrumbList"),
-    ("FAQ", "FAQPage"),
-    ("Article", "Article"),
-    ("Video", "VideoObject"),
-    ("Organization", "Organization"),
-    ("How-to", "HowTo"),
-    ("WebPage", "WebPage"),
-    ("Product", "Product"),
-    ("Review", "Review"),
-    ("Person", "Person"),
-    ("Event", "Event"),
-    ("Recipe", "Recipe"),
-    ("LocalBusiness", "LocalBusiness"),
-    ("CreativeWork", "CreativeWork"),
-    ("ItemList", "ItemList"),
-    ("JobPosting", "JobPosting"),
-    ("Course", "Course"),
-    ("ImageObject", "ImageObject"),
-    ("Service", "Service"),
-]
+# Sitemaps of this many domains are walked at once in batch mode.
+SITEMAP_SAMPLE_WORKERS = 4
 
-# Common URL variations to check
-URL_VARIATIONS = [
-    "",
-    "/about",
-    "/about-us",
-    "/products",
-    "/services",
-    "/solutions"
-    "/blog",
-    "blogs",
-    "cyberglossary",
-    "/news",
-    "/resources",
-    "/how-to",
-    "/tutorials",
-    "/guides",
-    "/faq",
-    "/help",
-    "/support",
-    "/contact",
-    "/contact-us",
-    "/reviews",
-    "/testimonials",
-    "/portfolio",
-    "/cases",
-    "/case-studies",
-    "/team",
-    "/careers",
-    "/jobs",
-    "/catalog",
-    "/pricing",
-    "/plans",
-    "/login",
-    "/signup",
-    "/register",
-]
-
-def extract_schemas(url, timeout=10):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    }
-    try:
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        base_url = get_base_url(response.text, response.url)
-
-        data = extruct.extract(
-            response.text, base_url=base_url, syntaxes=["json-ld", "microdata", "rdfa"]
-        )
-        return data
-    except requests.exceptions.RequestException:
-        return None
-
-
-def flatten_schema(schema_item):
-    """Flatten nested schema items, including @graph structures."""
-    if isinstance(schema_item, list):
-        for item in schema_item:
-            yield from flatten_schema(item)
-    elif isinstance(schema_item, dict):
-        if "@graph" in schema_item:
-            yield from flatten_schema(schema_item["@graph"])
-        yield schema_item
-
-
-def extract_schema_names(schemas):
-    schema_names = set()
-
-    for item in flatten_schema(schemas.get("json-ld", [])):
-        if "@type" in item:
-            if isinstance(item["@type"], list):
-                for t in item["@type"]:
-                    schema_names.add(t)
-            else:
-                schema_names.add(item["@type"])
-
-    for item in flatten_schema(schemas.get("microdata", [])):
-        if "type" in item:
-            if isinstance(item["type"], list):
-                for t in item["type"]:
-                    schema_names.add(t)
-            else:
-                schema_names.add(item["type"])
-
-    for item in flatten_schema(schemas.get("rdfa", [])):
-        if "type" in item:
-            if isinstance(item["type"], list):
-                for t in item["type"]:
-                    schema_names.add(t)
-            else:
-                schema_names.add(item["type"])
-
-    return sorted(schema_names)
-
-def normalize_base_url(url):
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    parsed = urlparse(url)
-    return f"{parsed.scheme}://{parsed.netloc}"
-
-def process_single_url(args):
-    url, index, total, timeout = args
-    
-    try:
-        schemas = extract_schemas(url, timeout)
-        
-        if schemas:
-            schema_names = extract_schema_names(schemas)
-            if schema_names:
-                processed_names = set()
-                for name in schema_names:
-                    if isinstance(name, str):
-                        short_name = name.split('/')[-1]
-                        processed_names.add(short_name)
-                    else:
-                        processed_names.add(str(name))
-                
-                return {
-                    'url': url,
-                    'success': True,
-                    'schemas': processed_names,
-                    'schema_count': len(processed_names),
-                    'index': index
-                }
-            else:
-                return {
-                    'url': url,
-                    'success': True,
-                    'schemas': set(),
-                    'schema_count': 0,
-                    'index': index
-                }
+def short_schema_names(schema_names):
+    processed_names = set()
+    for name in schema_names:
+        if isinstance(name, str):
+            short_name = name.split('/')[-1]
+            processed_names.add(short_name)
         else:
-            return {
-                'url': url,
-                'success': False,
-                'schemas': set(),
-                'schema_count': 0,
-                'index': index
-            }
-    except Exception as e:
-        return {
-            'url': url,
-            'success': False,
-            'schemas': set(),
-            'schema_count': 0,
-            'index': index,
-            'error': str(e)
-        }
+            processed_names.add(str(name))
+    return processed_names
 
-def check_multiple_urls_threaded(base_url, max_workers=10, timeout=10, verbose=True):
+def check_multiple_urls_threaded(base_url, max_workers=10, timeout=10, verbose=True, page_urls=None, parse_workers=PARSE_WORKERS, full_schemas=False, journal=None, previous=None):
     base_url = normalize_base_url(base_url)
     all_schemas = set()
     successful_urls = []
     failed_urls = []
     url_schemas = {}
+    # Full extruct data of pages with schemas, parsed from the HTML fetched once
+    url_full_schemas = {}
     
     # Create list of URLs to check
-    urls_to_check = []
-    for i, variation in enumerate(URL_VARIATIONS):
-        full_url = urljoin(base_url, variation)
-        urls_to_check.append((full_url, i, len(URL_VARIATIONS), timeout))
+    if page_urls is None:
+        page_urls = variation_urls(base_url)
     
     if verbose:
-        print(f"Checking schema markup across {len(urls_to_check)} pages for: {base_url}")
-        print(f"Using {max_workers} concurrent threads")
+        print(f"Checking schema markup across {len(page_urls)} pages for: {base_url}")
+        print(f"Using {max_workers} fetch threads and {parse_workers} parse processes")
         print("=" * 60)
-    
-    progress_lock = Lock()
-    completed_count = [0]
-    
-    def update_progress(result, total_urls, completed_count):
-        with progress_lock:
-            completed_count[0] += 1
 
     start_time = time.time()
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(process_single_url, url_args): url_args[0] 
-                        for url_args in urls_to_check}
-        
-        for future in as_completed(future_to_url):
-            result = future.result()
-            update_progress(result, len(urls_to_check), completed_count)
-            
-            if result['success']:
-                successful_urls.append(result['url'])
-                if result['schemas']:
-                    all_schemas.update(result['schemas'])
-                    url_schemas[result['url']] = result['schemas']
-            else:
-                failed_urls.append(result['url'])
+    # Threads fetch, processes parse; see iter_schema_types for the backpressure between them
+    for url, status, schema_names, full_data in iter_schema_types(
+        page_urls, fetch_workers=max_workers, parse_workers=parse_workers, timeout=timeout, full=full_schemas, journal=journal,
+        previous=previous,
+    ):
+        if schema_names is not None:
+            successful_urls.append(url)
+            if schema_names:
+                schemas = short_schema_names(schema_names)
+                all_schemas.update(schemas)
+                url_schemas[url] = schemas
+                if full_data:
+                    url_full_schemas[url] = full_data
+        else:
+            failed_urls.append(url)
     
     end_time = time.time()
     processing_time=end_time-start_time
     
     if verbose:
         print(f"\nCompleted in {processing_time:.2f} seconds")
-        print(f"Average time per URL: {processing_time/len(urls_to_check):.2f} seconds")
+        print(f"Average time per URL: {processing_time/max(len(page_urls), 1):.2f} seconds")
     
-    return all_schemas, successful_urls, failed_urls, url_schemas, processing_time
+    return all_schemas, successful_urls, failed_urls, url_schemas, processing_time, url_full_schemas
+
+def read_domains(path):
+    """Domains of a batch file, one per line; blank lines and ``#`` comments are skipped, ``-`` reads stdin."""
+    with nullcontext(sys.stdin) if path == "-" else Path(path).open(encoding="utf-8") as lines:
+        for line in lines:
+            domain = line.split("#", 1)[0].strip()
+            if domain:
+                yield domain
+
+def iter_batch_pages(domains, page_domains, sample_sitemap=False, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES, checkpoint=None, sample_workers=SITEMAP_SAMPLE_WORKERS):
+    """Page URLs of every domain, recording each page's domain in ``page_domains``.
+
+    With ``sample_sitemap`` the sitemaps are sampled in a pool of
+    ``sample_workers`` threads of their own, a few domains ahead, and each
+    domain's pages are yielded as soon as its sample is ready. The fetcher
+    threads pulling from this generator then only wait on a sitemap walk
+    when no sampled domain is left to fetch.
+    """
+    base_urls = iter(dict.fromkeys(normalize_base_url(domain) for domain in domains))
+    if not sample_sitemap:
+        for base_url in base_urls:
+            yield from _domain_pages(base_url, variation_urls(base_url), page_domains)
+        return
+
+    sample = partial(sample_sitemap_pages, per_template=per_template, max_pages=max_pages, verbose=False, checkpoint=checkpoint)
+    with ThreadPoolExecutor(max_workers=sample_workers, thread_name_prefix="sitemap-sample") as pool:
+        pending = {}
+        while True:
+            for base_url in islice(base_urls, 2 * sample_workers - len(pending)):
+                pending[pool.submit(sample, base_url)] = base_url
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                base_url = pending.pop(future)
+                page_urls = future.result()
+                yield from _domain_pages(base_url, page_urls if page_urls is not None else variation_urls(base_url), page_domains)
+
+def _domain_pages(base_url, page_urls, page_domains):
+    for url in page_urls:
+        page_domains[url] = base_url
+        yield url
+
+def run_batch(domains, output, max_workers=20, timeout=10, parse_workers=PARSE_WORKERS, full_schemas=False, sample_sitemap=False, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES, checkpoint=None):
+    """Probe many domains through one shared fetch/parse pipeline, writing NDJSON to ``output``.
+
+    The pages of all domains interleave in the same bounded pipeline, so a
+    slow site does not hold up the rest. One ``"page"`` record is written
+    and flushed per URL as it completes; only the per-domain type sets are
+    kept, for a closing ``"domain"`` record each. With a ``checkpoint``
+    file, pages probed by an interrupted run of the same domain list are
+    replayed from its journal rather than fetched again.
+    """
+    page_domains = {}
+    domain_stats = {}
+    journal = nullcontext()
+    if checkpoint:
+        domains = list(domains)
+        digest = hashlib.sha256("\n".join(sorted({normalize_base_url(domain) for domain in domains})).encode("utf-8")).hexdigest()
+        journal = ProbeJournal(checkpoint, f"schema-batch:{digest[:16]}:{full_schemas}")
+    pages = iter_batch_pages(domains, page_domains, sample_sitemap, per_template, max_pages, checkpoint)
+    with journal:
+        for url, status, schema_names, full_data in iter_schema_types(
+            pages, fetch_workers=max_workers, parse_workers=parse_workers, timeout=timeout, full=full_schemas,
+            journal=journal if checkpoint else None,
+        ):
+            domain = page_domains.pop(url, None)
+            stats = domain_stats.setdefault(domain, {"pages": 0, "failed": 0, "schemas": set()})
+            stats["pages"] += 1
+            record = {"record": "page", "domain": domain, "url": url, "status": status, "success": schema_names is not None}
+            if schema_names is None:
+                stats["failed"] += 1
+            else:
+                schemas = short_schema_names(schema_names)
+                stats["schemas"].update(schemas)
+                record["schemas"] = sorted(schemas)
+                if full_data:
+                    record["nested"] = sorted(collect_schema_types(full_data)[1])
+                    record["schema_data"] = full_data
+            output.write(json.dumps(record, default=str) + "\n")
+            output.flush()
+
+    for domain, stats in domain_stats.items():
+        output.write(json.dumps({
+            "record": "domain",
+            "domain": domain,
+            "pages": stats["pages"],
+            "failed": stats["failed"],
+            "schemas": sorted(stats["schemas"]),
+        }) + "\n")
+    output.flush()
+    return len(domain_stats)
+
+def sample_sitemap_pages(base_url, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES, verbose=True, checkpoint=None):
+    """Representative pages per path template of the site's sitemap, None if it has no sitemap."""
+    page_urls, _ = sample_sitemap(base_url, per_template, max_pages, verbose, checkpoint)
+    return page_urls
+
+def sample_sitemap(base_url, per_template=PAGES_PER_TEMPLATE, max_pages=MAX_SAMPLED_PAGES, verbose=True, checkpoint=None, lastmod=False):
+    """``sample_sitemap_pages``, paired with a ``LastmodIndex`` of the whole sitemap read in the same walk with ``lastmod`` (None otherwise)."""
+    base_url = normalize_base_url(base_url)
+    index = None
+    with ProbeJournal(checkpoint, f"sitemap:{base_url}") if checkpoint else nullcontext() as journal:
+        entries = iter_sitemap_entries(base_url, journal)
+        if lastmod:
+            # Walked once, read by both
+            entries = list(entries)
+            index = LastmodIndex.from_entries(entries)
+        sample = sample_pages((entry.loc for entry in entries), per_template=per_template, max_pages=max_pages)
+    if sample.empty:
+        if verbose:
+            print("No sitemap found, checking common URL variations instead")
+        return None, index
+    if verbose:
+        print(f"Sampled {len(sample)} pages from {sample['Template'].nunique()} sitemap templates")
+    return sample["URL"].tolist(), index
 
 def display_results(all_schemas):
     if all_schemas:
@@ -253,13 +206,28 @@ def main():
     parser = argparse.ArgumentParser(
         description="Extract schema markups from multiple webpage variations using multithreading."
     )
-    parser.add_argument("url", help="Base URL of the website to check")
+    parser.add_argument("url", nargs="?", help="Base URL of the website to check")
+    parser.add_argument(
+        "--domains-file",
+        help="Batch mode: file with one domain per line ('-' for stdin); per-URL results are written as NDJSON",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="NDJSON output file of batch mode (default: stdout)",
+    )
     parser.add_argument(
         "--workers",
         type=int,
         default=20,
         help="Number of concurrent threads (default: 10)",
     )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help=f"Number of processes parsing the fetched pages (default: {PARSE_WORKERS})",
+    )
     parser.add_argument(
         "--timeout",
         type=int,
@@ -271,21 +239,115 @@ def main():
         action="store_true",
         help="Reduce output verbosity",
     )
+    parser.add_argument(
+        "--sample-sitemap",
+        action="store_true",
+        help="Check pages sampled per template from the sitemap instead of the common URL variations",
+    )
+    parser.add_argument(
+        "--per-template",
+        type=int,
+        default=PAGES_PER_TEMPLATE,
+        help=f"Pages sampled per sitemap template (default: {PAGES_PER_TEMPLATE})",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=MAX_SAMPLED_PAGES,
+        help=f"Maximum number of sampled pages (default: {MAX_SAMPLED_PAGES})",
+    )
     parser.add_argument(
         "--full-schemas",
         action="store_true",
         help="Show full schema data for pages with schemas",
     )
+    parser.add_argument(
+        "--checkpoint",
+        help="Journal per-URL results to this SQLite file and resume an interrupted run from it; "
+        "the results of the last completed run of a URL are kept there for --changed-since",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="DATE",
+        help="With --sample-sitemap and --checkpoint, only fetch sampled pages the sitemap dates after DATE "
+        "(e.g. the previous run's) or not at all, and take the others from the last completed run",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Profile the run and save pstats, speedscope JSON and allocation artifacts to this directory",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Write per-stage timings and counters as JSON to this file ('-' for stdout)",
+    )
     args = parser.parse_args()
+    if not args.url and not args.domains_file:
+        parser.error("a URL or --domains-file is required")
+    if args.changed_since and (args.domains_file or not args.sample_sitemap or not args.checkpoint):
+        parser.error("--changed-since needs a URL, --sample-sitemap and --checkpoint")
+    if args.changed_since:
+        try:
+            pd.Timestamp(args.changed_since)
+        except ValueError:
+            parser.error(f"--changed-since: invalid date '{args.changed_since}'")
+
+    if args.profile:
+        with AuditProfiler("schema", directory=args.profile) as profiler:
+            run(args)
+        if profiler.artifacts:
+            print(f"Profile written to {profiler.directory}", file=sys.stderr)
+    else:
+        run(args)
+
+def run(args):
+    if args.domains_file:
+        with nullcontext(sys.stdout) if args.output == "-" else Path(args.output).open("w", encoding="utf-8") as output:
+            run_batch(
+                read_domains(args.domains_file),
+                output,
+                max_workers=args.workers,
+                timeout=args.timeout,
+                parse_workers=args.parse_workers,
+                full_schemas=args.full_schemas,
+                sample_sitemap=args.sample_sitemap,
+                per_template=args.per_template,
+                max_pages=args.max_pages,
+                checkpoint=args.checkpoint,
+            )
+        if args.metrics:
+            dump_metrics(args.metrics)
+        return
 
     verbose = not args.quiet
+
+    page_urls = None
+    lastmod = None
+    if args.sample_sitemap:
+        page_urls, lastmod = sample_sitemap(args.url, args.per_template, args.max_pages, verbose, args.checkpoint, lastmod=bool(args.changed_since))
+    journal = nullcontext()
+    previous = None
+    if args.checkpoint:
+        journal = ProbeJournal(args.checkpoint, f"schema:{normalize_base_url(args.url)}:{args.full_schemas}", keep_last=True)
+        if lastmod is not None and page_urls is not None:
+            changed = set(lastmod.changed_since(args.changed_since, page_urls))
+            _, last = journal.last_completed()
+            previous = {url: last[url] for url in page_urls if url not in changed and url in last}
+            if verbose:
+                print(f"Reusing the results of {len(previous)} pages unchanged since {args.changed_since}")
     
-    all_schemas, successful_urls, failed_urls, url_schemas, processing_time = check_multiple_urls_threaded(
-        args.url, 
-        max_workers=args.workers, 
-        timeout=args.timeout,
-        verbose=verbose
-    )
+    with journal:
+        all_schemas, successful_urls, failed_urls, url_schemas, processing_time, url_full_schemas = check_multiple_urls_threaded(
+            args.url, 
+            max_workers=args.workers, 
+            timeout=args.timeout,
+            verbose=verbose,
+            page_urls=page_urls,
+            parse_workers=args.parse_workers,
+            full_schemas=args.full_schemas,
+            journal=journal if args.checkpoint else None,
+            previous=previous,
+        )
     
     display_results(all_schemas)
 
@@ -297,9 +359,15 @@ def main():
             if url in url_schemas and url_schemas[url]:
                 print(f"\n{url}:")
                 print("-" * len(url))
-                schemas = extract_schemas(url, args.timeout)
+                schemas = url_full_schemas.get(url)
                 if schemas:
+                    _, nested = collect_schema_types(schemas)
+                    for parent, schema_type in sorted(nested):
+                        print(f"  {parent} > {schema_type}")
                     print(json.dumps(schemas, indent=2))
 
+    if args.metrics:
+        dump_metrics(args.metrics)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -9,6 +9,7 @@ import pandas as pd
 from typing import Dict, Set, List, Any, Tuple
 from collections import defaultdict
 import re
+from modules.schema_markup import walk_schema_types
 
 st.set_page_config(
     page_title="Debug Schema Markup Detector",
@@ -120,62 +121,6 @@ def manual_json_ld_parse(json_blocks: List[str]) -> List[Dict]:
     
     return parsed_blocks, parsing_errors
 
-def deep_inspect_object(obj: Any, path: str = "", max_depth: int = 10, current_depth: int = 0) -> List[Dict]:
-    """Deep inspection of any object to find all nested structures."""
-    findings = []
-    
-    if current_depth > max_depth:
-        return findings
-    
-    if isinstance(obj, dict):
-        # Record this object
-        object_info = {
-            "path": path or "root",
-            "depth": current_depth,
-            "type": "dict",
-            "keys": list(obj.keys()),
-            "has_type_field": "@type" in obj or "type" in obj,
-            "type_values": []
-        }
-        
-        # Extract type information
-        if "@type" in obj:
-            type_val = obj["@type"]
-            if isinstance(type_val, list):
-                object_info["type_values"].extend(type_val)
-            else:
-                object_info["type_values"].append(type_val)
-        
-        if "type" in obj:
-            type_val = obj["type"]
-            if isinstance(type_val, list):
-                object_info["type_values"].extend(type_val)
-            else:
-                object_info["type_values"].append(type_val)
-        
-        findings.append(object_info)
-        
-        # Recursively inspect all values
-        for key, value in obj.items():
-            new_path = f"{path}.{key}" if path else key
-            findings.extend(deep_inspect_object(value, new_path, max_depth, current_depth + 1))
-    
-    elif isinstance(obj, list):
-        findings.append({
-            "path": path or "root",
-            "depth": current_depth,
-            "type": "list",
-            "length": len(obj),
-            "has_type_field": False,
-            "type_values": []
-        })
-        
-        for i, item in enumerate(obj):
-            new_path = f"{path}[{i}]" if path else f"[{i}]"
-            findings.extend(deep_inspect_object(item, new_path, max_depth, current_depth + 1))
-    
-    return findings
-
 def normalize_url(url: str) -> str:
     """Normalize URL by adding https:// if not present."""
     if not url.startswith(('http://', 'https://')):
@@ -245,17 +190,18 @@ if st.button("🐛 Debug Schema Extraction", type="primary"):
                         
                         if show_deep_inspection:
                             st.write("**Deep Inspection Results:**")
-                            inspection_results = deep_inspect_object(
-                                block_info["parsed_data"], 
-                                max_depth=max_inspection_depth
-                            )
+                            typed_objects = list(walk_schema_types(
+                                block_info["parsed_data"],
+                                type_keys=("@type", "type"),
+                                max_depth=max_inspection_depth,
+                                with_paths=True
+                            ))
                             
                             # Show objects with type information
-                            typed_objects = [r for r in inspection_results if r.get("has_type_field")]
                             if typed_objects:
                                 st.write(f"Found {len(typed_objects)} objects with type information:")
-                                for obj_info in typed_objects:
-                                    st.write(f"• **Path:** `{obj_info['path']}` **Depth:** {obj_info['depth']} **Types:** {obj_info['type_values']}")
+                                for node in typed_objects:
+                                    st.write(f"• **Path:** `{node.path}` **Depth:** {node.depth} **Types:** {list(node.types)}")
                             else:
                                 st.write("❌ No objects with @type or type fields found in this block")
             
@@ -279,21 +225,23 @@ if st.button("🐛 Debug Schema Extraction", type="primary"):
                     
                     if show_deep_inspection and count > 0:
                         with st.expander(f"Deep inspect {markup_type.upper()} data"):
-                            inspection_results = deep_inspect_object(
-                                schemas[markup_type], 
-                                f"{markup_type}_root",
-                                max_depth=max_inspection_depth
-                            )
+                            typed_objects = list(walk_schema_types(
+                                schemas[markup_type],
+                                type_keys=("@type", "type"),
+                                max_depth=max_inspection_depth,
+                                with_paths=True
+                            ))
                             
                             # Show summary
-                            typed_objects = [r for r in inspection_results if r.get("has_type_field")]
-                            st.write(f"**Summary:** {len(inspection_results)} total objects, {len(typed_objects)} with type fields")
+                            nested_objects = [node for node in typed_objects if not node.top_level]
+                            st.write(f"**Summary:** {len(typed_objects)} objects with type fields, {len(nested_objects)} of them nested")
                             
                             # Show all typed objects
                             if typed_objects:
                                 st.write("**Objects with Schema Types:**")
-                                for obj_info in typed_objects:
-                                    st.write(f"• `{obj_info['path']}` (depth {obj_info['depth']}): {obj_info['type_values']}")
+                                for node in typed_objects:
+                                    nested_in = f" inside {list(node.parent_types)}" if node.parent_types else ""
+                                    st.write(f"• `{node.path}` (depth {node.depth}): {list(node.types)}{nested_in}")
                             
                             # Show full data
                             st.json(schemas[markup_type])